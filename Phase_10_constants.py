@@ -79,4 +79,21 @@ LAST_PHASE_PILE = 13
 
 # List of phases that require 1 or 2 mat piles
 PHASE_1_MATS = [4, 5, 6, 8]
-PHASE_2_MATS = [1, 2, 3, 7, 9, 10]
\ No newline at end of file
+PHASE_2_MATS = [1, 2, 3, 7, 9, 10]
+
+# Kinds of event the engine records in a game's log (see phase_10_log.py)
+DRAW_EVENT = 0        # drew the top card of the deck
+PICKUP_EVENT = 1      # picked up the top card of the discard pile
+LAY_EVENT = 2         # laid a card on their own phase pile
+TAKE_BACK_EVENT = 3   # took a card back from their own phase pile
+HIT_EVENT = 4         # hit a card on a completed phase pile
+SKIP_EVENT = 5        # skipped the player holding the hand pile
+DISCARD_EVENT = 6     # discarded a card
+RESHUFFLE_EVENT = 7   # turned the discard pile over to make a new deck
+ROUND_END_EVENT = 8   # the player went out, and the round was scored
+COMPLETE_EVENT = 9    # the player's laid cards made their phase
+RETURN_EVENT = 10     # the player's laid cards didn't make their phase, and went back to their hand
+
+# Card and pile of an event that has none
+NO_CARD = 255
+NO_PILE = 255
@@ -0,0 +1,87 @@
+"""
+Phase 10 card textures
+
+Shared registry of card textures.  Every texture is loaded once per process, so
+flipping a card over only swaps a texture reference.  The numbered cards are
+sliced out of the whole-suit sheets in images/, with the single card images in
+images/*_cards/ used for anything that is not on a sheet.
+"""
+import os
+
+from phase_10_backend import arcade
+from Phase_10_constants import CARD_SUITS, FACE_DOWN_IMAGE
+
+# Key of the face down texture
+FACE_DOWN_KEY = "back"
+
+# Layout of the whole-suit sheets (blueCards.png, ...): 12 cards in rows of 4
+SHEET_CARD_WIDTH = 115
+SHEET_CARD_HEIGHT = 180
+SHEET_COLUMNS = 4
+SHEET_CARD_COUNT = 12
+SHEET_SUITS = 4
+
+
+class TextureRegistry:
+    """ Card textures keyed by (suit, value), plus the face down image """
+
+    def __init__(self):
+        self.textures = {}
+        # Suits whose sheet has been looked for
+        self.sheets_loaded = set()
+        # How many lookups found the texture already loaded, and how many had to load it
+        self.hits = 0
+        self.misses = 0
+
+    def get_texture(self, key, file_name):
+        """returns the texture for key, loading it from file_name the first time"""
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.hits += 1
+            return texture
+        self.misses += 1
+        texture = arcade.load_texture(file_name)
+        self.textures[key] = texture
+        return texture
+
+    def load_sheet(self, suit):
+        """slices the whole-suit sheet into the face textures of its cards, decoding the image once.
+        returns False if there is no sheet for the suit"""
+        self.sheets_loaded.add(suit)
+        file_name = f"./images/{CARD_SUITS[suit]}Cards.png"
+        if suit >= SHEET_SUITS or not os.path.exists(file_name):
+            return False
+        sheet = arcade.load_spritesheet(file_name, SHEET_CARD_WIDTH, SHEET_CARD_HEIGHT, SHEET_COLUMNS, SHEET_CARD_COUNT,
+                                        hit_box_algorithm="None")
+        for value, texture in enumerate(sheet):
+            self.textures.setdefault((suit, value), texture)
+        return True
+
+    def preload(self):
+        """loads every card texture, and returns them all"""
+        for suit in range(SHEET_SUITS):
+            for value in range(SHEET_CARD_COUNT):
+                self.get_face(suit, value)
+        # wild and skip cards
+        self.get_face(4, 12)
+        self.get_face(4, 13)
+        self.get_back()
+        return list(self.textures.values())
+
+    def get_face(self, suit, value):
+        """returns the face up texture of a card"""
+        if suit not in self.sheets_loaded:
+            self.load_sheet(suit)
+        return self.get_texture((suit, value), f"./images/{CARD_SUITS[suit]}_cards/{CARD_SUITS[suit]}{(value + 1):0>2}.png")
+
+    def get_back(self):
+        """returns the face down texture"""
+        return self.get_texture(FACE_DOWN_KEY, FACE_DOWN_IMAGE)
+
+    def stats(self):
+        """returns a dict of the hit/miss counters"""
+        return {"hits": self.hits, "misses": self.misses, "loaded": len(self.textures), "sheets": len(self.sheets_loaded)}
+
+
+# The registry shared by all cards
+textures = TextureRegistry()
@@ -3,10 +3,24 @@ Phase 10 game
 """
 from typing import Optional
 
-import random
-import arcade
+import sys
+import time
+
+# The benchmarks can lay out the window without a display, if pyglet is told so before arcade loads it
+if sys.argv[1:2] == ["bench"] and "--headless" in sys.argv:
+    import pyglet
+    pyglet.options["headless"] = True
+
+from phase_10_backend import arcade
 import webbrowser
-from player_class import Player
+from player_class import Player, Comp
+from phase_10_search import SearchPlayer, SearchPool, play_move
+from phase_10_engine import Phase10Engine
+from phase_10_save import save, load
+from phase_10_log import EventLog
+from phase_10_timing import Timing, TIMING_FILE, timing_enabled
+from phase_10_cards import DECK_SIZE, SKIP, card_suit, card_value
+from card_textures import textures
 
 # Screen title and size
 SCREEN_WIDTH = 1360
@@ -61,6 +75,9 @@ LCOMP_PHASE_X = COMP_HAND_X
 MCOMP_PHASE_X = COMP_HAND_X + HAND_X_SPACING
 RCOMP_PHASE_X = COMP_HAND_X + HAND_X_SPACING * 2
 
+# The X of the phase piles of each player, in turn order
+PHASE_X = [USER_HAND_X, LCOMP_PHASE_X, MCOMP_PHASE_X, RCOMP_PHASE_X]
+
 # Card constants
 CARD_VALUES = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "wild", "skip"]
 CARD_SUITS = ["blue", "green", "red", "yellow", "black"]
@@ -68,6 +85,25 @@ CARD_SUITS = ["blue", "green", "red", "yellow", "black"]
 # If we fan out cards stacked on each other, how far apart to fan them?
 CARD_HORIZONTAL_OFFSET = CARD_WIDTH * CARD_SCALE * 0.4
 
+# Where the phase mats no one needs this round are kept, off the table
+HIDDEN_MAT_POSITION = -SCREEN_WIDTH, -SCREEN_HEIGHT
+
+# Handlers of the window and the engine that are timed, when timing is turned on
+TIMED_HANDLERS = ["on_draw", "on_mouse_press", "on_mouse_release", "on_mouse_motion", "sort_pile", "setup"]
+TIMED_ENGINE_HANDLERS = ["round_over"]
+
+# Seconds between updates of the timing overlay
+TIMING_REFRESH = 0.5
+
+# Seconds a computer player waits before taking its turn, so its moves can be followed
+COMP_TURN_DELAY = 0.8
+
+# File the game is saved to and loaded from
+SAVE_FILE = "phase_10.save"
+
+# File every move of the game is logged to, for replaying it
+LOG_FILE = "phase_10.log"
+
 # Face down image
 FACE_DOWN_IMAGE = "./images/card_back.png"
 
@@ -89,71 +125,34 @@ PHASE_2_MATS = [1, 2, 3, 7, 9, 10]
 
 
 class Card(arcade.Sprite):
-    """ Card sprite """
+    """ Card sprite, a view of one of the engine's card ids """
 
-    def __init__(self, suit=0, value=0, scale=1, points=0):
+    def __init__(self, card_id=0, scale=1):
         """ Card constructor """
 
-        # Attributes for suit, value and points
-        self.suit = suit
-        self.value = value
-        self.points = points
+        # The card this sprite shows, and its suit and value
+        self.card_id = card_id
+        self.suit = card_suit(card_id)
+        self.value = card_value(card_id)
 
-        # Image to use for the sprite when face up
-        self.image_file_name = f"./images/{CARD_SUITS[self.suit]}_cards/{CARD_SUITS[self.suit]}{(self.value + 1):0>2}.png"
         self.is_face_up = False
-        super().__init__(FACE_DOWN_IMAGE, scale, hit_box_algorithm="None")
-
-    def __lt__(self, other):
-        """checks if card is less than other card by it's value."""
-        t1 = f"{self.value:0>2}"
-        t2 = f"{other.value:0>2}"
-        return t1 < t2
-
-    def get_value(self):
-        """returns string of card value"""
-        return f"{self.value:0>2}"
-    
-    def get_color(self):
-        """returns a string of the color of card"""
-        return self.suit
-
-    def get_width(self):
-        """returns the width of the card"""
-        return self.width
-    
-    def change_value(self, new_value):
-        """changes the value of the Card"""
-        self.new_value = new_value
-        self.value = self.new_value
-
-    def change_width(self, new_width):
-        """change width of the card.  done as a percentage."""
-        self.new_width = new_width
-        self.width = self.width * self.new_width
-
-    def get_points(self):
-        """returns the point value of the card based off of the value."""
-        if self.value in range(0, 9):
-            self.points = 5
-        elif self.value in range(9, 12):
-            self.points = 10
-        elif self.value == 13:
-            self.points = 15
-        else:
-            self.points += 25
-        return self.points
+        super().__init__(scale=scale, hit_box_algorithm="None", texture=textures.get_back())
 
     def face_down(self):
         """ Turn card face-down """
-        self.texture = arcade.load_texture(FACE_DOWN_IMAGE)
+        self.texture = textures.get_back()
         self.is_face_up = False
 
     def face_up(self):
         """ Turn card face-up """
-        self.texture = arcade.load_texture(self.image_file_name)
+        self.texture = textures.get_face(self.suit, self.value)
         self.is_face_up = True
 
+    def full_size(self):
+        """ Undo squeezing the card onto a small phase pile.  Cards are reused every round, so
+        a card squeezed last round has to be put back to the size of its texture """
+        self.width = self.texture.width * self.scale
+
     @property
     def is_face_down(self):
         """ Is this card face down? """
@@ -161,12 +160,13 @@ class Card(arcade.Sprite):
 
 # create players
 user = Player("user", USER_HAND_PILE, 1, True)
-lcomp = Player("lcomp", LCOMP_HAND_PILE, 1)
-mcomp = Player("mcomp", MCOMP_HAND_PILE, 1)
-rcomp = Player("rcomp", RCOMP_HAND_PILE, 1)
+lcomp = Comp("lcomp", LCOMP_HAND_PILE, 1)
+mcomp = Comp("mcomp", MCOMP_HAND_PILE, 1)
+rcomp = Comp("rcomp", RCOMP_HAND_PILE, 1)
 
 class MyGame(arcade.Window):
-    """ Main application class. """
+    """ Main application class.  The game rules are in Phase10Engine, this class only draws
+    the engine's piles and turns mouse drags into engine moves. """
 
     def __init__(self):
         super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
@@ -186,68 +186,88 @@ class MyGame(arcade.Window):
         # Sprite list with all the mats tha cards lay on.
         self.pile_mat_list = None
 
-        # Create a list of lists, each holds a pile of cards.
+        # Create a list of lists, each holds the card sprites of a pile.
         self.piles = None
 
+        # The game engine holding the state of the game
+        self.engine = Phase10Engine([user, lcomp, mcomp, rcomp])
+
         # Create list of Players
-        self.player_list = None
-
-
-    def create_phase_mats(self, pile_x, phase):
-        """ creates the play/phase piles for each player = user, lcomp, mcomp, or rcomp.
-        Player will have one or two piles based on which phase they are on """
-        self.pile_x = pile_x
-        self.phase = phase
-        # create phase mats for user
-        if self.pile_x == USER_HAND_X:
-            # one phase mat
-            if self.phase in PHASE_1_MATS:
-                pile = arcade.SpriteSolidColor(PHASE_1_MAT_WIDTH, MAT_HEIGHT, arcade.csscolor.DARK_SLATE_GRAY)
-                pile.position = self.pile_x, BOTTOM_PHASE_Y
-                self.pile_mat_list.append(pile)
-            # two phase mats
-            elif self.phase in PHASE_2_MATS:
-                for i in range(2):
-                    pile = arcade.SpriteSolidColor(PHASE_2_MAT_WIDTH, MAT_HEIGHT, arcade.csscolor.DARK_SLATE_GRAY)
-                    pile.position = (self.pile_x - .034 * HAND_MAT_WIDTH - PHASE_2_MAT_WIDTH / 2) + i * PHASE_2_X_SPACING, BOTTOM_PHASE_Y
-                    self.pile_mat_list.append(pile)
-        # create phase mats for the 3 computers
-        else:
-            # One phase mat
-            if self.phase in PHASE_1_MATS:
-                pile = arcade.SpriteSolidColor(PHASE_1_MAT_WIDTH, MAT_HEIGHT, arcade.csscolor.DARK_SLATE_GRAY)
-                pile.position = self.pile_x, TOP_PHASE_Y
-                self.pile_mat_list.append(pile)
-            # Two phase mats
-            elif self.phase in PHASE_2_MATS:
-                for i in range(2):
-                    pile = arcade.SpriteSolidColor(PHASE_2_MAT_WIDTH, MAT_HEIGHT, arcade.csscolor.DARK_SLATE_GRAY)
-                    pile.position = (self.pile_x - .034 * HAND_MAT_WIDTH - PHASE_2_MAT_WIDTH / 2) + i * PHASE_2_X_SPACING, TOP_PHASE_Y
-                    self.pile_mat_list.append(pile)
+        self.player_list = self.engine.player_list
 
-    def setup(self):
-        """ Set up the game here. Call this function to restart the game. """
+        # Card sprite for each card in the engine, and the round they were made for
+        self.card_sprites = None
+        self.round_number = None
 
-        # List of cards we are dragging with the mouse
-        self.held_cards = []
+        # Seconds the current computer player has been waiting to take its turn
+        self.comp_timer = 0
 
-        # Original location of cards we are dragging with the mouse in case
-        # they have to go back.
-        self.held_cards_original_position = []
+        # Search a SearchPlayer is waiting on, and the worker processes searches run on
+        self.pending_search = None
+        self.search_pool = None
+
+        # Text drawn over the table
+        self.create_hud()
+
+        # Timings of the handlers, if timing is turned on, and whether they are shown
+        self.timing = None
+        self.show_timing = False
+        self.timing_updated = 0
+        if timing_enabled():
+            self.timing = Timing()
+            self.timing.instrument(self, TIMED_HANDLERS)
+            self.timing.instrument(self.engine, TIMED_ENGINE_HANDLERS)
+            self.timing_text = arcade.Text("", 10, SCREEN_HEIGHT / 2 + 130, arcade.csscolor.BLACK, 11,
+                                           width=420, multiline=True, font_name="Courier New")
 
-        # List of Players
-        self.player_list = []
+    @property
+    def game_over(self):
+        """ Has someone won? """
+        return self.engine.game_over
+
+    @property
+    def winner(self):
+        """ Player who won the game """
+        return self.engine.winner
+
+    def comp_turn(self):
+        """ Is it a computer player's turn? """
+        return isinstance(self.player_list[self.engine.get_turn()], Comp)
+
+    def shown_hand(self):
+        """ The hand pile shown face-up: the current player's, or the user's while a computer player is playing """
+        player = self.player_list[self.engine.get_turn()]
+        if isinstance(player, Comp):
+            for player in self.player_list:
+                if not isinstance(player, Comp):
+                    return player.hand
+        return player.hand
+
+    def place_phase_mats(self, pile_x, phase, pile_index):
+        """ Lay out the play/phase piles of a player = user, lcomp, mcomp, or rcomp, on the phase mats
+        from pile_index on.  Player will have one or two piles based on which phase they are on.
+        returns the index of the next phase mat """
+        # user phase mats are at the bottom, the 3 computers at the top
+        pile_y = BOTTOM_PHASE_Y if pile_x == USER_HAND_X else TOP_PHASE_Y
+        # one phase mat
+        if phase in PHASE_1_MATS:
+            self.show_mat(pile_index, PHASE_1_MAT_WIDTH, pile_x, pile_y)
+            return pile_index + 1
+        # two phase mats
+        for i in range(2):
+            self.show_mat(pile_index + i, PHASE_2_MAT_WIDTH,
+                          (pile_x - .034 * HAND_MAT_WIDTH - PHASE_2_MAT_WIDTH / 2) + i * PHASE_2_X_SPACING, pile_y)
+        return pile_index + 2
 
-        # Flags to check if someone has won
-        self.game_over = False
-        self.keep_playing = True
+    def show_mat(self, pile_index, width, x, y):
+        """ Reshape and move a phase mat, and show it """
+        pile = self.pile_mat_list[pile_index]
+        pile.width = width
+        pile.position = x, y
+        pile.visible = True
 
-        # create list of players and counter
-        self.player_list.append(user)
-        self.player_list.append(lcomp)
-        self.player_list.append(mcomp)
-        self.player_list.append(rcomp)
-        n = self.get_turn()
+    def create_table(self):
+        """ Create the mats and the card sprites, once for the window.  They are reset in place for every round. """
 
         # ---  Create the mats the cards go on.
 
@@ -281,188 +301,144 @@ class MyGame(arcade.Window):
         pile.position = COMP_HAND_X + 2 * HAND_X_SPACING, COMP_HAND_Y
         self.pile_mat_list.append(pile)
 
+        # Create a mat for every phase pile there can be.  Each round setup() shapes and places
+        # the ones the players' phases need, and hides the rest off the table
+        for _ in range(PHASE_PILE_1, LAST_PHASE_PILE + 1):
+            pile = arcade.SpriteSolidColor(PHASE_2_MAT_WIDTH, MAT_HEIGHT, arcade.csscolor.DARK_SLATE_GRAY)
+            self.pile_mat_list.append(pile)
 
-        # Create the Phase piles
-        self.create_phase_mats(USER_HAND_X, user.phase)
-        self.create_phase_mats(LCOMP_PHASE_X, lcomp.phase)
-        self.create_phase_mats(MCOMP_PHASE_X, mcomp.phase)
-        self.create_phase_mats(RCOMP_PHASE_X, rcomp.phase)
-
-        # --- Create, shuffle, and deal the cards
+        # --- Create a card sprite for every card in the deck
 
         # Sprite list with all the cards, no matter what pile they are in.
+        # All the card textures go in its atlas up front, so the whole list draws in one batch
         self.card_list = arcade.SpriteList()
+        self.card_list.preload_textures(textures.preload())
+        self.card_sprites = []
+        for card_id in range(DECK_SIZE):
+            card = Card(card_id, CARD_SCALE)
+            card.position = DECK_X, DECK_Y
+            self.card_sprites.append(card)
+            self.card_list.append(card)
 
-        # Create 2 of every numbered card
-        for i in range(2):
-            for card_suit in range(4):
-                for card_value in range(0, 12):
-                    card = Card(card_suit, card_value, CARD_SCALE)
-                    card.position = DECK_X, DECK_Y
-                    self.card_list.append(card)
-        # Create 8 wild cards
-        for i in range(8):
-            wild_card = Card(4, 12, CARD_SCALE)
-            wild_card.position = DECK_X, DECK_Y         
-            self.card_list.append(wild_card)
-        # Create 4 skip cards
-        for i in range(4):
-            skip_card = Card(4, 13, CARD_SCALE)
-            skip_card.position = DECK_X, DECK_Y 
-            self.card_list.append(skip_card)
-
-        # Shuffle the cards
-        for pos1 in range(len(self.card_list)):
-            pos2 = random.randrange(len(self.card_list))
-            self.card_list.swap(pos1, pos2)
+    def setup(self):
+        """ Set up the round the engine has dealt.  Call this function to start the game, and
+        again whenever the engine deals a new round. """
+
+        # List of cards we are dragging with the mouse
+        self.held_cards = []
+
+        # Original location of cards we are dragging with the mouse in case
+        # they have to go back.
+        self.held_cards_original_position = []
+
+        # Deal the first round
+        if self.engine.piles is None:
+            self.engine.setup()
+            self.start_log()
+        self.round_number = self.engine.round_number
+
+        if self.card_list is None:
+            self.create_table()
+
+        # Lay out the Phase piles, and hide the mats no one needs this round
+        pile_index = PHASE_PILE_1
+        for player, pile_x in zip(self.player_list, PHASE_X):
+            pile_index = self.place_phase_mats(pile_x, player.phase, pile_index)
+        for pile in self.pile_mat_list[pile_index:]:
+            pile.position = HIDDEN_MAT_POSITION
+            pile.visible = False
 
         # Create a list of lists, each holds a pile of cards.
         self.piles = [[] for _ in range(PILE_COUNT)]
 
-        # Put all the cards in the DECK face-down pile
-        for card in self.card_list:
-            self.piles[DECK_FACE_DOWN_PILE].append(card)
-
-        # - Pull from that pile into the hand piles, cards will be face-up for whichever players turn it is. The other hands face-down
-
-        # Deal 10 cards to USER hand
-        for j in range(10):
-            # Pop the card off the deck we are dealing from
-            card = self.piles[DECK_FACE_DOWN_PILE].pop()
-            # Put in the proper pile
-            if len(self.piles[USER_HAND_PILE]) > 0:
-                # Move cards to proper position
-                top_card = self.piles[USER_HAND_PILE][-1]
-                self.piles[USER_HAND_PILE].append(card)
-                card.position = top_card.center_x + CARD_HORIZONTAL_OFFSET, \
-                                            top_card.center_y
-            # If no cards in the user pile
-            else:
-                self.piles[USER_HAND_PILE].append(card)
-                # Move cards to proper position
-                card.position = USER_HAND_X - (CARD_HORIZONTAL_OFFSET * 9) / 2, BOTTOM_Y
-            # Sort cards in pile
-            self.sort_pile(USER_HAND_PILE)
-            
-        # loop to deal to each COMP hand pile
-        for pile_no in range(LCOMP_HAND_PILE, RCOMP_HAND_PILE + 1):
-            # Deal proper number of cards for that pile
-            for j in range(10):
-                # Pop the card off the deck we are dealing from
-                card = self.piles[DECK_FACE_DOWN_PILE].pop()
-                # Put in the proper pile
-                if len(self.piles[pile_no]) > 0:
-                    # Move cards to proper position
-                    top_card = self.piles[pile_no][-1]
-                    self.piles[pile_no].append(card)
-                    card.position = top_card.center_x + CARD_HORIZONTAL_OFFSET, \
-                                            top_card.center_y
-                # If no cards in the comp pile
+        # Put the cards in their piles, face-up for whichever players turn it is. The other hands face-down
+        self.sync_piles()
+
+    def sync_piles(self):
+        """ Put every card sprite in the pile the engine has its card in, and flip it over
+        if needed.  Only the piles that changed are laid out again, and the drawing order
+        of the cards is updated with one sort of the sprite list. """
+        shown_hand = self.shown_hand()
+        changed = False
+        for pile_index, pile in enumerate(self.engine.piles):
+            cards = [self.card_sprites[card_id] for card_id in pile]
+            # Hands are face-up for whichever players turn it is, unless it is a computer. The other hands face-down
+            if USER_HAND_PILE <= pile_index <= RCOMP_HAND_PILE:
+                self.flip_cards(cards, pile_index == shown_hand)
+            if cards == self.piles[pile_index]:
+                continue
+            changed = True
+            self.piles[pile_index] = cards
+            if not USER_HAND_PILE <= pile_index <= RCOMP_HAND_PILE:
+                self.flip_cards(cards, pile_index != DECK_FACE_DOWN_PILE)
+            self.sort_pile(pile_index)
+        if changed:
+            # Cards render in pile order, later cards on top
+            draw_order = {card: i for i, card in enumerate(card for pile in self.piles for card in pile)}
+            self.card_list.sort(key=draw_order.__getitem__)
+
+    def flip_cards(self, cards, face_up):
+        """ Turn the cards face-up or face-down, if they aren't already """
+        for card in cards:
+            if card.is_face_up != face_up:
+                if face_up:
+                    card.face_up()
                 else:
-                    self.piles[pile_no].append(card)
-                    # Move cards to proper position
-                    card.position = self.pile_mat_list[pile_no].center_x - (CARD_HORIZONTAL_OFFSET * 9) / 2, \
-                                            self.pile_mat_list[pile_no].center_y
-                # Sort cards in pile
-                self.sort_pile(pile_no)
-
-        # Flip over cards in hand for whose turn it is
-        for card in self.piles[self.player_list[n].hand]:
-            card.face_up()
-        # Flip over top card from main deck to face-up/ discard pile
-        card = self.piles[DECK_FACE_DOWN_PILE].pop()
-        card.face_up()
-        self.piles[DISCARD_PILE].append(card)
-        card.position = self.pile_mat_list[DISCARD_PILE].position
-        # if a skip card is flipped over, skip first player
-        if card.get_value() == "13":
-            self.end_turn(n)
-
-        # assign phase piles to players
-        user.determine_phase_piles(self.piles)
-        lcomp.determine_phase_piles(self.piles, user.last_pile)
-        mcomp.determine_phase_piles(self.piles, lcomp.last_pile)
-        rcomp.determine_phase_piles(self.piles, mcomp.last_pile)
+                    card.face_down()
 
-    def on_draw(self):
-        """ Render the screen. """
-        # Clear the screen
-        self.clear()
+    def update_from_engine(self):
+        """ Show the engine's state after a move, setting up the new round if one was dealt. """
+        if self.engine.round_number != self.round_number:
+            self.setup()
+        else:
+            self.sync_piles()
+
+    def create_hud(self):
+        """ Create the text objects drawn over the table.  They are laid out once here, and
+        again in update_hud only when what they show changes. """
+        # Text to draw/pickup card
+        self.draw_card_text = arcade.Text(
+            "* Draw or pickup a card *",
+            DECK_X - 3 * DECK_MAT_WIDTH,
+            DECK_Y,
+            arcade.csscolor.BLACK,
+            15
+        )
 
-        # Draw the mats the cards go on to
-        self.pile_mat_list.draw()
+        # Game over/ winner
+        self.winner_text = arcade.Text(
+            "",
+            DECK_X + 3 * DECK_MAT_WIDTH,
+            DECK_Y,
+            arcade.csscolor.BLACK,
+            38
+        )
 
-        # Draw the cards
-        self.card_list.draw()
+        self.game_over_text = arcade.Text(
+            "*GAME OVER!*",
+            DECK_X - 5 * DECK_MAT_WIDTH,
+            DECK_Y,
+            arcade.csscolor.BLACK,
+            38
+        )
 
-        # Draw text to draw/pickup card
-        n = self.get_turn()
-        draw_card_text = f"* Draw or pickup a card *"
-        if self.player_list[n].turn and self.player_list[n].draw_card and self.game_over == False:
-            arcade.draw_text(
-                draw_card_text,
-                DECK_X - 3 * DECK_MAT_WIDTH,
-                DECK_Y,
-                arcade.csscolor.BLACK,
-                15
-            )
-        
-        # Draw game over/ winner
-        if self.game_over == True:
-            if self.winner.name == "user":
-                player_text = "Player 1"
-            elif self.winner.name == "lcomp":
-                player_text = "Player 2"
-            elif self.winner.name == "mcomp":
-                player_text = "Player 3"
-            elif self.winner.name == "rcomp":
-                player_text = "Player 4"
-            arcade.draw_text(
-                f"*{player_text} Wins!!*",
-                DECK_X + 3 * DECK_MAT_WIDTH,
-                DECK_Y,
-                arcade.csscolor.BLACK,
-                38
-                )
-            
-            arcade.draw_text(
-                "*GAME OVER!*",
-                DECK_X - 5 * DECK_MAT_WIDTH,
-                DECK_Y,
-                arcade.csscolor.BLACK,
-                38
-            )
-        
-        # Draw where to play skip card
-        skip_text = "* Drop Skip card on another player's hand *"
-        for card in self.held_cards:
-            if card.get_value() == "13":
-                arcade.draw_text(
-                    skip_text,
-                    875,
-                    DECK_Y,
-                    arcade.csscolor.BLACK,
-                    28,
-                    width=400,
-                    multiline=True
-                )
-
-        # Draw instructions
-        instruction_text = """\
-        Press * SPACE * for 
-        complete instructions
-        """
-        arcade.draw_text(
-            instruction_text,
+        # Where to play skip card
+        self.skip_text = arcade.Text(
+            "* Drop Skip card on another player's hand *",
             875,
-            235,
+            DECK_Y,
             arcade.csscolor.BLACK,
-            12,
-            width=260,
+            28,
+            width=400,
             multiline=True
         )
 
-        # Draw phase list # -- leave spaces after each line so that the width doesn't cut off anything unwanted for multiline
+        # Instructions
+        instruction_text = """\
+        Press * SPACE * for 
+        complete instructions
+        """
+        # Phase list # -- leave spaces after each line so that the width doesn't cut off anything unwanted for multiline
         phase_list_text = """\
           The phases are:              
           1. 2 sets of 3              
@@ -476,101 +452,101 @@ class MyGame(arcade.Window):
           9. 1 set of 5 + 1 set of 2  
         10. 1 set of 5 + 1 set of 3 
         """
-        arcade.draw_text(
-            phase_list_text,
-            1040,
-            265,
-            arcade.csscolor.BLACK,
-            15,
-            width=290,
-            bold=True,
-            multiline=True
-        )
-
-        # Draw the scoreboard
-        user_name_text = f"Player 1:"
-        arcade.draw_text(
-            user_name_text,
-            10,
-            265,
-            arcade.csscolor.BLUE,
-            20,
-            bold=True
-        )
+        self.hud_text_list = [
+            arcade.Text(
+                instruction_text,
+                875,
+                235,
+                arcade.csscolor.BLACK,
+                12,
+                width=260,
+                multiline=True
+            ),
+            arcade.Text(
+                phase_list_text,
+                1040,
+                265,
+                arcade.csscolor.BLACK,
+                15,
+                width=290,
+                bold=True,
+                multiline=True
+            )
+        ]
+
+        # The scoreboard, a name and a phase/score line for each player
+        self.score_text_list = []
+        name_list = [("Player 1:", arcade.csscolor.BLUE), ("Player: 2", arcade.csscolor.GREEN),
+                     ("Player: 3", arcade.csscolor.RED), ("Player: 4", arcade.csscolor.YELLOW)]
+        for i, (name_text, color) in enumerate(name_list):
+            y = 265 - 75 * i
+            self.hud_text_list.append(arcade.Text(name_text, 10, y, color, 20, bold=True))
+            score_text = arcade.Text("", 10, y - 25, arcade.csscolor.BLACK, 15)
+            self.score_text_list.append(score_text)
+            self.hud_text_list.append(score_text)
+
+        # What the text was last laid out for
+        self.hud_state = None
+
+    def update_hud(self):
+        """ Change the scoreboard and winner text if a score, phase or the winner changed. """
+        hud_state = [(player.phase, player.score) for player in self.player_list]
+        if self.game_over:
+            hud_state.append(self.winner.name)
+        if hud_state == self.hud_state:
+            return
+        self.hud_state = hud_state
+        for player, score_text in zip(self.player_list, self.score_text_list):
+            score_text.text = f"Phase: {player.phase}    Score: {player.score}"
+        if self.game_over:
+            if self.winner.name == "user":
+                player_text = "Player 1"
+            elif self.winner.name == "lcomp":
+                player_text = "Player 2"
+            elif self.winner.name == "mcomp":
+                player_text = "Player 3"
+            elif self.winner.name == "rcomp":
+                player_text = "Player 4"
+            self.winner_text.text = f"*{player_text} Wins!!*"
 
-        user_phase_text = f"Phase: {self.player_list[0].phase}    Score: {self.player_list[0].score}"
-        arcade.draw_text(
-            user_phase_text,
-            10,
-            240,
-            arcade.csscolor.BLACK,
-            15,
-        )
+    def on_draw(self):
+        """ Render the screen. """
+        # Clear the screen
+        self.clear()
 
-        lcomp_name_text = f"Player: 2"
-        arcade.draw_text(
-            lcomp_name_text,
-            10,
-            190,
-            arcade.csscolor.GREEN,
-            20,
-            bold=True
-        )
+        # Draw the mats the cards go on to
+        self.pile_mat_list.draw()
 
-        lcomp_phase_text = f"Phase: {self.player_list[1].phase}    Score: {self.player_list[1].score}"
-        arcade.draw_text(
-            lcomp_phase_text,
-            10,
-            165,
-            arcade.csscolor.BLACK,
-            15
-        )
+        # Draw the cards
+        self.card_list.draw()
 
-        mcomp_name_text = f"Player: 3"
-        arcade.draw_text(
-            mcomp_name_text,
-            10,
-            115,
-            arcade.csscolor.RED,
-            20,
-            bold=True
-        )
-        
-        mcomp_phase_text = f"Phase: {self.player_list[2].phase}    Score: {self.player_list[2].score}"
-        arcade.draw_text(
-            mcomp_phase_text,
-            10,
-            90,
-            arcade.csscolor.BLACK,
-            15
-        )
+        self.update_hud()
 
-        rcomp_name_text = f"Player: 4"
-        arcade.draw_text(
-            rcomp_name_text,
-            10,
-            40,
-            arcade.csscolor.YELLOW,
-            20,
-            bold=True
-        )
+        # Draw text to draw/pickup card
+        n = self.engine.get_turn()
+        if self.player_list[n].turn and self.player_list[n].draw_card and self.game_over == False:
+            self.draw_card_text.draw()
 
-        rcomp_phase_text = f"Phase: {self.player_list[3].phase}    Score: {self.player_list[3].score}"
-        arcade.draw_text(
-            rcomp_phase_text,
-            10,
-            15,
-            arcade.csscolor.BLACK,
-            15
-        )
+        # Draw game over/ winner
+        if self.game_over == True:
+            self.winner_text.draw()
+            self.game_over_text.draw()
 
+        # Draw where to play skip card
+        for card in self.held_cards:
+            if card.value == SKIP:
+                self.skip_text.draw()
 
-    def pull_to_top(self, card: arcade.Sprite):
-        """ Pull card to top of rendering order (last to render, looks on-top) """
+        # Draw instructions, phase list and the scoreboard
+        for text in self.hud_text_list:
+            text.draw()
 
-        # Remove, and append to the end
-        self.card_list.remove(card)
-        self.card_list.append(card)
+        # Draw the handler timings
+        if self.show_timing:
+            if time.perf_counter() - self.timing_updated > TIMING_REFRESH:
+                self.timing_updated = time.perf_counter()
+                self.timing_text.text = "\n".join(self.timing.report())
+            self.timing_text.draw()
 
 
     def get_instructions(self):
@@ -588,10 +564,64 @@ class MyGame(arcade.Window):
         if symbol == arcade.key.SPACE:
             self.get_instructions()
 
+        # Show or hide the handler timings, if timing is turned on
+        elif symbol == arcade.key.T and self.timing is not None:
+            self.show_timing = not self.show_timing
+
+        # Save the game, or load the saved game
+        elif symbol == arcade.key.S:
+            self.save_game()
+        elif symbol == arcade.key.L:
+            self.load_game()
+
+    def save_game(self):
+        """ Write the game to SAVE_FILE """
+        save(self.engine, SAVE_FILE)
+
+    def load_game(self):
+        """ Carry on the game saved in SAVE_FILE, if there is one """
+        try:
+            engine = load(SAVE_FILE, self.player_list)
+        except (OSError, ValueError):
+            return
+        if self.engine.log is not None:
+            self.engine.log.close()
+        self.engine = engine
+        self.player_list = engine.player_list
+        if self.timing is not None:
+            self.timing.instrument(engine, TIMED_ENGINE_HANDLERS)
+        self.pending_search = None
+        self.comp_timer = 0
+        self.start_log()
+        self.setup()
+
+    def start_log(self):
+        """ Log the moves of the game to LOG_FILE, from where it is now """
+        self.engine.log = EventLog(open(LOG_FILE, "wb"), self.engine)
+
+    def on_close(self):
+        """ Write out the rest of the log and the handler timings, and stop the search workers, before the
+        window closes """
+        if self.engine.log is not None:
+            self.engine.log.close()
+            self.engine.log = None
+        if self.timing is not None:
+            self.timing.dump(TIMING_FILE)
+        if self.search_pool is not None:
+            self.search_pool.shutdown()
+            self.search_pool = None
+        super().on_close()
+
+
+
 
     def on_mouse_press(self, x, y, button, key_modifiers):
         """ Called when the user presses a mouse button. """
 
+        # The computer players play their own turns
+        if self.comp_turn():
+            return
+
         # Get list of cards we've clicked on
         cards = arcade.get_sprites_at_point((x, y), self.card_list)
 
@@ -602,79 +632,26 @@ class MyGame(arcade.Window):
             pile_index = self.get_pile_for_card(cards[-1])
 
             # Figure out index of player whose turn it is
-            n = self.get_turn()
+            n = self.engine.get_turn()
 
-            # draw card from the main deck
-            if pile_index == DECK_FACE_DOWN_PILE:
-                if self.player_list[n].draw_card:
-                    self.player_list[n].draw_card_from_deck(self.piles, self.pile_mat_list, DECK_FACE_DOWN_PILE, self.player_list[n].hand)
-                    self.sort_pile(self.player_list[n].hand)
-
-                else:
-                    pass
-
-            # take previously discarded card instead of drawing from deck
-            elif pile_index == DISCARD_PILE:
-                card = self.piles[DISCARD_PILE][-1]
-                if self.player_list[n].draw_card and card.get_value() != "13":
-                    self.player_list[n].draw_card_from_deck(self.piles, self.pile_mat_list, DISCARD_PILE, self.player_list[n].hand)
-                    self.sort_pile(self.player_list[n].hand)
-
-                else:
-                    pass
+            # draw card from the main deck, or take previously discarded card instead
+            if pile_index == DECK_FACE_DOWN_PILE or pile_index == DISCARD_PILE:
+                if self.engine.draw(pile_index):
+                    self.sync_piles()
 
             ### remove ability to click on other hands if not their turn
             elif USER_HAND_PILE <= pile_index <= RCOMP_HAND_PILE and pile_index != self.player_list[n].hand:
                 pass
 
-            
             # When clicking on a phase pile
             elif PHASE_PILE_1 <= pile_index <= LAST_PHASE_PILE:
-                if self.player_list[n].phase in PHASE_1_MATS:
-                    # if current players phase pile
-                    if pile_index == self.player_list[n].last_pile:
-                        # If current player has not completed their phase
-                        if self.player_list[n].complete == False:
-                            # grab the face-up card we are clicking on
-                            self.held_cards = [cards[-1]]
-                            # Save the position
-                            self.held_cards_original_position = [self.held_cards[0].position]
-                        # if phase already complete, cards get locked in
-                        else:
-                            pass
-                    else:
-                        pass
-
-                elif self.player_list[n].phase in PHASE_2_MATS:
-                    # If current player is User
-                    if n == 0:
-                        # if user turn and not clicking on user phase piles
-                        if pile_index == (self.player_list[n].last_pile - 1) or pile_index == self.player_list[n].last_pile:
-                            if self.player_list[n].complete == False:
-                                # grab the face-up card we are clicking on
-                                self.held_cards = [cards[-1]]
-                                # Save the position
-                                self.held_cards_original_position = [self.held_cards[0].position]
-                            # if phase already complete, cards get locked in
-                            else:
-                                pass
-                        else:
-                            pass
-                    
-                    # If current player is not User
-                    else:
-                        if pile_index == self.player_list[n - 1].last_pile + 1 or pile_index == self.player_list[n - 1].last_pile + 2:
-                            if self.player_list[n].complete == False:
-                                # grab the face-up card we are clicking on
-                                self.held_cards = [cards[-1]]
-                                # Save the position
-                                self.held_cards_original_position = [self.held_cards[0].position]
-                            # if phase complete, cards are locked in
-                            else:
-                                pass
-                        else:
-                            pass
-            
+                # Only the current players own phase piles, until the phase is complete and the cards get locked in
+                if pile_index in self.player_list[n].phase_pile_indexes() and self.player_list[n].complete == False:
+                    # grab the face-up card we are clicking on
+                    self.held_cards = [cards[-1]]
+                    # Save the position
+                    self.held_cards_original_position = [self.held_cards[0].position]
+
             else:
                 # All other cases, grab the face-up card we are clicking on
                 self.held_cards = [cards[-1]]   ### maybe add, if self.held_cards is 'skip' highlight hand piles
@@ -692,122 +669,76 @@ class MyGame(arcade.Window):
                 # Is it our turned over flip mat? and no cards on it?
                 if mat_index == DECK_FACE_DOWN_PILE and len(self.piles[DECK_FACE_DOWN_PILE]) == 0:
                     # Flip the deck back over so we can restart
-                    temp_list = self.piles[DISCARD_PILE].copy()
-                    for card in reversed(temp_list):
-                        card.face_down()
-                        self.piles[DISCARD_PILE].remove(card)
-                        self.piles[DECK_FACE_DOWN_PILE].append(card)
-                        card.position = self.pile_mat_list[DECK_FACE_DOWN_PILE].position
-                    # flip over top card
-                    card = self.piles[DECK_FACE_DOWN_PILE].pop()
-                    card.face_up()
-                    self.piles[DISCARD_PILE].append(card)
-                    card.position = self.pile_mat_list[DISCARD_PILE].position                    
+                    if self.engine.reshuffle():
+                        self.sync_piles()
+
 
-    
     def sort_pile(self, pile):
-        """sorts cards in pile by value from low to high"""
-        # Make a copy of pile to be sorted and clear the original
-        temp_pile = self.piles[pile].copy()
-        self.piles[pile].clear()
-        # Sort cards in the temporary pile
-        temp_pile.sort(reverse=True)
-        # Get the index of the pile
+        """puts the cards of a pile in place, in the order the engine keeps them (hands and phase piles by value from low to high)"""
+        if len(self.piles[pile]) == 0:
+            return
+        # Get the mat of the pile
         pile_mat_index = self.pile_mat_list[pile]
-        # Loop for every card in pile
-        for x in range(len(temp_pile)):
-            # Pop card off of temp pile
-            card = temp_pile.pop()
-            # Put card back into original pile
-            if len(self.piles[pile]) > 0:
-                # Move cards to proper position
-                top_card = self.piles[pile][-1]
-                self.piles[pile].append(card)
-                card.position = top_card.center_x + CARD_HORIZONTAL_OFFSET, \
-                                            top_card.center_y
+        # Deck and discard pile cards are stacked on the mat
+        if pile <= DISCARD_PILE:
+            for card in self.piles[pile]:
+                card.full_size()
+                card.position = pile_mat_index.position
+            return
+        compress = False
+        # proper position if mat is either a players HAND or is a single phase mat (one bigger phase mat)
+        if pile_mat_index.width == PHASE_1_MAT_WIDTH or pile_mat_index.width == HAND_MAT_WIDTH:
+            start_x = pile_mat_index.center_x - (CARD_HORIZONTAL_OFFSET * 9) / 2
+            offset = CARD_HORIZONTAL_OFFSET
+        # Make cards smaller to fit with small phase piles.
+        elif len(self.piles[pile]) > 5:
+            compress = True
+            start_x = pile_mat_index.center_x - (CARD_HORIZONTAL_OFFSET * 5) / 2
+            offset = CARD_HORIZONTAL_OFFSET * CARD_SCALE
+        # proper position if mat is a double phase mat (smaller mat)
+        else:
+            start_x = pile_mat_index.center_x - (CARD_HORIZONTAL_OFFSET * 4) / 2
+            offset = CARD_HORIZONTAL_OFFSET
+        for i, card in enumerate(self.piles[pile]):
+            if compress:
+                card.width = CARD_WIDTH * CARD_SCALE
             else:
-                # Add the first card to original pile and put in proper position
-                self.piles[pile].append(card)
-                # proper position if mat is either a players HAND or is a single phase mat (one bigger phase mat)
-                if pile_mat_index.width == PHASE_1_MAT_WIDTH or pile_mat_index.width == HAND_MAT_WIDTH:
-                    card.position = pile_mat_index.center_x - (CARD_HORIZONTAL_OFFSET * 9) / 2, \
-                                            pile_mat_index.center_y
-                # proper position if mat is a double phase mat (smaller mat)
-                else:
-                    card.position = pile_mat_index.center_x - (CARD_HORIZONTAL_OFFSET * 4) / 2, \
-                                            pile_mat_index.center_y
-            # Put on top in order added
-            self.pull_to_top(card)
-    
-
-    def remove_card_from_pile(self, card):
-        """ Remove card from whatever pile it was in. """
-        for pile in self.piles:
-            if card in pile and pile == self.piles[DISCARD_PILE]:
-                pile.remove(card)
-                break
-            elif card in pile:
-                pile.remove(card)
-                self.sort_pile(self.piles.index(pile))
+                card.full_size()
+            card.position = start_x + i * offset, pile_mat_index.center_y
 
 
     def get_pile_for_card(self, card):
         """ What pile is this card in? """
-        for index, pile in enumerate(self.piles):
-            if card in pile:
-                return index
+        return self.engine.get_pile_for_card(card.card_id)
 
 
-    def move_card_to_new_pile(self, card, pile_index):
-        """ Move the card to a new pile """
-        self.remove_card_from_pile(card)
-        self.piles[pile_index].append(card)
-        if pile_index != DISCARD_PILE:
-            self.sort_pile(pile_index)
-    
-    def get_turn(self):
-        """returns index of the player whose turn it is"""
-        for index, player in enumerate(self.player_list):
-            if player.turn == True:
-                return index
-
-    def get_player_for_phase_pile(self, pile_list, pile_index):
-        """Returns the index of the player whose phase piles are being played on.
-        Finds the 'owner' of the given phase pile."""
-        self.pile_list = pile_list
-        self.pile_index = pile_index
-        for index, player in enumerate(self.player_list):
-            if player.phase_pile == self.pile_list[pile_index]:
-                return index
-            elif player.phase_pile_b == self.pile_list[pile_index]:
-                return index
-
-    def end_turn(self, index):
-        """Ends players turn, finds next player and flips over appropriate cards """
-        self.index = index
-        self.player_list[self.index].turn = False
-        for card in self.piles[self.player_list[self.index].hand]:
-            card.face_down()
-        if self.index < 3:
-            new_index = self.index + 1
-        else:
-            new_index = self.index - 3
-        while True:
-            if self.player_list[new_index].skipped == False:
-                self.player_list[new_index].turn = True
-                self.player_list[new_index].draw_card = True
-                for card in self.piles[self.player_list[new_index].hand]:
-                    card.face_up()
-                break
+    def play_card(self, card, pile_index):
+        """ Make the engine move for dropping the card on a pile.  returns True if the move was made """
+        card_id = card.card_id
+        # Get the Player whose turn it is
+        player = self.player_list[self.engine.get_turn()]
 
-            elif self.player_list[new_index].skipped == True:
-                self.player_list[new_index].skipped = False
-                if new_index < 3:
-                    new_index += 1
-                else:
-                    new_index -= 3
-                continue
-        self.round_over()
+        # Release on discard pile
+        if pile_index == DISCARD_PILE:
+            return self.engine.discard(card_id)
+
+        # Release on a hand
+        elif USER_HAND_PILE <= pile_index <= RCOMP_HAND_PILE:
+            # If the player is returning cards to their hand from their phase piles
+            if pile_index == player.hand:
+                return self.engine.take_back(card_id)
+            # Skip cards are dropped on another players hand
+            return self.engine.skip(card_id, self.engine.get_player_for_hand(pile_index))
+
+        # Release on phase pile
+        elif PHASE_PILE_1 <= pile_index <= LAST_PHASE_PILE:
+            # Add any card to own phase piles until the phase is complete
+            if pile_index in player.phase_pile_indexes() and player.complete == False:
+                return self.engine.lay(card_id, pile_index)
+            # "hit" on a phase pile that has already been completed
+            return self.engine.hit(card_id, pile_index)
+
+        return False
 
 
     def on_mouse_release(self, x: float, y: float, button: int,
@@ -821,7 +752,6 @@ class MyGame(arcade.Window):
         # Find the closest pile, in case we are in contact with more than one
         pile, distance = arcade.get_closest_sprite(self.held_cards[0], self.pile_mat_list)
         reset_position = True
-        draw_pile = False
 
         # See if we are in contact with the closest pile
         if arcade.check_for_collision(self.held_cards[0], pile):
@@ -829,331 +759,15 @@ class MyGame(arcade.Window):
             # What pile is it?
             pile_index = self.pile_mat_list.index(pile)
 
-            # Get index of the Player whose turn it is
-            n = self.get_turn()
-
-            # Get index of the Player for a given phase phase pile (which player's phase pile it is)
-            p = self.get_player_for_phase_pile(self.piles, pile_index)
-
             #  Is it the same pile we came from?
             if pile_index == self.get_pile_for_card(self.held_cards[0]):
                 # If so, who cares. We'll just reset our position.
                 pass
 
-            # If User hand 
-            elif pile_index == USER_HAND_PILE:
-                # If another player, other than user is dropping card
-                if self.player_list[0].turn == False:
-                    # Check if current player has drawn a card yet
-                    if self.player_list[n].draw_card == False:
-                        for dropped_card in self.held_cards:
-                            # If card is a skip, skip user
-                            if dropped_card.get_value() == "13":
-                                self.player_list[0].skipped = True
-                                if len(self.piles[DISCARD_PILE]) > 0:
-                                    top_card = self.piles[DISCARD_PILE][-1]
-                                    dropped_card.position = top_card.position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                                else:
-                                    dropped_card.position = self.pile_mat_list[DISCARD_PILE].position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                            else:
-                                draw_pile = True
-                    else:
-                        draw_pile = True
-                # If the user is returning cards to their hand from their phase piles
-                else:
-                    if self.get_pile_for_card(self.held_cards[0]) == (self.player_list[0].last_pile -1) or self.get_pile_for_card(self.held_cards[0]) == self.player_list[0].last_pile:
-                        for card in self.held_cards:
-                            self.move_card_to_new_pile(card, pile_index)
-                            self.sort_phase_pile()
-                    
-                    else:
-                        draw_pile = True
-                # reset card position if move was invalid
-                reset_position = draw_pile
-
-            # If Left comp hand
-            elif pile_index == LCOMP_HAND_PILE:
-                # If another player, other than Left comp, is dropping card.
-                if self.player_list[1].turn == False:
-                    # Check if current player has drawn a card yet
-                    if self.player_list[n].draw_card == False:
-                        for dropped_card in self.held_cards:
-                            # If card is a skip, skip left comp
-                            if dropped_card.get_value() == "13":
-                                self.player_list[1].skipped = True
-                                if len(self.piles[DISCARD_PILE]) > 0:
-                                    top_card = self.piles[DISCARD_PILE][-1]
-                                    dropped_card.position = top_card.position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                                else:
-                                    dropped_card.position = self.pile_mat_list[DISCARD_PILE].position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                            else:
-                                draw_pile = True
-                    else:
-                        draw_pile = True
-                # If Left comp player is returning cards to their hand from their phase piles
-                else:
-                    if self.get_pile_for_card(self.held_cards[0]) == (self.player_list[0].last_pile + 1) or self.get_pile_for_card(self.held_cards[0]) == (self.player_list[0].last_pile + 2):
-                        for card in self.held_cards:
-                            self.move_card_to_new_pile(card, pile_index)
-                            self.sort_phase_pile()
-
-                    else:
-                        draw_pile = True
-
-                # reset card position if move was invalid
-                reset_position = draw_pile
-
-            # If Mid comp hand
-            elif pile_index == MCOMP_HAND_PILE:
-                # If another player, other than Mid comp, is dropping card.
-                if self.player_list[2].turn == False:
-                    # Check if current player has drawn a card yet
-                    if self.player_list[n].draw_card == False:
-                        for dropped_card in self.held_cards:
-                            # If card is a skip, skip mid comp
-                            if dropped_card.get_value() == "13":
-                                self.player_list[2].skipped = True
-                                if len(self.piles[DISCARD_PILE]) > 0:
-                                    top_card = self.piles[DISCARD_PILE][-1]
-                                    dropped_card.position = top_card.position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                                else:
-                                    dropped_card.position = self.pile_mat_list[DISCARD_PILE].position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                            else:
-                                draw_pile = True
-                    else:
-                        draw_pile = True
-                # If Mid comp player is returning cards to their hand from their phase piles
-                else:
-                    if self.get_pile_for_card(self.held_cards[0]) == (self.player_list[1].last_pile + 1) or self.get_pile_for_card(self.held_cards[0]) == (self.player_list[1].last_pile + 2):
-                        for card in self.held_cards:
-                            self.move_card_to_new_pile(card, pile_index)
-                            self.sort_phase_pile()
-
-                    else:
-                        draw_pile = True
-
-                # reset card position if move was invalid
-                reset_position = draw_pile
-                    
-            # If Right comp hand
-            elif pile_index == RCOMP_HAND_PILE:
-                # If another player, other than Right comp, is dropping card.
-                if self.player_list[3].turn == False:
-                    # Check if current player has drawn a card yet
-                    if self.player_list[n].draw_card == False:
-                        for dropped_card in self.held_cards:
-                            # If card is a skip, skip right comp
-                            if dropped_card.get_value() == "13":
-                                self.player_list[3].skipped = True
-                                if len(self.piles[DISCARD_PILE]) > 0:
-                                    top_card = self.piles[DISCARD_PILE][-1]
-                                    dropped_card.position = top_card.position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                                else:
-                                    dropped_card.position = self.pile_mat_list[DISCARD_PILE].position
-                                    self.move_card_to_new_pile(dropped_card, DISCARD_PILE)
-                                    self.discard()
-                                    self.sort_phase_pile()
-                                    self.end_turn(n)
-                            else:
-                                draw_pile = True
-                    else:
-                        draw_pile = True
-                # If Right comp player is returning cards to their hand from their phase piles
-                else:
-                    if self.get_pile_for_card(self.held_cards[0]) == (self.player_list[2].last_pile + 1) or self.get_pile_for_card(self.held_cards[0]) == (self.player_list[2].last_pile + 2):
-                        for card in self.held_cards:
-                            self.move_card_to_new_pile(card, pile_index)
-                            self.sort_phase_pile()
-
-                    else:
-                        draw_pile = True
-
-                # reset card position if move was invalid
-                reset_position = draw_pile
-
-
-
-            # Release on phase pile
-            elif PHASE_PILE_1 <= pile_index <= LAST_PHASE_PILE:
-                # check if current player has 1 or 2 phase piles
-                if self.player_list[n].phase in PHASE_1_MATS:
-                    # if players own phase pile
-                    if pile_index == self.player_list[n].last_pile:
-                        # check if you are "hitting" or adding to your own phase pile after you have already completed phase on a previous turn
-                        if self.player_list[n].complete:
-                            self.hit_on_phase(pile, pile_index)
-
-                        #if not complete add any card
-                        else:
-                            self.play_on_phase(pile, pile_index)
-                            self.round_over()
-                            
-                    # if not players own phase pile
-                    else:
-                        # if other player phase pile has cards -- (meaning other player phase is complete)
-                        if len(self.piles[pile_index]) > 0:
-                            # is current player phase complete in order it "hit" on other players phase piles
-                            # Run check to see if phase is complete on current players turn
-                            if self.player_list[n].phase_complete():
-                                self.player_list[n].complete = True
-                                self.sort_phase_pile()
-                            
-                            if self.player_list[n].complete:
-                                self.hit_on_phase(pile, pile_index)
-                                if self.player_list[p].phase in PHASE_2_MATS:
-                                    if len(self.piles[pile_index]) > 5:
-                                        self.compress_cards(pile, pile_index)
-                                # no need to sort if one big phase pile
-                                else:
-                                    pass
-
-                            # if not complete, return card
-                            else:
-                                draw_pile = True
-                        # if other player phase pile is empty, can't place there.
-                        else:
-                            draw_pile = True
-
-                # if 2 phase piles
-                else:
-                    # if current player is user
-                    if n == 0:
-                        # if dropping on own phase piles
-                        if pile_index == (self.player_list[n].last_pile - 1) or pile_index == self.player_list[n].last_pile:
-                            # check if you are "hitting"
-                            if self.player_list[n].complete:
-                                self.hit_on_phase(pile, pile_index)
-                                if len(self.piles[pile_index]) > 5:
-                                    self.compress_cards(pile, pile_index)
-
-                            # if not complete add any card
-                            else:
-                                self.play_on_phase(pile, pile_index)
-                                if len(self.piles[pile_index]) > 5:
-                                    self.compress_cards(pile, pile_index)
-                                self.round_over()
-
-                        # if not dropping on own piles
-                        else:
-                             # if other player phase pile has cards
-                            if len(self.piles[pile_index]) > 0:
-                                # current player needs phase complete in order to "hit" on other players phase piles
-                                # Check if current player phase is complete
-                                if self.player_list[n].phase_complete():
-                                    self.player_list[n].complete = True
-                                    self.sort_phase_pile()
-
-                                # If phase is complete, "hit" on other players phase pile
-                                if self.player_list[n].complete:
-                                    self.hit_on_phase(pile, pile_index)
-                                    if self.player_list[p].phase in PHASE_2_MATS:
-                                        if len(self.piles[pile_index]) > 5:
-                                            self.compress_cards(pile, pile_index)
-                                    else:
-                                        pass
-
-                                # if not complete, return card 
-                                else:
-                                    draw_pile = True
-
-                            # if other player phase pile is empty - their phase pile can't be played on
-                            else:
-                                draw_pile = True
-
-                    # if current player not user
-                    else:
-                        # if dropping on own phase piles
-                        if pile_index == self.player_list[n - 1].last_pile + 1 or pile_index == self.player_list[n - 1].last_pile + 2:
-                            # check if you are "hitting"
-                            if self.player_list[n].complete:
-                                self.hit_on_phase(pile, pile_index)
-                                if len(self.piles[pile_index]) > 5:
-                                    self.compress_cards(pile, pile_index)
-
-                            # if not complete add any card
-                            else:
-                                self.play_on_phase(pile, pile_index)
-                                if len(self.piles[pile_index]) > 5:
-                                    self.compress_cards(pile, pile_index)
-                                self.round_over()
-
-                        # if not dropping on own piles
-                        else:
-                            # if other player phase pile has cards
-                            if len(self.piles[pile_index]) > 0:
-                                # is current player phase complete in order it "hit" on other players phase piles
-                                if self.player_list[n].phase_complete():
-                                    self.player_list[n].complete = True
-                                    self.sort_phase_pile()
-                                    
-
-                                if self.player_list[n].complete:
-                                    self.hit_on_phase(pile, pile_index)
-                                    if self.player_list[p].phase in PHASE_2_MATS:
-                                        if len(self.piles[pile_index]) > 5:
-                                            self.compress_cards(pile, pile_index)
-
-                                # if not complete, return card 
-                                else:
-                                    draw_pile = True
-
-                            # if other player phase pile is empty - their phase pile can't be played on
-                            else:
-                                draw_pile = True
-
-                # reset card position if move was invalid
-                reset_position = draw_pile
-
-
-            # Release on discard pile
-            elif pile_index == DISCARD_PILE:
-                if self.player_list[n].draw_card == False:
-                    if len(self.piles[pile_index]) > 0:
-                        top_card = self.piles[pile_index][-1]
-                        for dropped_card in self.held_cards:
-                            dropped_card.position = top_card.position
-                    else:
-                        for dropped_card in self.held_cards:
-                            dropped_card.position = pile.position
-                    for card in self.held_cards:
-                        self.move_card_to_new_pile(card, pile_index)
-
-                    self.discard()
-                    self.sort_phase_pile()
-                    self.end_turn(n)
-
-                else:
-                    draw_pile = True
-                # reset card position if move was invalid
-                reset_position = draw_pile
+            # reset card position if move was invalid
+            elif self.play_card(self.held_cards[0], pile_index):
+                reset_position = False
+                self.update_from_engine()
 
         if reset_position:
             # Where-ever we were dropped, it wasn't valid. Reset the each card's position
@@ -1164,151 +778,33 @@ class MyGame(arcade.Window):
         # We are no longer holding cards
         self.held_cards = []
     
+    def on_update(self, delta_time: float):
+        """ Let the computer players take their turns, one every COMP_TURN_DELAY seconds.  A SearchPlayer
+        moves when its search is done """
+        if self.game_over or not self.comp_turn():
+            self.comp_timer = 0
+            return
+        player = self.player_list[self.engine.get_turn()]
+        if isinstance(player, SearchPlayer):
+            # the search runs on the pool's workers while the window keeps drawing.  Without a pool
+            # it would run here and hold up the window for the whole budget
+            if player.pool is None:
+                if self.search_pool is None:
+                    self.search_pool = SearchPool()
+                player.pool = self.search_pool
+            if self.pending_search is None:
+                self.pending_search = player.start_move(self.engine)
+            elif self.pending_search.done():
+                play_move(self.engine, self.pending_search.result())
+                self.pending_search = None
+                self.update_from_engine()
+            return
+        self.comp_timer += delta_time
+        if self.comp_timer >= COMP_TURN_DELAY:
+            self.comp_timer = 0
+            self.player_list[self.engine.get_turn()].play_turn(self.engine)
+            self.update_from_engine()
 
-    def compress_cards(self, pile_sprite, pile_index):
-        """Make cards smaller to fit with small phase piles."""
-        self.pile_sprite = pile_sprite
-        self.pile_index = pile_index
-        i = 0
-        first_card = self.piles[self.pile_index][0]
-        next_card = self.piles[self.pile_index][i]
-        
-        for card in self.piles[self.pile_index]:
-            card.width = CARD_WIDTH * CARD_SCALE
-            if card == first_card:
-                card.position = self.pile_sprite.center_x - (CARD_HORIZONTAL_OFFSET * 5) / 2, \
-                                self.pile_sprite.center_y
-                i += 1
-            else:
-                card.position = first_card.center_x + i * (CARD_HORIZONTAL_OFFSET * CARD_SCALE),\
-                                    next_card.center_y
-                i += 1
-
-
-    def play_on_phase(self, pile_sprite, pile_index):
-        """Add cards to phase pile"""
-        self.pile_sprite = pile_sprite
-        self.pile_index = pile_index
-        if len(self.piles[self.pile_index]) > 0:
-            # Move cards to proper position
-            top_card = self.piles[self.pile_index][-1]
-            for dropped_card in self.held_cards:
-                dropped_card.position = top_card.center_x + CARD_HORIZONTAL_OFFSET, \
-                                            top_card.center_y
-
-        else:
-            # Are there no cards in the phase pile?
-            for dropped_card in self.held_cards:
-                # Move cards to proper position
-                # If 1 phase pile
-                if self.pile_sprite.width == PHASE_1_MAT_WIDTH:
-                    dropped_card.position = self.pile_sprite.center_x - (CARD_HORIZONTAL_OFFSET * 9) / 2, \
-                                        self.pile_sprite.center_y
-                # If 2 phase piles
-                else:
-                    dropped_card.position = self.pile_sprite.center_x - (CARD_HORIZONTAL_OFFSET * 4) / 2, \
-                                            self.pile_sprite.center_y
-
-        # Move card to card list
-        for card in self.held_cards:
-            self.move_card_to_new_pile(card, self.pile_index)
-
-    def hit_on_phase(self, pile_sprite, pile_index):
-        """"play cards on a phase pile that has already been completed previously"""
-        self.pile_sprite = pile_sprite
-        self.pile_index = pile_index
-        n = self.get_turn()
-        p = self.get_player_for_phase_pile(self.piles, self.pile_index)
-        if self.player_list[n].draw_card == False:
-            for card in self.held_cards:
-                self.piles[self.pile_index].append(card)
-                self.sort_pile(self.pile_index)
-                if self.player_list[p].phase_complete():
-                    self.move_card_to_new_pile(card, self.pile_index)
-                    self.round_over()
-
-                else:
-                    self.piles[self.pile_index].remove(card)
-                    for pile_index, card in enumerate(self.held_cards):
-                        card.position = self.held_cards_original_position[pile_index]
-        else:
-            for pile_index, card in enumerate(self.held_cards):
-                card.position = self.held_cards_original_position[pile_index]
-            
-
-
-    def sort_phase_pile(self):
-        """finds the correct indexes of the players' phase piles and sorts them"""
-        n = self.get_turn()
-        if self.player_list[n].phase in PHASE_1_MATS:
-                self.sort_pile(self.player_list[n].last_pile)
-        elif self.player_list[n].phase in PHASE_2_MATS:
-            if n == 0:
-                self.sort_pile(self.player_list[n].last_pile - 1)
-                self.sort_pile(self.player_list[n].last_pile)
-                if len(self.player_list[n].phase_pile) > 5:
-                    self.compress_cards(self.pile_mat_list[(self.player_list[n].last_pile -1)], (self.player_list[n].last_pile -1))
-                if len(self.player_list[n].phase_pile_b) > 5:
-                    self.compress_cards(self.pile_mat_list[(self.player_list[n].last_pile)], (self.player_list[n].last_pile))
-            else:
-                self.sort_pile(self.player_list[n - 1].last_pile + 1)
-                self.sort_pile(self.player_list[n - 1].last_pile + 2)
-                if len(self.player_list[n].phase_pile) > 5:
-                    self.compress_cards(self.pile_mat_list[(self.player_list[n - 1].last_pile + 1)], (self.player_list[n - 1].last_pile + 1))
-                if len(self.player_list[n].phase_pile_b) > 5:
-                    self.compress_cards(self.pile_mat_list[(self.player_list[n - 1].last_pile + 2)], (self.player_list[n - 1].last_pile + 2))
-
-
-    def discard(self):
-        """checks to see if there are invalid cards in phase pile when discarding, and return cards if invalid"""
-        n = self.get_turn()
-        if self.player_list[n].draw_card == False:
-            if self.player_list[n].phase in PHASE_1_MATS:
-                if len(self.player_list[n].phase_pile) > 0:
-                    if self.player_list[n].phase_complete():
-                        self.player_list[n].complete = True
-
-                    else:
-                        if self.player_list[n].complete == False:
-                            if n == 0:
-                                for card in self.piles[self.player_list[n].last_pile][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                            else:
-                                for card in self.piles[self.player_list[n - 1].last_pile + 1][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                        else:
-                            for pile_index, card in enumerate(self.held_cards):
-                                card.position = self.held_cards_original_position[pile_index]
-                else:
-                    pass
-
-            elif self.player_list[n].phase in PHASE_2_MATS:
-                if len(self.player_list[n].phase_pile) > 0 or len(self.player_list[n].phase_pile_b) > 0:
-                    if self.player_list[n].phase_complete():
-                        self.player_list[n].complete = True 
-
-                    else:
-                        if self.player_list[n].complete == False:
-                            if n == 0:
-                                for card in self.piles[self.player_list[n].last_pile - 1][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                                for card in self.piles[self.player_list[n].last_pile][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                            else:
-                                for card in self.piles[self.player_list[n - 1].last_pile + 1][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                                for card in self.piles[self.player_list[n - 1].last_pile + 2][:]:
-                                    self.move_card_to_new_pile(card, self.player_list[n].hand)
-                        else:
-                            for pile_index, card in enumerate(self.held_cards):
-                                card.position = self.held_cards_original_position[pile_index]
-                                
-                else:
-                    pass
-        else:
-            for pile_index, card in enumerate(self.held_cards):
-                card.position = self.held_cards_original_position[pile_index]
-    
     def on_mouse_motion(self, x: float, y: float, dx: float, dy: float):
         """ User moves mouse """
 
@@ -1316,53 +812,6 @@ class MyGame(arcade.Window):
         for card in self.held_cards:
             card.center_x += dx
             card.center_y += dy
-    
-    def round_over(self):
-        """check to see if the round is over or if someone has won."""
-        n = self.get_turn()
-        for pile_no in range(USER_HAND_PILE, RCOMP_HAND_PILE + 1):
-            if len(self.piles[pile_no]) == 0:
-                self.discard()
-                if len(self.piles[pile_no]) == 0:
-                    for player in self.player_list:
-                        player.add_score(self.piles)
-                        if player.complete:
-                            player.phase += 1
-                    for player in self.player_list:
-                        if player.phase <= 10:
-                            player.complete = False
-                        else:
-                            self.keep_playing = False
-                            self.game_over = True
-                            win_list = []
-                            if player.phase == 11:
-                                win_list.append(player)
-                            score_dict = {player: player.score for player in win_list}
-                            score_list = (sorted(score_dict.items(), key= lambda item: item[1]))
-                            self.winner = score_list[0][0]
-                    if self.keep_playing == True:
-                        self.player_list[n].turn = False
-                        if n < 3:
-                            new_n = n + 1
-                        else:
-                            new_n= n - 3
-                        while True:
-                            if self.player_list[new_n].skipped == False:
-                                self.player_list[new_n].turn = True
-                                self.player_list[new_n].draw_card = True
-                                break
-
-                            elif self.player_list[new_n].skipped == True:
-                                self.player_list[new_n].skipped = False
-                                if new_n < 3:
-                                    new_n += 1
-                                else:
-                                    new_n -= 3
-                                continue
-                        self.setup() # -- add flag for a key press to move to next round
-                        self.on_draw()
-            else:
-                pass
 
 
 def main():
@@ -1372,5 +821,54 @@ def main():
     arcade.run()
 
 
+def simulate(argv=None):
+    """ Play games between computer players without a window """
+    import phase_10_sim
+    phase_10_sim.main(argv)
+
+
+def bench(argv=None):
+    """ Time the hot paths of the game against the stored baseline """
+    import phase_10_bench
+    return phase_10_bench.main(argv)
+
+
+def tournament(argv=None):
+    """ Rate computer players against each other without a window """
+    import phase_10_tournament
+    phase_10_tournament.main(argv)
+
+
+def serve(argv=None):
+    """ Host games over TCP """
+    import phase_10_server
+    phase_10_server.main(argv)
+
+
+def client(argv=None):
+    """ Play a seat of a game on the server """
+    import phase_10_client
+    return phase_10_client.main(argv)
+
+
+def load_test(argv=None):
+    """ Measure the server with tables of computer players """
+    import phase_10_load
+    phase_10_load.main(argv)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        simulate(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        sys.exit(bench(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "tournament":
+        tournament(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "client":
+        sys.exit(client(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "load":
+        load_test(sys.argv[2:])
+    else:
+        main()
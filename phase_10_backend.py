@@ -0,0 +1,33 @@
+"""
+Phase 10 presentation backend
+
+Picks the module the window draws with.  The window only uses it through the
+name `arcade`, so it runs the same on either backend:
+
+    arcade  the real arcade library, drawing with OpenGL (the default)
+    null    phase_10_null.py, which keeps sprites in plain Python and draws nothing
+
+The backend is chosen with the PHASE10_BACKEND environment variable, before
+phase_10.py is imported:
+
+    $ PHASE10_BACKEND=null python phase_10.py bench --only ui
+"""
+import importlib
+import os
+
+# Environment variable that picks the backend
+BACKEND_ENV = "PHASE10_BACKEND"
+
+# Module of each backend, by name
+BACKENDS = {
+    "arcade": "arcade",
+    "null": "phase_10_null",
+}
+
+# Name of the backend in use
+BACKEND = os.environ.get(BACKEND_ENV) or "arcade"
+if BACKEND not in BACKENDS:
+    raise ValueError(f"unknown {BACKEND_ENV} {BACKEND!r}, use one of: {', '.join(BACKENDS)}")
+
+# The backend module, used by the window as arcade
+arcade = importlib.import_module(BACKENDS[BACKEND])
@@ -0,0 +1,94 @@
+"""
+Phase 10 batch evaluation
+
+Checks many hands against all ten phases at once with NumPy, for balance
+analysis over millions of dealt hands.  Hands are given as an (N x 14 x 5)
+array of counts, indexed [hand, value, suit], or as an (N x k) array of card
+ids that is turned into counts first.
+"""
+import numpy as np
+
+from phase_10_cards import CARD_VALUE, CARD_SUIT, VALUE_COUNT, SUIT_COUNT, WILD, BLACK
+from phase_10_rules import SET, RUN, COLOR, PHASE_GROUPS
+
+# Value and suit of each card id, as arrays
+VALUES = np.frombuffer(CARD_VALUE, dtype=np.uint8).astype(np.intp)
+SUITS = np.frombuffer(CARD_SUIT, dtype=np.uint8).astype(np.intp)
+
+# How many hands to evaluate at a time
+CHUNK_SIZE = 65536
+
+
+def hands_to_counts(hands):
+    """turns an (N x k) array of card ids into an (N x 14 x 5) array of counts"""
+    hands = np.asarray(hands, dtype=np.intp)
+    n = hands.shape[0]
+    index = np.arange(n)[:, None] * (VALUE_COUNT * SUIT_COUNT) + VALUES[hands] * SUIT_COUNT + SUITS[hands]
+    counts = np.bincount(index.ravel(), minlength=n * VALUE_COUNT * SUIT_COUNT)
+    return counts.reshape(n, VALUE_COUNT, SUIT_COUNT)
+
+
+def two_set_deficit(value_counts, amount_a, amount_b):
+    """returns the cards short of two sets, either of two different values or both of one value (N)"""
+    top = -np.sort(-value_counts, axis=1)
+    big, small = max(amount_a, amount_b), min(amount_a, amount_b)
+    different = np.maximum(0, big - top[:, 0]) + np.maximum(0, small - top[:, 1])
+    same = np.maximum(0, amount_a + amount_b - top[:, 0])
+    return np.minimum(different, same)
+
+
+def run_windows(value_counts, amount):
+    """returns which values are in each run window of amount cards (W x 12), and the cards
+    short of a run in each window (N x W)"""
+    windows = np.array([[low <= value < low + amount for value in range(WILD)] for low in range(WILD - amount + 1)])
+    present = (value_counts > 0).astype(np.intp)
+    return windows, amount - present @ windows.T
+
+
+def set_run_deficit(value_counts, set_amount, run_amount):
+    """returns the cards short of a set and a run, where a card can't be in both (N)"""
+    windows, run_short = run_windows(value_counts, run_amount)
+    # the run takes one card of each of its values the hand has, the set gets the rest
+    taken = windows[None, :, :] & (value_counts[:, None, :] > 0)
+    set_short = np.maximum(0, set_amount - (value_counts[:, None, :] - taken))
+    return (run_short[:, :, None] + set_short).min(axis=(1, 2))
+
+
+def phase_missing(counts, chunk_size=CHUNK_SIZE):
+    """returns an (N x 10) array of the fewest cards each hand is missing to make each phase,
+    counting its wild cards.  0 means the hand can make the phase.
+    Hands are worked through chunk_size at a time to keep the temporary arrays small."""
+    counts = np.asarray(counts)
+    if counts.ndim == 2:
+        counts = hands_to_counts(counts)
+    missing = np.zeros((counts.shape[0], len(PHASE_GROUPS)), dtype=np.intp)
+    for start in range(0, counts.shape[0], chunk_size):
+        missing[start:start + chunk_size] = chunk_missing(counts[start:start + chunk_size])
+    return missing
+
+
+def chunk_missing(counts):
+    """phase_missing for one chunk of an (N x 14 x 5) count array"""
+    value_counts = counts[:, :WILD, :].sum(axis=2)
+    wilds = counts[:, WILD, :].sum(axis=1)
+    suit_counts = counts[:, :WILD, :BLACK].sum(axis=1)
+
+    missing = np.zeros((counts.shape[0], len(PHASE_GROUPS)), dtype=np.intp)
+    for phase, groups in PHASE_GROUPS.items():
+        kinds = tuple(kind for kind, amount in groups)
+        amounts = [amount for kind, amount in groups]
+        if kinds == (SET, SET):
+            deficit = two_set_deficit(value_counts, *amounts)
+        elif kinds == (SET, RUN):
+            deficit = set_run_deficit(value_counts, *amounts)
+        elif kinds == (RUN,):
+            deficit = run_windows(value_counts, amounts[0])[1].min(axis=1)
+        elif kinds == (COLOR,):
+            deficit = np.maximum(0, amounts[0] - suit_counts.max(axis=1))
+        missing[:, phase - 1] = np.maximum(0, deficit - wilds)
+    return missing
+
+
+def phase_possible(counts):
+    """returns an (N x 10) boolean array of which phases each hand can make"""
+    return phase_missing(counts) == 0
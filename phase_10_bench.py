@@ -0,0 +1,441 @@
+"""
+Phase 10 benchmarks
+
+Times the hot paths of the game with fixed seeds: the phase checks over many
+hand shapes, the engine's moves and deal, laying out the window's piles, and
+whole games between computer players.  The results are written to a JSON file
+and compared against a stored baseline, and a benchmark that got slower than
+the baseline by more than the tolerance is reported as a regression.
+
+    $ python phase_10.py bench                    # compare against bench_baseline.json
+    $ python phase_10.py bench --save-baseline    # make these results the new baseline
+
+Each benchmark is run in a loop long enough to take at least MIN_SECONDS, so
+the timer and the machine's hiccups don't make up much of it.  The loop is
+run --repeat times, taking turns with the other benchmarks, and the fastest
+is kept, as the other runs only measure what else the machine was doing.  A
+benchmark only counts as a regression if it is slower by more than the
+tolerance and by more than NOISE_FLOOR seconds an operation.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from Phase_10_constants import DECK_FACE_DOWN_PILE, DISCARD_PILE, USER_HAND_PILE, LAST_PHASE_PILE
+from phase_10_cards import CARD_VALUE, CARD_SUIT, DECK_SIZE, WILD, SKIP, BLACK
+from phase_10_rules import SET, RUN, COLOR, PHASE_GROUPS, TOP_VALUE
+from phase_10_engine import Phase10Engine, SEATS
+from phase_10_deck import deal_from_seed
+from phase_10_cache import clear_caches
+from phase_10_sim import play_game
+from player_class import Player, Comp
+
+# Seed of every benchmark
+SEED = 10
+
+# Files the results are written to and compared against
+RESULTS_FILE = "bench_results.json"
+BASELINE_FILE = "bench_baseline.json"
+
+# How much slower than the baseline a benchmark may be before it is a regression
+TOLERANCE = 0.25
+
+# Seconds an operation may be slower than the baseline by, whatever the tolerance, as smaller
+# differences than this are noise
+NOISE_FLOOR = 1e-7
+
+# Fewest seconds each run of a benchmark takes, looping it as many times as that needs
+MIN_SECONDS = 0.1
+
+# Benchmarks that time the window, which only compare with a baseline made on the same backend
+BACKEND_BENCHMARKS = ("view.", "ui.")
+
+# Number of runs of each benchmark, the fastest is kept
+REPEAT = 15
+
+# Number of hands made for each group of each phase
+HAND_SHAPES = 200
+
+# Number of games played by the game benchmarks
+GAMES = 4
+
+# Number of turns the user plays with the mouse in the ui benchmark
+SESSION_TURNS = 20
+
+
+def cards_by_value():
+    """returns a list of the card ids of each value"""
+    cards = [[] for _ in range(SKIP + 1)]
+    for card in range(DECK_SIZE):
+        cards[CARD_VALUE[card]].append(card)
+    return cards
+
+
+def make_group(kind, amount, rng, valid):
+    """returns a sorted pile of amount cards for a group, using some wild cards.  An invalid pile
+    has one card that doesn't fit"""
+    by_value = cards_by_value()
+    wilds = rng.randrange(min(amount, 3))
+    if kind == SET:
+        cards = rng.sample(by_value[rng.randrange(WILD)], min(amount - wilds, 8))
+    elif kind == RUN:
+        low = rng.randrange(TOP_VALUE - amount + 2)
+        values = rng.sample(range(low, low + amount), amount - wilds)
+        cards = [rng.choice(by_value[value]) for value in values]
+    else:
+        suit = rng.randrange(BLACK)
+        cards = rng.sample([card for card in range(DECK_SIZE) if CARD_SUIT[card] == suit], amount - wilds)
+    cards += rng.sample(by_value[WILD], amount - len(cards))
+    if not valid:
+        cards[0] = rng.choice([card for card in range(DECK_SIZE) if CARD_VALUE[card] < WILD and card not in cards])
+    return sorted(cards)
+
+
+def hand_shapes(rng):
+    """returns a list of (phase, pile, pile_b) of valid and invalid laid phases for every phase"""
+    shapes = []
+    for phase, groups in PHASE_GROUPS.items():
+        for i in range(HAND_SHAPES):
+            piles = [make_group(kind, amount, rng, valid=i % 2 == 0 or j > 0) for j, (kind, amount) in enumerate(groups)]
+            shapes.append((phase, piles[0], piles[1] if len(piles) > 1 else None))
+    return shapes
+
+
+def bench_checks(kind):
+    """returns a benchmark of the Player check of one kind of group, over every pile of that kind"""
+    check = {SET: Player.check_set, RUN: Player.check_run, COLOR: Player.check_color}[kind]
+    player = Player("user", USER_HAND_PILE)
+    piles = []
+    for phase, pile, pile_b in hand_shapes(random.Random(SEED)):
+        for (group_kind, amount), group_pile in zip(PHASE_GROUPS[phase], (pile, pile_b)):
+            if group_kind == kind:
+                piles.append((amount, group_pile))
+
+    def run():
+        for amount, pile in piles:
+            check(player, amount, pile)
+    return run, len(piles)
+
+
+def bench_phase_complete():
+    """returns a benchmark of Player.phase_complete over the laid phases, starting from empty caches"""
+    player = Player("user", USER_HAND_PILE)
+    shapes = hand_shapes(random.Random(SEED))
+
+    def run():
+        clear_caches()
+        for phase, pile, pile_b in shapes:
+            player.phase = phase
+            player.phase_pile = pile
+            player.phase_pile_b = pile_b
+            player.phase_complete()
+    return run, len(shapes)
+
+
+def dealt_engine():
+    """returns an engine with the first round dealt"""
+    engine = Phase10Engine(seed=SEED)
+    engine.setup()
+    return engine
+
+
+def bench_move_card():
+    """returns a benchmark of Phase10Engine.move_card, moving cards between the deck and the hands and back"""
+    engine = dealt_engine()
+    moves = []
+    for card in engine.piles[DECK_FACE_DOWN_PILE][-40:]:
+        hand = SEATS[card % len(SEATS)][1]
+        moves.append((card, hand))
+        moves.append((card, DECK_FACE_DOWN_PILE))
+
+    def run():
+        for card, pile_index in moves:
+            engine.move_card(card, pile_index)
+    return run, len(moves)
+
+
+def bench_get_pile_for_card():
+    """returns a benchmark of Phase10Engine.get_pile_for_card over every card"""
+    engine = dealt_engine()
+
+    def run():
+        for card in range(DECK_SIZE):
+            engine.get_pile_for_card(card)
+    return run, DECK_SIZE
+
+
+def bench_setup():
+    """returns a benchmark of dealing a round with Phase10Engine.setup"""
+    engines = [Phase10Engine(seed=SEED + i) for i in range(100)]
+
+    def run():
+        for engine in engines:
+            engine.setup()
+    return run, len(engines)
+
+
+def bench_deal_from_seed():
+    """returns a benchmark of deal_from_seed"""
+    def run():
+        for seed in range(SEED, SEED + 100):
+            deal_from_seed(seed)
+    return run, 100
+
+
+def bench_game(policy):
+    """returns a benchmark of whole games between computer players of a policy, starting from empty caches"""
+    def run():
+        clear_caches()
+        for seed in range(SEED, SEED + GAMES):
+            play_game(seed, [policy] * len(SEATS))
+    return run, GAMES
+
+
+# Window the view benchmarks lay out, made the first time one is run
+window = None
+
+
+def get_window():
+    """returns the window of the view benchmarks, with a round dealt and cards laid on every phase pile"""
+    global window
+    if window is None:
+        import phase_10
+        window = phase_10.MyGame()
+        # the round is dealt here, so setup() doesn't start logging the game
+        window.engine.seed = SEED
+        window.engine.setup()
+        for player in window.player_list:
+            for pile_index in player.phase_pile_indexes():
+                for card in window.engine.piles[player.hand][:3]:
+                    window.engine.move_card(card, pile_index)
+        window.setup()
+    return window
+
+
+def bench_sort_pile():
+    """returns a benchmark of MyGame.sort_pile over every pile"""
+    game = get_window()
+    pile_indexes = [pile_index for pile_index in range(LAST_PHASE_PILE + 1) if game.piles[pile_index]]
+
+    def run():
+        for pile_index in pile_indexes:
+            game.sort_pile(pile_index)
+    return run, len(pile_indexes)
+
+
+def bench_view_get_pile_for_card():
+    """returns a benchmark of MyGame.get_pile_for_card over every card sprite"""
+    game = get_window()
+
+    def run():
+        for card in game.card_sprites:
+            game.get_pile_for_card(card)
+    return run, DECK_SIZE
+
+
+def bench_view_setup():
+    """returns a benchmark of MyGame.setup, laying out a new round"""
+    game = get_window()
+
+    def run():
+        for _ in range(10):
+            game.setup()
+    return run, 10
+
+
+def drag(game, sprite, target):
+    """ Press the mouse on a sprite, drag it to the middle of target and let go """
+    game.on_mouse_press(sprite.center_x, sprite.center_y, 1, 0)
+    game.on_mouse_motion(target.center_x, target.center_y, target.center_x - sprite.center_x,
+                         target.center_y - sprite.center_y)
+    game.on_mouse_release(target.center_x, target.center_y, 1, 0)
+
+
+def click_turn(game):
+    """ Play the user's turn with the mouse: click the deck (turning the discard pile over first if the
+    deck is empty), then drag the last card of the hand onto the discard pile """
+    deck = game.pile_mat_list[DECK_FACE_DOWN_PILE]
+    if len(game.piles[DECK_FACE_DOWN_PILE]) == 0:
+        game.on_mouse_press(deck.center_x, deck.center_y, 1, 0)
+    game.on_mouse_press(deck.center_x, deck.center_y, 1, 0)
+    game.on_mouse_release(deck.center_x, deck.center_y, 1, 0)
+    drag(game, game.piles[game.player_list[game.engine.get_turn()].hand][-1], game.pile_mat_list[DISCARD_PILE])
+
+
+def bench_session():
+    """returns a benchmark of a scripted session through the window's input handlers: the user plays
+    SESSION_TURNS turns with made up mouse events, and the computer players take their turns in on_update"""
+    import phase_10
+    game = get_window()
+
+    def run():
+        players = [Player("user", USER_HAND_PILE, 1, True)] + [Comp(name, hand) for name, hand in SEATS[1:]]
+        game.engine = Phase10Engine(players, seed=SEED)
+        game.player_list = game.engine.player_list
+        game.engine.setup()
+        game.setup()
+        turns = 0
+        while turns < SESSION_TURNS and not game.game_over:
+            if game.comp_turn():
+                game.on_update(phase_10.COMP_TURN_DELAY)
+            else:
+                click_turn(game)
+                turns += 1
+            game.on_draw()
+        if turns < SESSION_TURNS:
+            raise RuntimeError("the scripted session ended early")
+    return run, SESSION_TURNS
+
+
+# Benchmarks by name: each function returns the function to time and the number of operations it does
+BENCHMARKS = {
+    "rules.check_set": lambda: bench_checks(SET),
+    "rules.check_run": lambda: bench_checks(RUN),
+    "rules.check_color": lambda: bench_checks(COLOR),
+    "rules.phase_complete": bench_phase_complete,
+    "engine.move_card": bench_move_card,
+    "engine.get_pile_for_card": bench_get_pile_for_card,
+    "engine.setup": bench_setup,
+    "deck.deal_from_seed": bench_deal_from_seed,
+    "view.sort_pile": bench_sort_pile,
+    "view.get_pile_for_card": bench_view_get_pile_for_card,
+    "view.setup": bench_view_setup,
+    "ui.session": bench_session,
+    "game.basic": lambda: bench_game("basic"),
+    "game.comp": lambda: bench_game("comp"),
+}
+
+
+def time_loops(function, loops):
+    """returns the seconds function takes to be called loops times"""
+    start = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return time.perf_counter() - start
+
+
+def calibrate(function, min_seconds=MIN_SECONDS):
+    """returns how many times function has to be called in a row to take at least min_seconds"""
+    loops = 1
+    while True:
+        seconds = time_loops(function, loops)
+        if seconds >= min_seconds:
+            return loops
+        # aim a little past min_seconds, so the next try is usually the last
+        loops = int(loops * min_seconds * 1.2 / max(seconds, 1e-6)) + 1
+
+
+def run_benchmarks(names, repeat=REPEAT):
+    """runs the benchmarks.  returns a dict of results by name, with the seconds each operation takes,
+    or why the benchmark was skipped"""
+    results = {}
+    # function, operations and loops of each benchmark that can run
+    timed = {}
+    for name in names:
+        try:
+            function, ops = BENCHMARKS[name]()
+        except Exception as error:
+            # the view and ui benchmarks need a display, a headless OpenGL or the null backend
+            if not name.startswith(BACKEND_BENCHMARKS):
+                raise
+            results[name] = {"skipped": f"{type(error).__name__}: {error}"}
+            continue
+        timed[name] = (function, ops, calibrate(function))
+
+    # the runs of the benchmarks take turns, so a slow spell of the machine doesn't fall on all the runs of one
+    best = {}
+    for _ in range(repeat):
+        for name, (function, ops, loops) in timed.items():
+            seconds = time_loops(function, loops) / loops
+            best[name] = min(seconds, best.get(name, seconds))
+    for name, (function, ops, loops) in timed.items():
+        results[name] = {"seconds_per_op": best[name] / ops, "ops": ops, "loops": loops, "repeat": repeat}
+    return {name: results[name] for name in names}
+
+
+def compare(results, baseline, tolerance=TOLERANCE, same_backend=True, noise_floor=NOISE_FLOOR):
+    """returns a list of (name, baseline seconds, seconds, ratio) for every benchmark in both, and
+    a list of the names of the ones slower than the baseline by more than tolerance, and by more than
+    noise_floor seconds an operation.  The window's benchmarks are left out unless the baseline was made
+    on the same backend"""
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        if not same_backend and name.startswith(BACKEND_BENCHMARKS):
+            continue
+        base = baseline.get(name, {})
+        if "seconds_per_op" not in result or "seconds_per_op" not in base:
+            continue
+        ratio = result["seconds_per_op"] / base["seconds_per_op"]
+        rows.append((name, base["seconds_per_op"], result["seconds_per_op"], ratio))
+        if ratio > 1 + tolerance and result["seconds_per_op"] - base["seconds_per_op"] > noise_floor:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    """ Command line entry point: runs the benchmarks and compares them with the baseline.
+    returns 1 if there was a regression, otherwise 0 """
+    parser = argparse.ArgumentParser(prog="phase_10.py bench", description="Time the hot paths of Phase 10.")
+    parser.add_argument("--only", action="append", metavar="PREFIX",
+                        help="only run the benchmarks whose names start with PREFIX, like 'rules' or 'game.comp'")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs of each benchmark, the fastest is kept")
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON file of results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to the baseline file too")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="fraction slower than the baseline that counts as a regression")
+    parser.add_argument("--headless", action="store_true", help="lay out the window without a display")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        import pyglet
+        pyglet.options["headless"] = True
+    # imported after pyglet's options are set, as it imports the backend
+    from phase_10_backend import BACKEND
+
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": BACKEND,
+        "seed": SEED,
+        "benchmarks": run_benchmarks(names, args.repeat),
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+
+    try:
+        with open(args.baseline) as file:
+            baseline_report = json.load(file)
+    except FileNotFoundError:
+        baseline_report = {"backend": BACKEND, "benchmarks": {}}
+    # baselines from before the backend was recorded were made with arcade
+    baseline_backend = baseline_report.get("backend", "arcade")
+    same_backend = baseline_backend == BACKEND
+    if not same_backend:
+        print(f"baseline was made on the {baseline_backend} backend, not comparing the window's benchmarks",
+              file=sys.stderr)
+    rows, regressions = compare(report["benchmarks"], baseline_report["benchmarks"], args.tolerance, same_backend)
+    compared = {row[0]: row for row in rows}
+    for name, result in report["benchmarks"].items():
+        if "skipped" in result:
+            print(f"{name:26} skipped ({result['skipped']})", file=sys.stderr)
+        elif name in compared:
+            _, base, seconds, ratio = compared[name]
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:26} {seconds * 1e6:12.2f} us  baseline {base * 1e6:12.2f} us  x{ratio:.2f}{flag}",
+                  file=sys.stderr)
+        else:
+            print(f"{name:26} {result['seconds_per_op'] * 1e6:12.2f} us", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Phase 10 evaluation cache
+
+The rules only care about how many of each card a hand or pile holds, not which
+physical cards they are, so the result of checking or solving a hand can be
+reused for every other hand of the same shape.  EvalCache is a bounded LRU
+cache with hit/miss counters for those results.  Its keys are canonical hand
+signatures: a count tuple, plus the phase.
+
+Every cache registers itself by name, so cache_stats() can report on all of
+them at once.
+"""
+from collections import OrderedDict
+import functools
+
+# Every EvalCache by name
+CACHES = {}
+
+# What EvalCache.lookup returns for a key it doesn't have (None can be a cached value)
+MISSING = object()
+
+
+class EvalCache:
+    """ Bounded least recently used cache of evaluations, with hit/miss counters """
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        # least recently used entry first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        CACHES[name] = self
+
+    def lookup(self, key):
+        """returns the value cached for key, or MISSING"""
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        """caches value for key, dropping the least recently used entry if the cache is full"""
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def get(self, key, compute):
+        """returns the value cached for key, calling compute() and caching its result the first time"""
+        value = self.lookup(key)
+        if value is MISSING:
+            value = compute()
+            self.store(key, value)
+        return value
+
+    def clear(self):
+        """empties the cache and resets the counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """returns a dict of the hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0}
+
+
+def cached(name, maxsize):
+    """decorator that caches a function's results in a new EvalCache, keyed by its arguments.
+    The arguments have to be hashable hand signatures, like count tuples"""
+    cache = EvalCache(name, maxsize)
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args):
+            value = cache.lookup(args)
+            if value is MISSING:
+                value = function(*args)
+                cache.store(args, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """returns a dict of the stats of every cache, by name"""
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def clear_caches():
+    """empties every cache"""
+    for cache in CACHES.values():
+        cache.clear()
@@ -0,0 +1,92 @@
+"""
+Phase 10 card model
+
+Every card in the deck is a small int, 0 - 107.  Card ids are given out in order
+of value, so sorting a list of card ids sorts the cards by value, and the
+suit/value/points of a card are looked up in tables instead of being stored on
+an object.  The code of a card, suit * 14 + value, is the same for duplicate
+cards and indexes the count vectors used to hold a whole hand.
+"""
+from array import array
+
+from Phase_10_constants import CARD_SUITS, CARD_VALUES
+
+# Card values and suits with special meaning
+WILD = 12
+SKIP = 13
+BLACK = 4
+
+# Number of different values, suits and card codes
+VALUE_COUNT = len(CARD_VALUES)
+SUIT_COUNT = len(CARD_SUITS)
+CODE_COUNT = VALUE_COUNT * SUIT_COUNT
+
+# Number of copies of each numbered card, and of the wild and skip cards
+NUMBER_COPIES = 2
+WILD_COPIES = 8
+SKIP_COPIES = 4
+
+# Lookup tables indexed by card id
+CARD_VALUE = array("B")
+CARD_SUIT = array("B")
+CARD_CODE = array("B")
+CARD_POINTS = array("B")
+
+for _value in range(VALUE_COUNT):
+    if _value == WILD:
+        _cards = [BLACK] * WILD_COPIES
+    elif _value == SKIP:
+        _cards = [BLACK] * SKIP_COPIES
+    else:
+        _cards = [suit for suit in range(BLACK) for _ in range(NUMBER_COPIES)]
+    for _suit in _cards:
+        CARD_VALUE.append(_value)
+        CARD_SUIT.append(_suit)
+        CARD_CODE.append(_suit * VALUE_COUNT + _value)
+        # 5 points for 1-9, 10 points for 10-12, 15 for a skip and 25 for a wild
+        if _value < 9:
+            CARD_POINTS.append(5)
+        elif _value < WILD:
+            CARD_POINTS.append(10)
+        elif _value == SKIP:
+            CARD_POINTS.append(15)
+        else:
+            CARD_POINTS.append(25)
+
+# Number of cards in a deck
+DECK_SIZE = len(CARD_VALUE)
+
+
+def card_value(card):
+    """returns the value of a card, 0 - 11 for the numbers 1 - 12, WILD or SKIP"""
+    return CARD_VALUE[card]
+
+
+def card_suit(card):
+    """returns the suit (color) of a card"""
+    return CARD_SUIT[card]
+
+
+def card_code(card):
+    """returns the code of a card, suit * 14 + value"""
+    return CARD_CODE[card]
+
+
+def card_points(card):
+    """returns the points a card scores against a player left holding it"""
+    return CARD_POINTS[card]
+
+
+def card_name(card):
+    """returns a readable name for a card, like 'blue 5' or 'wild'"""
+    if CARD_VALUE[card] >= WILD:
+        return CARD_VALUES[CARD_VALUE[card]]
+    return f"{CARD_SUITS[CARD_SUIT[card]]} {CARD_VALUES[CARD_VALUE[card]]}"
+
+
+def count_cards(cards):
+    """returns the count vector of a list of cards: how many of each card code it holds"""
+    counts = array("B", bytes(CODE_COUNT))
+    for card in cards:
+        counts[CARD_CODE[card]] += 1
+    return counts
@@ -0,0 +1,265 @@
+"""
+Phase 10 game client
+
+Plays one seat of a game on the server of phase_10_server.py, or watches a
+game.  The client keeps its view of the game in an engine: each keyframe the
+server sends is loaded into one and the deltas after it are made on it (see
+phase_10_net.py).  The moves for the seat are worked out on the view and sent
+to the server, which makes them for real.
+
+A computer player plays like Comp.  It sends its draw first and waits to see
+the card it got, then works out the rest of its turn on the view and sends all
+of those moves at once.  With --human the moves are typed in instead.
+
+    $ python phase_10.py client --table 1            # a computer player
+    $ python phase_10.py client --table 1 --human
+    $ python phase_10.py client --table 1 --watch
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import deque
+
+from Phase_10_constants import DECK_FACE_DOWN_PILE, DISCARD_PILE, NO_CARD, DRAW_EVENT, PICKUP_EVENT, LAY_EVENT, \
+    TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT, COMPLETE_EVENT, RETURN_EVENT
+from phase_10_cards import card_name
+from phase_10_log import EventQueue, apply_event
+from phase_10_net import JOIN, SEATED, VIEW, DELTA, REJECT, ERROR, FRAME, JOIN_BODY, ANY_SEAT, WATCH, MOVED, FLAGS, \
+    PHASE, SCORE, WINNER, FRAME_NAMES, DELTA_NAMES, frame, read_frame, move_frame, move, read_view, read_deltas, \
+    apply_deltas
+from phase_10_server import HOST, PORT
+
+
+def turn_moves(engine, seat):
+    """returns the moves Comp would make for the rest of its turn, after drawing.  They are played
+    on a copy of the engine, and the events the engine records for them are left out, like replaying a log"""
+    before = engine.copy()
+    engine = engine.copy()
+    engine.log = made = EventQueue()
+    player = engine.player_list[seat]
+    if not player.play_cards(engine):
+        player.end_turn(engine)
+
+    # make the moves again on a copy: an event is a move if it wasn't recorded by one before it
+    moves = []
+    before.log = derived = EventQueue()
+    for event in made.events:
+        if derived.events:
+            derived.events.popleft()
+            continue
+        apply_event(before, event)
+        derived.events.popleft()
+        if event.kind == RETURN_EVENT:
+            # sent as a check of the laid cards, which gives them back
+            event = event._replace(kind=COMPLETE_EVENT)
+        moves.append(event)
+    return moves
+
+
+def bot_moves(engine, seat):
+    """returns the moves of a computer player in seat: its draw, or the rest of its turn"""
+    player = engine.player_list[seat]
+    if player.draw_card:
+        kind = DRAW_EVENT if player.choose_draw(engine) == DECK_FACE_DOWN_PILE else PICKUP_EVENT
+        return [move(kind, seat)]
+    return turn_moves(engine, seat)
+
+
+def fallback_move(engine, seat):
+    """returns a move that ends up ending the turn: a draw from the deck, or a discard of the last
+    card of the hand"""
+    player = engine.player_list[seat]
+    if player.draw_card:
+        return move(DRAW_EVENT, seat)
+    return move(DISCARD_EVENT, seat, engine.piles[player.hand][-1], DISCARD_PILE)
+
+
+def show_view(engine, seat):
+    """returns the view as lines of text, for a person playing"""
+    lines = [f"round {engine.round_number}"]
+    for index, player in enumerate(engine.player_list):
+        marks = ("*" if player.turn else " ") + ("C" if player.complete else " ")
+        piles = "  ".join(f"[{pile_index}] " + ", ".join(f"{card}:{card_name(card)}" for card in engine.piles[pile_index])
+                          for pile_index in player.phase_pile_indexes())
+        lines.append(f"{marks} seat {index} {player.name:6} phase {player.phase:2} score {player.score:3} "
+                     f"cards {len(engine.piles[player.hand]):2}  {piles}")
+    discard = engine.piles[DISCARD_PILE]
+    lines.append(f"discard: {card_name(discard[-1]) if discard else '-'}")
+    if seat != WATCH:
+        hand = engine.piles[engine.player_list[seat].hand]
+        lines.append("hand: " + ", ".join(f"{card}:{card_name(card)}" for card in hand))
+    return lines
+
+
+def show_deltas(version, deltas):
+    """returns a line of text with the deltas of a move, for a person watching"""
+    words = []
+    for kind, a, b, c in deltas:
+        if kind == MOVED:
+            words.append(f"{card_name(a) if a != NO_CARD else 'card'} {b}->{c}")
+        else:
+            words.append(DELTA_NAMES[kind] + ("" if kind not in (FLAGS, PHASE, SCORE, WINNER) else f" {a}"))
+    return f"version {version}: " + ", ".join(words)
+
+
+# Moves a person can type, with the number of numbers each takes
+COMMANDS = {"draw": (DRAW_EVENT, 0), "pickup": (PICKUP_EVENT, 0), "lay": (LAY_EVENT, 2), "back": (TAKE_BACK_EVENT, 1),
+            "hit": (HIT_EVENT, 2), "skip": (SKIP_EVENT, 2), "discard": (DISCARD_EVENT, 1),
+            "check": (COMPLETE_EVENT, 0)}
+
+
+def parse_move(engine, seat, line):
+    """returns the move typed in a line like 'lay 17 6' (card 17 on pile 6), or None if it can't be read.
+    A skip is given the seat of the player to skip"""
+    words = line.split()
+    if not words or words[0] not in COMMANDS:
+        return None
+    kind, count = COMMANDS[words[0]]
+    try:
+        numbers = [int(word) for word in words[1:]]
+    except ValueError:
+        return None
+    if len(numbers) != count:
+        return None
+    if kind == SKIP_EVENT:
+        if not 0 <= numbers[1] < len(engine.player_list):
+            return None
+        numbers[1] = engine.player_list[numbers[1]].hand
+    return move(kind, seat, *numbers)
+
+
+async def human_moves(engine, seat):
+    """returns the next move typed in by a person playing seat"""
+    print("\n".join(show_view(engine, seat)))
+    while True:
+        line = await asyncio.to_thread(input, "move (" + ", ".join(COMMANDS) + "): ")
+        event = parse_move(engine, seat, line)
+        if event is not None:
+            return [event]
+        print("can't read that move")
+
+
+class GameClient:
+    """ Connection to the server for one seat, or for watching """
+
+    def __init__(self, human=False, show=False):
+        self.human = human
+        # print what happens, for a person watching
+        self.show = show
+        self.reader = None
+        self.writer = None
+        self.table_id = None
+        self.seat = None
+        # view of the game, as an engine, and the version of the table it is at
+        self.engine = None
+        self.version = None
+        # seconds from sending each move to the server's answer, and the moves it turned down
+        self.latencies = []
+        self.rejected = 0
+        # number and bytes of the VIEW and DELTA frames received
+        self.frames = {VIEW: 0, DELTA: 0}
+        self.received = {VIEW: 0, DELTA: 0}
+
+    async def connect(self, host=HOST, port=PORT, table_id=0, seat=ANY_SEAT):
+        """ Connect to the server and take a seat at the table, or watch it with seat WATCH.
+        Raises ConnectionError if there isn't a seat """
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(frame(JOIN, JOIN_BODY.pack(table_id, seat)))
+        kind, body = await read_frame(self.reader)
+        if kind == ERROR:
+            raise ConnectionError(body.decode())
+        if kind != SEATED:
+            raise ConnectionError(f"expected seated, got {FRAME_NAMES[kind]}")
+        self.table_id, self.seat = JOIN_BODY.unpack(body)
+
+    async def choose(self, engine):
+        """returns the moves to send for the seat's turn"""
+        if self.human:
+            return await human_moves(engine, self.seat)
+        return bot_moves(engine, self.seat)
+
+    def update(self, kind, body):
+        """ Bring the view up to date with a VIEW or DELTA frame.  Raises ConnectionError if a
+        delta is missing or doesn't fit the view """
+        self.frames[kind] += 1
+        self.received[kind] += FRAME.size + len(body)
+        try:
+            if kind == VIEW:
+                self.version, self.engine = read_view(body)
+                if self.show:
+                    print("\n".join(show_view(self.engine, self.seat)))
+                return
+            version, deltas = read_deltas(body)
+            if self.engine is None or version != self.version + 1:
+                raise ConnectionError(f"got version {version} after {self.version}")
+            apply_deltas(self.engine, deltas)
+            self.version = version
+            if self.show:
+                print(show_deltas(version, deltas))
+        except ValueError as error:
+            raise ConnectionError(f"bad {FRAME_NAMES[kind]}: {error}") from None
+
+    async def play(self):
+        """ Play the seat, or watch, until the game is over.  returns the engine of the view.
+        Raises ConnectionError if the server ends the game first """
+        # times the moves waiting for an answer were sent
+        sent = deque()
+        while True:
+            try:
+                kind, body = await read_frame(self.reader)
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("server closed the connection") from None
+            if kind == ERROR:
+                raise ConnectionError(body.decode())
+            if kind in (VIEW, DELTA):
+                self.update(kind, body)
+            elif kind != REJECT:
+                raise ConnectionError(f"unexpected {FRAME_NAMES[kind]}")
+            if sent:
+                self.latencies.append(time.perf_counter() - sent.popleft())
+            if kind == REJECT:
+                self.rejected += 1
+            if self.engine.game_over:
+                self.writer.close()
+                return self.engine
+            if self.seat == WATCH or sent or self.engine.get_turn() != self.seat:
+                continue
+            # a move was turned down: end the turn the simple way instead of trying it again
+            moves = [fallback_move(self.engine, self.seat)] if kind == REJECT and not self.human \
+                else await self.choose(self.engine)
+            for event in moves:
+                self.writer.write(move_frame(event))
+                sent.append(time.perf_counter())
+            await self.writer.drain()
+
+
+def main(argv=None):
+    """ Command line entry point: plays a seat of a game on the server """
+    parser = argparse.ArgumentParser(prog="phase_10.py client", description="Play a seat of a Phase 10 game.")
+    parser.add_argument("--host", default=HOST, help="address of the server")
+    parser.add_argument("--port", type=int, default=PORT, help="port of the server")
+    parser.add_argument("--table", type=int, default=0, help="id of the table to join")
+    parser.add_argument("--seat", type=int, default=ANY_SEAT, help="seat to take (default: any free seat)")
+    parser.add_argument("--human", action="store_true", help="type the moves in instead of playing like Comp")
+    parser.add_argument("--watch", action="store_true", help="watch the game instead of playing")
+    args = parser.parse_args(argv)
+
+    client = GameClient(args.human, show=args.watch)
+
+    async def run():
+        await client.connect(args.host, args.port, args.table, WATCH if args.watch else args.seat)
+        print(f"table {client.table_id}, seat {client.seat}", file=sys.stderr)
+        return await client.play()
+
+    try:
+        engine = asyncio.run(run())
+    except ConnectionError as error:
+        print(f"game ended: {error}", file=sys.stderr)
+        return 1
+    print(f"game over, {engine.winner.name} won", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Phase 10 deck
+
+Shuffles and deals the card ids of phase_10_cards.py, before any sprite is
+made.  Every deal comes from a seed: the same seed always deals the same
+hands, so games can be replayed, benchmarked and dealt alike in tournaments.
+
+The shuffle is written out here instead of using random.shuffle, so the deal
+of a seed only depends on the random number generator.
+"""
+import random
+
+from phase_10_cards import DECK_SIZE
+
+# Number of cards dealt to each hand
+HAND_SIZE = 10
+
+# Number of hands dealt
+PLAYER_COUNT = 4
+
+# Bits of a game's seed, as it is saved
+SEED_BITS = 64
+SEED_MASK = (1 << SEED_BITS) - 1
+
+
+def create_deck():
+    """returns a new, unshuffled list of the 108 cards in a Phase 10 deck"""
+    return list(range(DECK_SIZE))
+
+
+def shuffle(cards, rng):
+    """ Shuffle the list of cards in place with the Fisher-Yates shuffle: every order is equally likely """
+    for i in range(len(cards) - 1, 0, -1):
+        j = rng.randrange(i + 1)
+        cards[i], cards[j] = cards[j], cards[i]
+
+
+def round_seed(seed, round_number):
+    """returns the seed the deal of a round of a game is shuffled from"""
+    return (seed << 32) + round_number
+
+
+def new_seed():
+    """returns a random seed for a game"""
+    return random.SystemRandom().getrandbits(SEED_BITS)
+
+
+def deal_from_seed(seed, player_count=PLAYER_COUNT, hand_size=HAND_SIZE):
+    """returns the hands (sorted), the card turned over to start the discard pile and the
+    draw pile (top card last) of the deal shuffled from seed"""
+    deck = create_deck()
+    shuffle(deck, random.Random(seed))
+    # each hand takes the next hand_size cards off the top of the deck as one block, not one card at a time
+    hands = []
+    for _ in range(player_count):
+        hand = deck[-hand_size:]
+        del deck[-hand_size:]
+        hand.sort()
+        hands.append(hand)
+    return hands, deck.pop(), deck
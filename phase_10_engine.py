@@ -0,0 +1,381 @@
+"""
+Phase 10 game engine
+
+All of the game rules, without any arcade import.  The engine holds the whole
+state of a game (the 14 piles, the players and whose turn it is) and MyGame in
+phase_10.py is only a view over it, so hands can be played without a window.
+"""
+import bisect
+
+from Phase_10_constants import PILE_COUNT, DECK_FACE_DOWN_PILE, DISCARD_PILE, \
+    USER_HAND_PILE, LCOMP_HAND_PILE, MCOMP_HAND_PILE, RCOMP_HAND_PILE, PHASE_PILE_1, \
+    NO_CARD, NO_PILE, DRAW_EVENT, PICKUP_EVENT, LAY_EVENT, TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT, \
+    RESHUFFLE_EVENT, ROUND_END_EVENT, COMPLETE_EVENT, RETURN_EVENT
+from player_class import Player
+from phase_10_rules import hit_rules
+from phase_10_cards import CARD_VALUE, CARD_CODE, DECK_SIZE, SKIP, count_cards
+from phase_10_deck import deal_from_seed, round_seed, new_seed, SEED_MASK
+
+# Names and hand piles of the four seats, in turn order
+SEATS = [("user", USER_HAND_PILE), ("lcomp", LCOMP_HAND_PILE), ("mcomp", MCOMP_HAND_PILE), ("rcomp", RCOMP_HAND_PILE)]
+
+
+def create_players():
+    """returns a list with a new Player for each of the four seats, user first"""
+    players = [Player(name, hand) for name, hand in SEATS]
+    players[0].turn = True
+    return players
+
+
+class Phase10Engine:
+    """ Holds the state of a game of Phase 10 and applies the rules to it.
+
+    Every move method returns True if the move was made and False if it is
+    not allowed, leaving the state untouched. """
+
+    def __init__(self, player_list=None, seed=None):
+        # List of Players, in turn order
+        self.player_list = player_list if player_list is not None else create_players()
+
+        # Seed of the game, each round is dealt from it and the round number.  Any int is taken to
+        # its low SEED_BITS bits, so the seed can be saved
+        self.seed = (seed if seed is not None else new_seed()) & SEED_MASK
+
+        # Create a list of lists, each holds a pile of cards.
+        self.piles = None
+
+        # Index of the pile each card is in, and how many of each card code each pile holds.
+        # Both are kept up to date by move_card()
+        self.card_piles = bytearray(DECK_SIZE)
+        self.pile_counts = None
+
+        # Number of rounds dealt so far
+        self.round_number = 0
+
+        # Flags to check if someone has won
+        self.game_over = False
+        self.winner = None
+
+        # HitRule of each phase pile of the players who have completed their phase, or None
+        # where hits have to be checked against the whole phase.  Made by set_complete()
+        self.hit_rules = {}
+
+        # EventLog every move is recorded in, or None
+        self.log = None
+
+    def setup(self):
+        """ Shuffle and deal a new round. """
+        self.piles = [[] for _ in range(PILE_COUNT)]
+        self.hit_rules = {}
+        self.round_number += 1
+        n = self.get_turn()
+
+        # Deal the hands, starting with the USER hand, and flip over the top card of the deck
+        # to start the discard pile
+        hands, card, deck = deal_from_seed(round_seed(self.seed, self.round_number), len(self.player_list))
+        for player, hand in zip(self.player_list, hands):
+            self.piles[player.hand] = hand
+        self.piles[DISCARD_PILE].append(card)
+        self.piles[DECK_FACE_DOWN_PILE] = deck
+
+        self.index_piles()
+
+        # assign phase piles to players
+        self.assign_phase_piles()
+        for player in self.player_list:
+            player.draw_card = True
+
+        # if a skip card is flipped over, skip first player
+        if CARD_VALUE[card] == SKIP:
+            self.end_turn(n)
+
+    def assign_phase_piles(self):
+        """ Give each player the phase piles for their phase, in turn order. """
+        last_pile = PHASE_PILE_1 - 1
+        for player in self.player_list:
+            player.determine_phase_piles(self.piles, last_pile)
+            last_pile = player.last_pile
+
+    def copy(self, player_class=None):
+        """ returns a copy of the engine that can be played on without changing this one.
+        player_class makes the copied players instances of another Player class, like Comp
+        for playing the game out. """
+        player_list = []
+        for player in self.player_list:
+            new_player = object.__new__(player_class or type(player))
+            new_player.__dict__.update(player.__dict__)
+            player_list.append(new_player)
+        engine = Phase10Engine(player_list, self.seed)
+        engine.piles = [pile[:] for pile in self.piles]
+        engine.card_piles = bytearray(self.card_piles)
+        engine.pile_counts = [counts[:] for counts in self.pile_counts]
+        engine.round_number = self.round_number
+        engine.game_over = self.game_over
+        engine.hit_rules = {pile_index: rule.copy() if rule is not None else None
+                            for pile_index, rule in self.hit_rules.items()}
+        if self.winner is not None:
+            engine.winner = player_list[self.player_list.index(self.winner)]
+        engine.assign_phase_piles()
+        return engine
+
+    def get_turn(self):
+        """returns index of the player whose turn it is"""
+        for index, player in enumerate(self.player_list):
+            if player.turn:
+                return index
+
+    def index_piles(self):
+        """ Rebuild the index of the pile each card is in and the count vectors of the piles,
+        after whole piles have been replaced. """
+        for index, pile in enumerate(self.piles):
+            for card in pile:
+                self.card_piles[card] = index
+        self.pile_counts = [count_cards(pile) for pile in self.piles]
+
+    def get_pile_for_card(self, card):
+        """ What pile is this card in? """
+        return self.card_piles[card]
+
+    def get_player_for_hand(self, pile_index):
+        """returns the index of the player holding the given hand pile"""
+        for index, player in enumerate(self.player_list):
+            if player.hand == pile_index:
+                return index
+
+    def get_player_for_phase_pile(self, pile_index):
+        """Returns the index of the player whose phase piles are being played on.
+        Finds the 'owner' of the given phase pile."""
+        for index, player in enumerate(self.player_list):
+            if pile_index in player.phase_pile_indexes():
+                return index
+
+    def move_card(self, card, pile_index):
+        """ Move the card to a new pile, keeping hands and phase piles sorted.  All moves of
+        single cards go through here, so the index of the pile each card is in stays up to date. """
+        old_index = self.card_piles[card]
+        self.piles[old_index].remove(card)
+        if pile_index > DISCARD_PILE:
+            bisect.insort(self.piles[pile_index], card)
+        else:
+            self.piles[pile_index].append(card)
+        self.card_piles[card] = pile_index
+        self.pile_counts[old_index][CARD_CODE[card]] -= 1
+        self.pile_counts[pile_index][CARD_CODE[card]] += 1
+
+    def record(self, kind, index, card=NO_CARD, pile_index=NO_PILE):
+        """ Add an event to the log, if the game is being logged """
+        if self.log is not None:
+            self.log.record(kind, index, card, pile_index)
+
+    def can_play_card(self, card):
+        """checks that the current player may play the card: it must be in their hand,
+        or on their own phase piles while their phase is not complete. returns bool"""
+        player = self.player_list[self.get_turn()]
+        pile_index = self.get_pile_for_card(card)
+        if pile_index == player.hand:
+            return True
+        return pile_index in player.phase_pile_indexes() and not player.complete
+
+    def draw(self, pile_index):
+        """ Current player draws the top card from the deck or the discard pile. """
+        player = self.player_list[self.get_turn()]
+        if self.game_over or not player.draw_card:
+            return False
+        if pile_index == DECK_FACE_DOWN_PILE:
+            if len(self.piles[DECK_FACE_DOWN_PILE]) == 0:
+                self.reshuffle()
+            if len(self.piles[DECK_FACE_DOWN_PILE]) == 0:
+                return False
+        elif pile_index == DISCARD_PILE:
+            # skip cards can not be picked up
+            if len(self.piles[DISCARD_PILE]) == 0 or CARD_VALUE[self.piles[DISCARD_PILE][-1]] == SKIP:
+                return False
+        else:
+            return False
+        card = self.piles[pile_index][-1]
+        self.move_card(card, player.hand)
+        player.draw_card = False
+        self.record(DRAW_EVENT if pile_index == DECK_FACE_DOWN_PILE else PICKUP_EVENT, self.get_turn(), card)
+        return True
+
+    def reshuffle(self):
+        """ Flip the discard pile back over to make a new deck, once the deck is empty. """
+        if len(self.piles[DECK_FACE_DOWN_PILE]) > 0 or len(self.piles[DISCARD_PILE]) == 0:
+            return False
+        self.piles[DECK_FACE_DOWN_PILE].extend(reversed(self.piles[DISCARD_PILE]))
+        self.piles[DISCARD_PILE].clear()
+        self.index_piles()
+        # flip over top card
+        self.move_card(self.piles[DECK_FACE_DOWN_PILE][-1], DISCARD_PILE)
+        self.record(RESHUFFLE_EVENT, self.get_turn())
+        return True
+
+    def lay(self, card, pile_index):
+        """ Current player lays a card on one of their own phase piles, before their phase is complete. """
+        player = self.player_list[self.get_turn()]
+        if self.game_over or player.draw_card or player.complete or pile_index not in player.phase_pile_indexes():
+            return False
+        if not self.can_play_card(card):
+            return False
+        self.move_card(card, pile_index)
+        self.record(LAY_EVENT, self.get_turn(), card, pile_index)
+        self.round_over()
+        return True
+
+    def take_back(self, card):
+        """ Current player returns a card from their own phase piles to their hand. """
+        player = self.player_list[self.get_turn()]
+        if self.game_over or player.complete or self.get_pile_for_card(card) not in player.phase_pile_indexes():
+            return False
+        self.move_card(card, player.hand)
+        self.record(TAKE_BACK_EVENT, self.get_turn(), card, player.hand)
+        return True
+
+    def hit(self, card, pile_index):
+        """ Current player plays a card from their hand on a completed phase pile. """
+        n = self.get_turn()
+        player = self.player_list[n]
+        if self.game_over or player.draw_card or self.get_pile_for_card(card) != player.hand:
+            return False
+        p = self.get_player_for_phase_pile(pile_index)
+        if p is None or len(self.piles[pile_index]) == 0:
+            return False
+        # current player needs phase complete in order to "hit"
+        if not player.complete:
+            if p == n or not self.phase_laid(player) or not player.phase_complete():
+                return False
+            self.set_complete(player)
+        if not self.fits_pile(card, pile_index):
+            return False
+        self.move_card(card, pile_index)
+        rule = self.hit_rules.get(pile_index)
+        if rule is not None:
+            rule.add(card)
+        self.record(HIT_EVENT, n, card, pile_index)
+        self.round_over()
+        return True
+
+    def fits_pile(self, card, pile_index):
+        """checks that the phase of the pile's owner is still complete with the card added. returns bool"""
+        rule = self.hit_rules.get(pile_index)
+        if rule is not None:
+            return rule.accepts(card)
+        p = self.get_player_for_phase_pile(pile_index)
+        if p is None or len(self.piles[pile_index]) == 0:
+            return False
+        # try the card on the pile, and take it back
+        bisect.insort(self.piles[pile_index], card)
+        valid = self.player_list[p].phase_complete()
+        self.piles[pile_index].remove(card)
+        return valid
+
+    def set_complete(self, player):
+        """ Mark the player's phase complete, and work out which cards each of their phase piles takes as a hit. """
+        player.complete = True
+        self.record(COMPLETE_EVENT, self.player_list.index(player))
+        pile_indexes = player.phase_pile_indexes()
+        rules = hit_rules(player.phase, *(self.piles[pile_index] for pile_index in pile_indexes))
+        for pile_index, rule in zip(pile_indexes, rules):
+            self.hit_rules[pile_index] = rule
+
+    def hit_piles(self):
+        """returns the index of every phase pile that can be hit on: the laid piles of complete players"""
+        return [pile_index for player in self.player_list if player.complete
+                for pile_index in player.phase_pile_indexes() if len(self.piles[pile_index]) > 0]
+
+    def skip(self, card, index):
+        """ Current player plays a skip card on another player's hand, ending their turn. """
+        n = self.get_turn()
+        player = self.player_list[n]
+        if self.game_over or player.draw_card or index == n or CARD_VALUE[card] != SKIP:
+            return False
+        if not self.can_play_card(card):
+            return False
+        self.player_list[index].skipped = True
+        self.move_card(card, DISCARD_PILE)
+        self.record(SKIP_EVENT, n, card, self.player_list[index].hand)
+        self.check_phase_piles()
+        self.end_turn(n)
+        return True
+
+    def discard(self, card):
+        """ Current player discards a card, ending their turn. """
+        n = self.get_turn()
+        player = self.player_list[n]
+        if self.game_over or player.draw_card or not self.can_play_card(card):
+            return False
+        self.move_card(card, DISCARD_PILE)
+        self.record(DISCARD_EVENT, n, card, DISCARD_PILE)
+        self.check_phase_piles()
+        self.end_turn(n)
+        return True
+
+    def phase_laid(self, player):
+        """returns True if the player has any cards on their phase piles"""
+        return any(len(self.piles[i]) > 0 for i in player.phase_pile_indexes())
+
+    def check_phase_piles(self):
+        """checks to see if there are invalid cards in phase pile when discarding, and return cards if invalid"""
+        player = self.player_list[self.get_turn()]
+        if player.draw_card or player.complete or not self.phase_laid(player):
+            return
+        if player.phase_complete():
+            self.set_complete(player)
+        else:
+            for pile_index in player.phase_pile_indexes():
+                for card in self.piles[pile_index][:]:
+                    self.move_card(card, player.hand)
+            self.record(RETURN_EVENT, self.get_turn())
+
+    def next_player(self, index):
+        """gives the turn to the next player after index who is not skipped"""
+        self.player_list[index].turn = False
+        new_index = (index + 1) % len(self.player_list)
+        while self.player_list[new_index].skipped:
+            self.player_list[new_index].skipped = False
+            new_index = (new_index + 1) % len(self.player_list)
+        self.player_list[new_index].turn = True
+        self.player_list[new_index].draw_card = True
+
+    def get_player_out(self):
+        """returns the index of a player with no cards left in their hand, or None"""
+        for index, player in enumerate(self.player_list):
+            if len(self.piles[player.hand]) == 0:
+                return index
+
+    def end_turn(self, index):
+        """Ends players turn and finds next player """
+        self.next_player(index)
+        self.round_over()
+
+    def round_over(self):
+        """check to see if the round is over or if someone has won."""
+        if self.game_over:
+            return False
+        out = self.get_player_out()
+        if out is None:
+            return False
+        # the player going out has to have completed their phase
+        self.check_phase_piles()
+        out = self.get_player_out()
+        if out is None:
+            return False
+        self.record(ROUND_END_EVENT, out)
+
+        for player in self.player_list:
+            player.add_score(self.piles)
+            if player.complete:
+                player.phase += 1
+            player.complete = False
+
+        win_list = [player for player in self.player_list if player.phase > 10]
+        if len(win_list) > 0:
+            # In case of a tie, the player with the lowest score wins
+            self.game_over = True
+            self.winner = min(win_list, key=lambda player: player.score)
+        else:
+            # the player after the one who went out starts the next round
+            self.player_list[self.get_turn()].turn = False
+            self.next_player(out)
+            self.setup()
+        return True
@@ -0,0 +1,125 @@
+"""
+Phase 10 server load generator
+
+Fills tables of the game server (phase_10_server.py) with computer players
+from phase_10_client.py, all on one event loop, and plays their games out.
+Prints one JSON line per run: how many games finished, how many moves were
+made and how fast, the latency of the moves (from sending a move to the
+server's answer), and the mean size of the keyframes and deltas the players
+were sent.  Giving several table counts runs them one after another, to find
+how many tables the server keeps up with.  --watchers adds people watching
+each table, who are sent every move too.
+
+    $ python phase_10.py load --spawn --tables 1 10 50 100
+
+--spawn starts a server in its own process for the runs, otherwise one has
+to be running already.  The players take CPU time too, so on a small machine
+the latencies are those of the players and the server together.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from phase_10_client import GameClient
+from phase_10_net import VIEW, DELTA, WATCH
+from phase_10_server import HOST, PORT
+
+# Seconds to wait for a spawned server to start listening
+SPAWN_TIMEOUT = 10
+
+
+def percentile(values, fraction):
+    """returns the value below which the fraction of the sorted values fall"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def mean_size(clients, kind):
+    """returns the mean size in bytes of the frames of a kind the clients were sent"""
+    frames = sum(client.frames[kind] for client in clients)
+    return sum(client.received[kind] for client in clients) / frames if frames else 0.0
+
+
+async def run_load(tables, host=HOST, port=PORT, first_table=0, watchers=0):
+    """plays a game at each of tables tables with ids from first_table, with watchers people watching
+    each.  returns a dict of the results"""
+    seats = 4
+    clients = [GameClient() for _ in range(tables * seats)]
+    watching = [GameClient() for _ in range(tables * watchers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client.connect(host, port, first_table + i // watchers, WATCH)
+                           for i, client in enumerate(watching)))
+    await asyncio.gather(*(client.connect(host, port, first_table + i // seats) for i, client in enumerate(clients)))
+    results = await asyncio.gather(*(client.play() for client in clients + watching), return_exceptions=True)
+    results = results[:len(clients)]
+    seconds = time.perf_counter() - start
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    failed = sum(isinstance(result, Exception) for result in results)
+    return {
+        "tables": tables,
+        "games": (len(results) - failed) // seats,
+        "failed": failed,
+        "moves": len(latencies),
+        "rejected": sum(client.rejected for client in clients),
+        "seconds": seconds,
+        "moves_per_second": len(latencies) / seconds,
+        "latency_ms": {"p50": percentile(latencies, 0.5) * 1000, "p95": percentile(latencies, 0.95) * 1000,
+                       "p99": percentile(latencies, 0.99) * 1000, "max": latencies[-1] * 1000 if latencies else 0.0},
+        "keyframe_bytes": mean_size(clients, VIEW),
+        "delta_bytes": mean_size(clients, DELTA),
+    }
+
+
+async def wait_for_server(host, port, timeout=SPAWN_TIMEOUT):
+    """ Wait until the server accepts connections.  Raises ConnectionError if it doesn't in time """
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise ConnectionError(f"no server on {host}:{port}") from None
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
+
+
+def main(argv=None):
+    """ Command line entry point: plays the runs and prints one JSON line per run """
+    parser = argparse.ArgumentParser(prog="phase_10.py load", description="Measure the Phase 10 game server.")
+    parser.add_argument("--host", default=HOST, help="address of the server")
+    parser.add_argument("--port", type=int, default=PORT, help="port of the server")
+    parser.add_argument("--tables", type=int, nargs="+", default=[10], help="tables played at once, for each run")
+    parser.add_argument("--watchers", type=int, default=0, help="people watching each table")
+    parser.add_argument("--spawn", action="store_true", help="start a server for the runs")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phase_10_server.py")
+        server = subprocess.Popen([sys.executable, script, "--host", args.host, "--port", str(args.port)])
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        first_table = 0
+        for tables in args.tables:
+            result = asyncio.run(run_load(tables, args.host, args.port, first_table, args.watchers))
+            first_table += tables
+            print(json.dumps(result), flush=True)
+            print(f"{tables} tables: {result['games']} games, {result['moves_per_second']:.0f} moves/s, "
+                  f"p50 {result['latency_ms']['p50']:.2f} ms, p95 {result['latency_ms']['p95']:.2f} ms, "
+                  f"{result['delta_bytes']:.0f} bytes a move", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
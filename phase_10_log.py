@@ -0,0 +1,149 @@
+"""
+Phase 10 event log
+
+Records every change the engine makes to a game as a typed event, and replays
+a log to rebuild the game without a window.  A log starts with a save of the
+game (see phase_10_save.py) taken when logging began, which holds the shuffle,
+so replaying the events on it deals the same cards and reaches the same state.
+
+Each event is 4 bytes: its kind, the index of the player who made it, the card
+and the pile.  Events are buffered and written BUFFER_SIZE bytes at a time,
+and at the end of every round.
+
+    engine.log = EventLog(open("game.log", "wb"), engine)
+    ...                                     # play
+    engine.log.close()
+    engine = replay_file("game.log")
+"""
+import struct
+from collections import deque, namedtuple
+
+from Phase_10_constants import DECK_FACE_DOWN_PILE, DISCARD_PILE, NO_CARD, NO_PILE, DRAW_EVENT, PICKUP_EVENT, \
+    LAY_EVENT, TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT, RESHUFFLE_EVENT, ROUND_END_EVENT, COMPLETE_EVENT, RETURN_EVENT
+from phase_10_save import dumps, loads
+from player_class import Player
+
+# First bytes of every log, and the version of the format written
+MAGIC = b"P10L"
+VERSION = 1
+
+# magic, version, length of the save that follows
+HEADER = struct.Struct("<4sBI")
+# kind, player, card, pile
+EVENT = struct.Struct("<BBBB")
+
+# Name of each kind of event, by kind
+EVENT_NAMES = ["draw", "pickup", "lay", "take_back", "hit", "skip", "discard", "reshuffle", "round_end", "complete",
+               "return"]
+
+# Bytes of events kept before they are written out
+BUFFER_SIZE = 4096
+
+Event = namedtuple("Event", ["kind", "player", "card", "pile"])
+
+
+class EventLog:
+    """ Append only log of a game's events, written to a binary file """
+
+    def __init__(self, file, engine, buffer_size=BUFFER_SIZE):
+        self.file = file
+        self.buffer_size = buffer_size
+        snapshot = dumps(engine)
+        self.buffer = bytearray(HEADER.pack(MAGIC, VERSION, len(snapshot)))
+        self.buffer += snapshot
+
+    def record(self, kind, player, card=NO_CARD, pile=NO_PILE):
+        """ Add an event to the log """
+        self.buffer += EVENT.pack(kind, player, card, pile)
+        if kind == ROUND_END_EVENT or len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered events to the file """
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        """ Write the buffered events, and close the file """
+        self.flush()
+        self.file.close()
+
+
+def read_log(data):
+    """returns the save the log starts from, and a list of its Events"""
+    if len(data) < HEADER.size:
+        raise ValueError("not a Phase 10 log")
+    magic, version, snapshot_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Phase 10 log")
+    if version != VERSION:
+        raise ValueError(f"unsupported log version {version}")
+    start = HEADER.size + snapshot_size
+    snapshot = data[HEADER.size:start]
+    # a log cut off in the middle of an event (by a crash) ends at the last whole event
+    end = start + (len(data) - start) // EVENT.size * EVENT.size
+    return snapshot, [Event(*event) for event in EVENT.iter_unpack(data[start:end])]
+
+
+class EventQueue:
+    """ Stands in for the EventLog of a game being replayed, holding the events the engine
+    records until they are checked against the log """
+
+    def __init__(self):
+        self.events = deque()
+
+    def record(self, kind, player, card=NO_CARD, pile=NO_PILE):
+        """ Add an event to the queue """
+        self.events.append(Event(kind, player, card, pile))
+
+
+def apply_event(engine, event):
+    """ Make the move of an event.  returns True if the move was made """
+    if event.player != engine.get_turn():
+        return False
+    if event.kind == DRAW_EVENT:
+        return engine.draw(DECK_FACE_DOWN_PILE)
+    if event.kind == PICKUP_EVENT:
+        return engine.draw(DISCARD_PILE)
+    if event.kind == LAY_EVENT:
+        return engine.lay(event.card, event.pile)
+    if event.kind == TAKE_BACK_EVENT:
+        return engine.take_back(event.card)
+    if event.kind == HIT_EVENT:
+        return engine.hit(event.card, event.pile)
+    if event.kind == SKIP_EVENT:
+        return engine.skip(event.card, engine.get_player_for_hand(event.pile))
+    if event.kind == DISCARD_EVENT:
+        return engine.discard(event.card)
+    if event.kind == RESHUFFLE_EVENT:
+        return engine.reshuffle()
+    if event.kind in (COMPLETE_EVENT, RETURN_EVENT):
+        # the player checked their laid cards themselves
+        engine.check_phase_piles()
+        return True
+    # rounds only end as part of a move
+    return False
+
+
+def replay(data, player_class=Player, stop=None):
+    """returns the engine of the game in a log, after its first stop events (all of them by default).
+    Each move in the log is made on the engine, and the events the engine records for it, like the
+    end of the round a discard sets off, have to be the next events in the log.
+    Raises ValueError if the game doesn't follow the log"""
+    snapshot, events = read_log(data)
+    engine = loads(snapshot, player_class=player_class)
+    engine.log = made = EventQueue()
+    for number, event in enumerate(events[:stop]):
+        if not made.events and not apply_event(engine, event):
+            raise ValueError(f"event {number} ({EVENT_NAMES[event.kind]}) can not be made")
+        if not made.events or made.events.popleft() != event:
+            raise ValueError(f"event {number} ({EVENT_NAMES[event.kind]}) does not follow the game")
+    engine.log = None
+    return engine
+
+
+def replay_file(path, player_class=Player, stop=None):
+    """returns the engine of the game in a log file, after its first stop events"""
+    with open(path, "rb") as file:
+        return replay(file.read(), player_class, stop)
@@ -0,0 +1,251 @@
+"""
+Phase 10 network protocol
+
+What the game server (phase_10_server.py) and its clients (phase_10_client.py)
+send each other over TCP.  Every message is a frame: a 3 byte header with the
+kind of message and the length of its body, then the body.
+
+    JOIN    client -> server   table id and the seat wanted (ANY_SEAT for any, WATCH to watch)
+    SEATED  server -> client   table id and the seat given
+    MOVE    client -> server   a move, as a 4 byte event of the event log
+    VIEW    server -> client   version, then the whole game as the seat sees it (a keyframe)
+    DELTA   server -> client   version, then what a move changed, as 4 byte deltas
+    REJECT  server -> client   a move that wasn't allowed, sent back as it came
+    ERROR   server -> client   why the server is closing the connection, as text
+
+A move is an event of phase_10_log.py (kind, player, card, pile) of one of the
+MOVE_KINDS.  The server fills in the player from the seat it came from, and
+makes it with apply_event, so the engine's own rules decide what is allowed.
+
+A view is a save (see phase_10_save.py) of the game with the seed zeroed and
+the cards the seat can't see (the deck and the other hands) sorted and dealt
+back out over those piles.  It holds no more than the seat could work out for
+itself, so a client can't cheat with it, and it loads into an engine with
+phase_10_save.loads like any save.
+
+Every move the server makes raises the table's version by one, and is sent to
+every client as the deltas it made, on the 14 piles of the engine:
+
+    MOVED    card, from pile, to pile   a card moved.  The card is NO_CARD if the
+                                        client can see neither pile
+    FLIPPED  -                          the discard pile was turned over as the deck
+    FLAGS    player, flags              turn/skipped/draw_card/complete changed
+    PHASE    player, phase              a player went up a phase
+    SCORE    player, score (2 bytes)    a player's score changed
+    WINNER   player                     the game is over
+
+A delta is 4 bytes, so most moves cost a client 15 - 20 bytes.  A new round
+is sent as a view instead, as dealing changes almost every pile.  Clients that
+join a table late, like people watching, are sent the last keyframe and the
+deltas since it.
+"""
+import struct
+
+from Phase_10_constants import PILE_COUNT, DECK_FACE_DOWN_PILE, DISCARD_PILE, PHASE_PILE_1, NO_CARD, NO_PILE, \
+    DRAW_EVENT, PICKUP_EVENT, LAY_EVENT, TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT, COMPLETE_EVENT
+from phase_10_cards import DECK_SIZE
+from phase_10_log import EVENT, Event
+from phase_10_save import dumps, loads, TURN, SKIPPED, DRAW_CARD, COMPLETE
+from player_class import Comp
+
+# kind, body length
+FRAME = struct.Struct("<BH")
+# table id, seat
+JOIN_BODY = struct.Struct("<IB")
+# version of the table, at the start of VIEW and DELTA bodies
+VERSION = struct.Struct("<I")
+# kind, then three bytes that depend on the kind
+DELTA_ENTRY = struct.Struct("<BBBB")
+
+# Kinds of frame
+JOIN = 0
+SEATED = 1
+MOVE = 2
+VIEW = 3
+REJECT = 4
+ERROR = 5
+DELTA = 6
+
+# Name of each kind of frame, by kind
+FRAME_NAMES = ["join", "seated", "move", "view", "reject", "error", "delta"]
+
+# Kinds of delta
+MOVED = 0
+FLIPPED = 1
+FLAGS = 2
+PHASE = 3
+SCORE = 4
+WINNER = 5
+
+# Name of each kind of delta, by kind
+DELTA_NAMES = ["moved", "flipped", "flags", "phase", "score", "winner"]
+
+# Seat asked for by a client that will take any free seat, and by one that only watches
+ANY_SEAT = 255
+WATCH = 254
+
+# Kinds of event a client may send as a move.  COMPLETE checks the cards laid on the player's
+# phase piles, like the engine does when they discard
+MOVE_KINDS = {DRAW_EVENT, PICKUP_EVENT, LAY_EVENT, TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT,
+              COMPLETE_EVENT}
+
+# Moves that play a card, and moves that play it on a pile
+CARD_MOVES = {LAY_EVENT, TAKE_BACK_EVENT, HIT_EVENT, SKIP_EVENT, DISCARD_EVENT}
+PILE_MOVES = {LAY_EVENT, HIT_EVENT, SKIP_EVENT}
+
+
+def frame(kind, body=b""):
+    """returns a frame of the given kind holding body"""
+    return FRAME.pack(kind, len(body)) + body
+
+
+async def read_frame(reader):
+    """returns the kind and body of the next frame from an asyncio StreamReader.
+    Raises asyncio.IncompleteReadError if the connection closes"""
+    kind, length = FRAME.unpack(await reader.readexactly(FRAME.size))
+    body = await reader.readexactly(length) if length else b""
+    return kind, body
+
+
+def move_frame(event):
+    """returns a MOVE frame of an event"""
+    return frame(MOVE, EVENT.pack(*event))
+
+
+def read_move(body):
+    """returns the Event of a MOVE or REJECT body, or None if it isn't a move a client may send"""
+    if len(body) != EVENT.size:
+        return None
+    event = Event(*EVENT.unpack(body))
+    if event.kind not in MOVE_KINDS:
+        return None
+    if event.kind in CARD_MOVES and event.card >= DECK_SIZE:
+        return None
+    if event.kind in PILE_MOVES and event.pile >= PILE_COUNT:
+        return None
+    return event
+
+
+def move(kind, player, card=NO_CARD, pile=NO_PILE):
+    """returns the Event of a move"""
+    return Event(kind, player, card, pile)
+
+
+def hidden_piles(engine, seat):
+    """returns the index of every pile the player in seat can't see: the deck and the other hands.
+    Someone watching (seat WATCH) can't see any hand"""
+    return [DECK_FACE_DOWN_PILE] + [player.hand for index, player in enumerate(engine.player_list) if index != seat]
+
+
+def dump_view(engine, seat):
+    """returns the view of the game of the player in seat, as bytes"""
+    hidden = hidden_piles(engine, seat)
+    cards = sorted(card for pile_index in hidden for card in engine.piles[pile_index])
+    piles = list(engine.piles)
+    start = 0
+    for pile_index in hidden:
+        size = len(engine.piles[pile_index])
+        piles[pile_index] = cards[start:start + size]
+        start += size
+    return dumps(engine, seed=0, piles=piles)
+
+
+def can_see(engine, seat, pile_index):
+    """returns True if the player in seat can see the cards of the pile"""
+    if pile_index == DISCARD_PILE or pile_index >= PHASE_PILE_1:
+        return True
+    return seat < len(engine.player_list) and engine.player_list[seat].hand == pile_index
+
+
+def player_flags(player):
+    """returns the turn/skipped/draw_card/complete flags of a player as one byte, as in a save"""
+    return (TURN * player.turn | SKIPPED * player.skipped | DRAW_CARD * player.draw_card
+            | COMPLETE * player.complete)
+
+
+def load_view(data, player_class=Comp):
+    """returns an engine with the state of a view.  The hidden piles hold the right number of cards,
+    but not the right cards.  Raises ValueError if data isn't a view"""
+    return loads(data, player_class=player_class)
+
+
+def view_body(engine, version, seat):
+    """returns the body of a VIEW frame: the version, and the view of the player in seat"""
+    return VERSION.pack(version) + dump_view(engine, seat)
+
+
+def read_view(body, player_class=Comp):
+    """returns the version and the engine of a VIEW body.  Raises ValueError if it isn't one"""
+    if len(body) < VERSION.size:
+        raise ValueError("view is cut short")
+    return VERSION.unpack_from(body)[0], load_view(body[VERSION.size:], player_class)
+
+
+def delta_body(engine, version, deltas, seat):
+    """returns the body of a DELTA frame for the player in seat: the version, and the deltas with the
+    card of every move left out that the player can't see either end of"""
+    data = bytearray(VERSION.pack(version))
+    for delta in deltas:
+        if delta[0] == MOVED and not (can_see(engine, seat, delta[2]) or can_see(engine, seat, delta[3])):
+            delta = (MOVED, NO_CARD, delta[2], delta[3])
+        data += DELTA_ENTRY.pack(*delta)
+    return bytes(data)
+
+
+def read_deltas(body):
+    """returns the version and the list of deltas of a DELTA body.  Raises ValueError if it isn't one"""
+    if len(body) < VERSION.size or (len(body) - VERSION.size) % DELTA_ENTRY.size:
+        raise ValueError("deltas are cut short")
+    return VERSION.unpack_from(body)[0], list(DELTA_ENTRY.iter_unpack(body[VERSION.size:]))
+
+
+def move_seen(engine, card, from_pile, to_pile):
+    """ Move a card of a view.  A card coming out of a pile the view can't see (NO_CARD, or a card the
+    view put in another hidden pile) is swapped in for one of the cards the view put in that pile """
+    pile = engine.piles[from_pile]
+    if not pile:
+        raise ValueError(f"no card to move from pile {from_pile}")
+    if card == NO_CARD:
+        card = pile[-1]
+    elif engine.card_piles[card] != from_pile:
+        other = pile[-1]
+        engine.move_card(other, engine.card_piles[card])
+        engine.move_card(card, from_pile)
+    engine.move_card(card, to_pile)
+    rule = engine.hit_rules.get(to_pile)
+    if rule is not None:
+        rule.add(card)
+
+
+def apply_deltas(engine, deltas):
+    """ Make the changes of a list of deltas on the engine of a view.  Raises ValueError for a delta
+    that doesn't fit the view """
+    for kind, a, b, c in deltas:
+        if kind == MOVED:
+            move_seen(engine, a, b, c)
+        elif kind == FLIPPED:
+            engine.piles[DECK_FACE_DOWN_PILE].extend(reversed(engine.piles[DISCARD_PILE]))
+            engine.piles[DISCARD_PILE].clear()
+            engine.index_piles()
+        elif kind == FLAGS:
+            player = engine.player_list[a]
+            complete = player.complete
+            player.turn = bool(b & TURN)
+            player.skipped = bool(b & SKIPPED)
+            player.draw_card = bool(b & DRAW_CARD)
+            player.complete = bool(b & COMPLETE)
+            if player.complete and not complete:
+                engine.set_complete(player)
+            elif complete and not player.complete:
+                for pile_index in player.phase_pile_indexes():
+                    engine.hit_rules.pop(pile_index, None)
+        elif kind == PHASE:
+            engine.player_list[a].phase = b
+            engine.assign_phase_piles()
+        elif kind == SCORE:
+            engine.player_list[a].score = b | c << 8
+        elif kind == WINNER:
+            engine.game_over = True
+            engine.winner = engine.player_list[a]
+        else:
+            raise ValueError(f"unknown delta {kind}")
@@ -0,0 +1,203 @@
+"""
+Phase 10 null presentation backend
+
+The part of the arcade API the window uses, in plain Python: sprites keep
+their position, size and rectangular hit box, and hit tests work as they do
+in arcade, but nothing is uploaded to a GPU and drawing does nothing.  MyGame
+runs on it unchanged, so its real input handling can be driven with made up
+mouse events on a machine without a display or OpenGL:
+
+    $ PHASE10_BACKEND=null python phase_10.py bench --only ui
+
+Only what the game uses is here.  Texture sizes are read from the PNG files,
+so cards are the same size as with arcade.
+"""
+import math
+import struct
+from types import SimpleNamespace
+
+# Colors the game uses
+color = SimpleNamespace(DARK_GRAY=(169, 169, 169))
+csscolor = SimpleNamespace(BLACK=(0, 0, 0), BLUE=(0, 0, 255), DARK_SLATE_GRAY=(47, 79, 79), GREEN=(0, 128, 0),
+                           RED=(255, 0, 0), YELLOW=(255, 255, 0))
+
+# Keys the game uses, with pyglet's key codes
+key = SimpleNamespace(L=108, R=114, S=115, SPACE=32, T=116)
+
+
+class Texture:
+    """ Name and size of an image """
+
+    def __init__(self, name, width, height):
+        self.name = name
+        self.width = width
+        self.height = height
+
+
+def image_size(file_name):
+    """returns the width and height of a PNG file, from its header"""
+    with open(file_name, "rb") as file:
+        header = file.read(24)
+    return struct.unpack(">II", header[16:24])
+
+
+def load_texture(file_name, *args, **kwargs):
+    """returns a Texture the size of the image in the file"""
+    return Texture(file_name, *image_size(file_name))
+
+
+def load_spritesheet(file_name, sprite_width, sprite_height, columns, count, *args, **kwargs):
+    """returns a Texture for each of the count images on a sheet"""
+    return [Texture(f"{file_name}-{i}", sprite_width, sprite_height) for i in range(count)]
+
+
+class Sprite:
+    """ Position, size and texture of something on the table """
+
+    def __init__(self, filename=None, scale=1, *args, texture=None, **kwargs):
+        self.center_x = 0
+        self.center_y = 0
+        self.visible = True
+        self._scale = scale
+        self._texture = None
+        self.width = 0
+        self.height = 0
+        if texture is None and filename is not None:
+            texture = load_texture(filename)
+        if texture is not None:
+            self.texture = texture
+
+    @property
+    def texture(self):
+        return self._texture
+
+    @texture.setter
+    def texture(self, texture):
+        self._texture = texture
+        self.width = texture.width * self._scale
+        self.height = texture.height * self._scale
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale):
+        # like arcade, the size only changes if the scale does
+        if scale != self._scale:
+            self._scale = scale
+            if self._texture is not None:
+                self.width = self._texture.width * scale
+                self.height = self._texture.height * scale
+
+    @property
+    def position(self):
+        return self.center_x, self.center_y
+
+    @position.setter
+    def position(self, position):
+        self.center_x, self.center_y = position
+
+    @property
+    def left(self):
+        return self.center_x - self.width / 2
+
+    @property
+    def right(self):
+        return self.center_x + self.width / 2
+
+    @property
+    def bottom(self):
+        return self.center_y - self.height / 2
+
+    @property
+    def top(self):
+        return self.center_y + self.height / 2
+
+    def collides_with_point(self, point):
+        """returns True if the point is on the sprite"""
+        x, y = point
+        return self.left <= x <= self.right and self.bottom <= y <= self.top
+
+
+class SpriteSolidColor(Sprite):
+    """ Rectangle of one color """
+
+    def __init__(self, width, height, color):
+        super().__init__(texture=Texture(f"Solid-{width}-{height}-{color}", width, height))
+        self.color = color
+
+
+class SpriteList(list):
+    """ List of sprites.  Drawing it does nothing """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+    def draw(self, **kwargs):
+        pass
+
+    def preload_textures(self, texture_list):
+        pass
+
+
+class Text:
+    """ Text drawn on the table.  Drawing it does nothing """
+
+    def __init__(self, text, start_x, start_y, color=(255, 255, 255), font_size=12, *args, **kwargs):
+        self.text = text
+        self.x = start_x
+        self.y = start_y
+        self.color = color
+        self.font_size = font_size
+
+    def draw(self):
+        pass
+
+
+class Window:
+    """ Window that is never shown """
+
+    def __init__(self, width=800, height=600, title="", *args, **kwargs):
+        self.width = width
+        self.height = height
+        self.title = title
+        self.closed = False
+
+    def clear(self, *args, **kwargs):
+        pass
+
+    def on_close(self):
+        self.closed = True
+
+
+def set_background_color(color):
+    pass
+
+
+def run():
+    """ There is no event loop: the window's handlers are called by whoever drives it """
+
+
+def get_sprites_at_point(point, sprite_list):
+    """returns the sprites of the list the point is on, in list order"""
+    return [sprite for sprite in sprite_list if sprite.collides_with_point(point)]
+
+
+def get_distance_between_sprites(sprite_1, sprite_2):
+    """returns the distance between the centers of two sprites"""
+    return math.hypot(sprite_1.center_x - sprite_2.center_x, sprite_1.center_y - sprite_2.center_y)
+
+
+def get_closest_sprite(sprite, sprite_list):
+    """returns the sprite of the list closest to sprite and its distance, or None for an empty list"""
+    if len(sprite_list) == 0:
+        return None
+    closest = min(sprite_list, key=lambda other: get_distance_between_sprites(sprite, other))
+    return closest, get_distance_between_sprites(sprite, closest)
+
+
+def check_for_collision(sprite_1, sprite_2):
+    """returns True if the rectangles of two sprites overlap"""
+    return (sprite_1.left < sprite_2.right and sprite_2.left < sprite_1.right and
+            sprite_1.bottom < sprite_2.top and sprite_2.bottom < sprite_1.top)
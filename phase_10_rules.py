@@ -0,0 +1,225 @@
+"""
+Phase 10 rules
+
+Checks for the sets, runs and colors that make up the phases.  Each check makes
+a single pass over the pile, never changes a card, and returns whether the pile
+is valid along with the value or color each wild card is used as.
+"""
+from phase_10_cards import CARD_VALUE, CARD_SUIT, WILD, SKIP
+
+# Highest value a run can reach (the number 12)
+TOP_VALUE = WILD - 1
+
+# Result of a check that failed
+INVALID = (False, {})
+
+# Kinds of groups a phase is made of
+SET = "set"
+RUN = "run"
+COLOR = "color"
+
+# The groups of cards that make up each phase, as (kind, number of cards).
+# For phases with two groups, the first goes on phase_pile and the second on phase_pile_b
+PHASE_GROUPS = {
+    1: ((SET, 3), (SET, 3)),
+    2: ((SET, 3), (RUN, 4)),
+    3: ((SET, 4), (RUN, 4)),
+    4: ((RUN, 7),),
+    5: ((RUN, 8),),
+    6: ((RUN, 9),),
+    7: ((SET, 4), (SET, 4)),
+    8: ((COLOR, 7),),
+    9: ((SET, 5), (SET, 2)),
+    10: ((SET, 5), (SET, 3)),
+}
+
+
+def check_set(amount, pile):
+    """check to see if the cards in pile make a set of at least amount cards with the same value.
+    returns (bool, dict of wild card -> the value it is used as)"""
+    if len(pile) < amount or len(pile) == 0:
+        return INVALID
+    wilds = []
+    set_value = None
+    for card in pile:
+        value = CARD_VALUE[card]
+        if value == WILD:
+            wilds.append(card)
+        elif value == SKIP or (set_value is not None and value != set_value):
+            return INVALID
+        else:
+            set_value = value
+    return True, {card: set_value for card in wilds}
+
+
+def check_color(amount, pile):
+    """check to see if the cards in pile are at least amount cards of the same color.
+    returns (bool, dict of wild card -> the color it is used as)"""
+    if len(pile) < amount or len(pile) == 0:
+        return INVALID
+    wilds = []
+    color = None
+    for card in pile:
+        value = CARD_VALUE[card]
+        if value == WILD:
+            wilds.append(card)
+        elif value == SKIP or (color is not None and CARD_SUIT[card] != color):
+            return INVALID
+        else:
+            color = CARD_SUIT[card]
+    return True, {card: color for card in wilds}
+
+
+def check_run(amount, pile):
+    """check to see if the cards in pile make a run of at least amount cards numbered in order.
+    Wild cards fill the gaps between the numbered cards first, then go on the top of the run,
+    and below it once the run reaches 12.
+    returns (bool, dict of wild card -> the value it is used as)"""
+    if len(pile) < amount or len(pile) == 0 or len(pile) > TOP_VALUE + 1:
+        return INVALID
+    wilds = []
+    # bit mask of the numbered values in the pile
+    values = 0
+    low = TOP_VALUE
+    high = 0
+    for card in pile:
+        value = CARD_VALUE[card]
+        if value == WILD:
+            wilds.append(card)
+        elif value == SKIP or values >> value & 1:
+            return INVALID
+        else:
+            values |= 1 << value
+            low = min(low, value)
+            high = max(high, value)
+    # a run of only wild cards starts at 1
+    if values == 0:
+        low = 0
+        high = -1
+    # the numbered cards have to fit in a run as long as the pile
+    elif high - low + 1 > len(pile):
+        return INVALID
+
+    assignment = {}
+    wild_cards = iter(wilds)
+    for value in range(low, high + 1):
+        if not values >> value & 1:
+            assignment[next(wild_cards)] = value
+    for card in wild_cards:
+        if high < TOP_VALUE:
+            high += 1
+            assignment[card] = high
+        else:
+            low -= 1
+            assignment[card] = low
+    return True, assignment
+
+
+# The check for each kind of group
+CHECKS = {SET: check_set, RUN: check_run, COLOR: check_color}
+
+def check_phase(phase, pile, pile_b=None):
+    """check to see if pile (and pile_b, for phases of two groups) make phase, with the groups
+    on the piles either way around.  returns bool"""
+    groups = PHASE_GROUPS.get(phase)
+    if groups is None or pile is None:
+        return False
+    if len(groups) == 1:
+        kind, amount = groups[0]
+        return CHECKS[kind](amount, pile)[0]
+    if pile_b is None:
+        return False
+    (kind_a, amount_a), (kind_b, amount_b) = groups
+    return (CHECKS[kind_a](amount_a, pile)[0] and CHECKS[kind_b](amount_b, pile_b)[0]) \
+        or (CHECKS[kind_a](amount_a, pile_b)[0] and CHECKS[kind_b](amount_b, pile)[0])
+
+
+class HitRule:
+    """ Which cards a completed phase pile accepts as a hit, so a hit can be checked without
+    re-checking the whole phase.  A set takes its value, a run takes any value it doesn't have yet
+    that keeps it short enough to be a run, and a color takes its color.  Wild cards fit anywhere
+    a card can still go, and skip cards never do. """
+    __slots__ = ("kind", "value", "values", "low", "high", "length")
+
+    def __init__(self, kind, pile):
+        self.kind = kind
+        # value of a set or color of a color group, None while the pile is only wild cards
+        self.value = None
+        # bit mask of the numbered values in a run, and the lowest and highest of them
+        self.values = 0
+        self.low = TOP_VALUE
+        self.high = 0
+        self.length = 0
+        for card in pile:
+            self.add(card)
+
+    def accepts(self, card):
+        """returns True if the pile is still valid with card added"""
+        value = CARD_VALUE[card]
+        if value == SKIP:
+            return False
+        if self.kind == RUN:
+            if self.length > TOP_VALUE:
+                return False
+            if value == WILD:
+                return True
+            if self.values >> value & 1:
+                return False
+            return self.values == 0 or max(self.high, value) - min(self.low, value) <= self.length
+        if value == WILD or self.value is None:
+            return True
+        if self.kind == SET:
+            return value == self.value
+        return CARD_SUIT[card] == self.value
+
+    def add(self, card):
+        """ Take an accepted card into the rule """
+        value = CARD_VALUE[card]
+        self.length += 1
+        if value == WILD:
+            return
+        if self.kind == RUN:
+            self.values |= 1 << value
+            self.low = min(self.low, value)
+            self.high = max(self.high, value)
+        elif self.kind == SET:
+            self.value = value
+        else:
+            self.value = CARD_SUIT[card]
+
+    def copy(self):
+        """returns a copy of the rule"""
+        rule = HitRule(self.kind, ())
+        rule.value = self.value
+        rule.values = self.values
+        rule.low = self.low
+        rule.high = self.high
+        rule.length = self.length
+        return rule
+
+
+def numbered_values(pile):
+    """returns the values of the numbered cards in pile"""
+    return [CARD_VALUE[card] for card in pile if CARD_VALUE[card] < WILD]
+
+
+def hit_rules(phase, pile, pile_b=None):
+    """returns a HitRule for pile and pile_b (None for a phase of one group), for a completed phase.
+    For a set and a run, which pile is which has to be settled for good: the set pile holds two cards
+    of one value, so it can never be a run, and the run pile two different values, so it can never be
+    a set.  Otherwise which cards fit depends on which way round the piles are taken, so there are no
+    rules (None, None) and hits have to be checked against the whole phase"""
+    groups = PHASE_GROUPS.get(phase)
+    if groups is None:
+        return None, None
+    if len(groups) == 1:
+        return HitRule(groups[0][0], pile), None
+    (kind_a, amount_a), (kind_b, amount_b) = groups
+    if kind_a == kind_b:
+        return HitRule(kind_a, pile), HitRule(kind_b, pile_b)
+    values, values_b = numbered_values(pile), numbered_values(pile_b)
+    if len(values) > len(set(values)) and len(set(values_b)) > 1:
+        return HitRule(SET, pile), HitRule(RUN, pile_b)
+    if len(values_b) > len(set(values_b)) and len(set(values)) > 1:
+        return HitRule(RUN, pile), HitRule(SET, pile_b)
+    return None, None
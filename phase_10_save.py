@@ -0,0 +1,131 @@
+"""
+Phase 10 saved games
+
+Saves the whole state of a Phase10Engine in a small binary format, and loads
+it back without dealing again.  A save holds, in order:
+
+    header   magic b"P10S", format version, seed of the game, round number,
+             game over flag, index of the winner (255 for none), number of players
+    players  for each player: name, hand pile, phase, score, and the
+             turn/skipped/draw_card/complete flags as bits of one byte
+    piles    for each of the 14 piles: its length, then its card ids, one byte each
+
+The rounds still to come are dealt from the seed, so there is no random
+number generator state to save.
+
+Loading checks the magic and version, so a file that isn't a save, or was
+written by a newer version, raises ValueError instead of loading as garbage.
+"""
+import struct
+
+from Phase_10_constants import PILE_COUNT
+from phase_10_engine import Phase10Engine
+from player_class import Player
+
+# First bytes of every save, and the version of the format written
+MAGIC = b"P10S"
+VERSION = 1
+
+# magic, version, seed, round number, game over, winner, number of players
+HEADER = struct.Struct("<4sBQHBBB")
+# name length, hand pile, phase, flags, score
+PLAYER = struct.Struct("<BBBBI")
+
+# Bits of the player flags byte
+TURN = 1
+SKIPPED = 2
+DRAW_CARD = 4
+COMPLETE = 8
+
+# Winner index of a game nobody has won yet
+NO_WINNER = 255
+
+
+def dumps(engine, seed=None, piles=None):
+    """returns the state of the engine as bytes.  seed and piles are written instead of the
+    engine's own if they are given, for a view of the game that hides some of it"""
+    players = engine.player_list
+    seed = engine.seed if seed is None else seed
+    winner = players.index(engine.winner) if engine.winner is not None else NO_WINNER
+    data = bytearray(HEADER.pack(MAGIC, VERSION, seed, engine.round_number, engine.game_over, winner, len(players)))
+    for player in players:
+        name = player.name.encode()
+        flags = (TURN * player.turn | SKIPPED * player.skipped | DRAW_CARD * player.draw_card
+                 | COMPLETE * player.complete)
+        data += PLAYER.pack(len(name), player.hand, player.phase, flags, player.score)
+        data += name
+    for pile in engine.piles if piles is None else piles:
+        data.append(len(pile))
+        data += bytes(pile)
+    return bytes(data)
+
+
+def loads(data, player_list=None, player_class=Player):
+    """returns a Phase10Engine with the state saved in data.  The state is put on the Players of
+    player_list if it is given, so the view keeps its own players, otherwise on new players
+    of player_class"""
+    if len(data) < HEADER.size:
+        raise ValueError("not a Phase 10 save")
+    magic, version, seed, round_number, game_over, winner, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Phase 10 save")
+    if version != VERSION:
+        raise ValueError(f"unsupported save version {version}")
+    if player_list is not None and len(player_list) != count:
+        raise ValueError(f"save has {count} players, not {len(player_list)}")
+
+    # read the whole save before touching any player, so a bad save changes nothing
+    try:
+        offset = HEADER.size
+        saved_players = []
+        for _ in range(count):
+            name_length, hand, phase, flags, score = PLAYER.unpack_from(data, offset)
+            offset += PLAYER.size
+            name = bytes(data[offset:offset + name_length]).decode()
+            offset += name_length
+            saved_players.append((name, hand, phase, flags, score))
+
+        piles = []
+        for _ in range(PILE_COUNT):
+            length = data[offset]
+            piles.append(list(data[offset + 1:offset + 1 + length]))
+            offset += 1 + length
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ValueError("save is cut short or damaged") from None
+
+    players = []
+    for i, (name, hand, phase, flags, score) in enumerate(saved_players):
+        player = player_list[i] if player_list is not None else player_class(name, hand)
+        player.name = name
+        player.hand = hand
+        player.phase = phase
+        player.score = score
+        player.turn = bool(flags & TURN)
+        player.skipped = bool(flags & SKIPPED)
+        player.draw_card = bool(flags & DRAW_CARD)
+        player.complete = bool(flags & COMPLETE)
+        players.append(player)
+
+    engine = Phase10Engine(players, seed)
+    engine.piles = piles
+    engine.index_piles()
+    engine.round_number = round_number
+    engine.game_over = bool(game_over)
+    engine.winner = players[winner] if winner != NO_WINNER else None
+    engine.assign_phase_piles()
+    for player in players:
+        if player.complete:
+            engine.set_complete(player)
+    return engine
+
+
+def save(engine, path):
+    """ Write the state of the engine to a file """
+    with open(path, "wb") as file:
+        file.write(dumps(engine))
+
+
+def load(path, player_list=None, player_class=Player):
+    """returns a Phase10Engine with the state saved in a file"""
+    with open(path, "rb") as file:
+        return loads(file.read(), player_list, player_class)
@@ -0,0 +1,383 @@
+"""
+Phase 10 tree search
+
+Information set Monte Carlo tree search (ISMCTS) for the computer players.  A
+player can't see the deck or the other hands, so every iteration of the search
+deals the cards it can't see at random ("determinizes" the game), walks down
+the tree of the player's own choices for the turn (draw from the deck or the
+discard pile, then which card to discard or who to skip), and plays the rest
+of the round out with Comp players.  Laying the phase and hitting are left to
+Comp.play_cards, since the solver already knows the best way to do those.
+
+The search is anytime: it runs until its wall-clock budget is spent and then
+returns the move with the most visits.  A SearchPool runs the search on
+several worker processes at once (root parallelization) and adds up their
+statistics, and hands back a pending search the arcade loop can poll instead
+of waiting on it.
+"""
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Phase_10_constants import DECK_FACE_DOWN_PILE, DISCARD_PILE
+from phase_10_cards import CARD_CODE, CARD_VALUE, CARD_POINTS, SKIP
+from phase_10_solver import cards_missing
+from player_class import Comp
+
+# Seconds a search may take by default
+SEARCH_BUDGET = 0.5
+
+# Exploration constant of the UCB formula
+EXPLORATION = 0.7
+
+# Most turns a rollout plays before the round is scored as it stands.  A short rollout keeps the
+# scores of the moves close to the choice being made, so fewer iterations tell them apart
+ROLLOUT_TURNS = 12
+
+# How much each card missing for the phase counts against a round that isn't over
+MISSING_WEIGHT = 0.25
+
+# How many standard errors better than Comp's move another move has to look to be chosen instead
+CONFIDENCE = 1.5
+
+# Points that count as much as finishing a phase
+POINTS_SCALE = 100
+
+# Kinds of moves the search chooses between
+DRAW = "draw"
+DISCARD = "discard"
+SKIP_PLAYER = "skip"
+
+
+class Node:
+    """ Statistics of one choice in the search tree, and the choices after it """
+    __slots__ = ("visits", "total", "squares", "available", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        # sum of the squared rewards, for the spread of the rewards
+        self.squares = 0.0
+        # how many times the choice could have been made
+        self.available = 0
+        self.children = {}
+
+
+def determinize(engine, n, rng):
+    """returns a copy of the engine where the cards player n can't see (the deck and the other hands)
+    are dealt again at random, with every player made a Comp to play the round out"""
+    state = engine.copy(Comp)
+    hidden = [index for index, player in enumerate(state.player_list) if index != n]
+    piles = [DECK_FACE_DOWN_PILE] + [state.player_list[index].hand for index in hidden]
+    cards = [card for pile_index in piles for card in state.piles[pile_index]]
+    rng.shuffle(cards)
+    start = 0
+    for pile_index in piles:
+        size = len(state.piles[pile_index])
+        state.piles[pile_index][:] = cards[start:start + size]
+        if pile_index != DECK_FACE_DOWN_PILE:
+            state.piles[pile_index].sort()
+        start += size
+    state.index_piles()
+    # and the rounds after this one are dealt from a new seed
+    state.seed = rng.getrandbits(64)
+    return state
+
+
+def draw_moves(engine):
+    """returns the piles the current player can draw from"""
+    discard = engine.piles[DISCARD_PILE]
+    if len(discard) > 0 and CARD_VALUE[discard[-1]] != SKIP:
+        return [(DRAW, DECK_FACE_DOWN_PILE), (DRAW, DISCARD_PILE)]
+    return [(DRAW, DECK_FACE_DOWN_PILE)]
+
+
+def end_moves(engine, n):
+    """returns the ways the current player can end their turn: discard any kind of card in their hand,
+    or skip another player"""
+    moves = []
+    has_skip = False
+    for card in engine.piles[engine.player_list[n].hand]:
+        if CARD_VALUE[card] == SKIP:
+            has_skip = True
+        move = (DISCARD, CARD_CODE[card])
+        if move not in moves:
+            moves.append(move)
+    if has_skip:
+        moves += [(SKIP_PLAYER, index) for index, player in enumerate(engine.player_list)
+                  if index != n and not player.skipped]
+    return moves
+
+
+def apply_move(engine, move):
+    """ Makes a move chosen by the search for the current player.  After drawing, the player lays
+    their phase and hits the way Comp would.  returns True if the move was made """
+    player = engine.player_list[engine.get_turn()]
+    kind, value = move
+    if kind == DRAW:
+        if not engine.draw(value):
+            return False
+        if isinstance(player, Comp):
+            player.play_cards(engine)
+        return True
+    hand = engine.piles[player.hand]
+    if kind == DISCARD:
+        for card in hand:
+            if CARD_CODE[card] == value:
+                return engine.discard(card)
+    elif kind == SKIP_PLAYER:
+        for card in hand:
+            if CARD_VALUE[card] == SKIP:
+                return engine.skip(card, value)
+    return False
+
+
+def player_value(engine, index, phase, score, round_number):
+    """returns how well a player did in the round: 1 for making their phase, less the points they scored.
+    A round that isn't over yet is scored by how close the player's hand is to the phase, counting each
+    card still missing against it.  The points in hand are left out there, since they only count if
+    someone else goes out, and counting them makes cheap cards look better than they are"""
+    player = engine.player_list[index]
+    if engine.game_over or engine.round_number != round_number:
+        return player.phase - phase - (player.score - score) / POINTS_SCALE
+    if player.complete:
+        return 1
+    return max(0.0, 1 - MISSING_WEIGHT * cards_missing(engine.piles[player.hand], player.phase))
+
+
+def reward(engine, n, phases, scores, round_number):
+    """returns how much better player n did in the round than the other players, on average"""
+    values = [player_value(engine, index, phases[index], scores[index], round_number)
+              for index in range(len(engine.player_list))]
+    others = values[:n] + values[n + 1:]
+    return values[n] - sum(others) / len(others)
+
+
+def select(node, moves, rng):
+    """returns the move to try from node, out of the moves that can be made in this deal"""
+    unvisited = []
+    best = None
+    best_score = None
+    for move in moves:
+        child = node.children.get(move)
+        if child is None:
+            child = node.children[move] = Node()
+        child.available += 1
+        if child.visits == 0:
+            unvisited.append(move)
+        elif len(unvisited) == 0:
+            score = child.total / child.visits + EXPLORATION * math.sqrt(math.log(child.available) / child.visits)
+            if best_score is None or score > best_score:
+                best, best_score = move, score
+    if len(unvisited) > 0:
+        return rng.choice(unvisited)
+    return best
+
+
+def iterate(root, engine, n, rng):
+    """ Runs one iteration of the search: deal the hidden cards, choose down the tree, play the round
+    out and score it. """
+    state = determinize(engine, n, rng)
+    player = state.player_list[n]
+    round_number = state.round_number
+    phases = [p.phase for p in state.player_list]
+    scores = [p.score for p in state.player_list]
+
+    def round_over():
+        return state.game_over or state.round_number != round_number
+
+    path = []
+    node = root
+    if player.draw_card:
+        move = select(node, draw_moves(state), rng)
+        path.append(node.children[move])
+        node = node.children[move]
+        apply_move(state, move)
+    if not round_over():
+        move = select(node, end_moves(state, n), rng)
+        path.append(node.children[move])
+        apply_move(state, move)
+
+    # play the round out
+    turns = 0
+    while not round_over() and turns < ROLLOUT_TURNS:
+        state.player_list[state.get_turn()].play_turn(state)
+        turns += 1
+
+    value = reward(state, n, phases, scores, round_number)
+    for child in path:
+        child.visits += 1
+        child.total += value
+        child.squares += value * value
+
+
+def run_search(engine, budget=SEARCH_BUDGET, seed=None, iterations=None):
+    """searches the current player's next choice for budget seconds and/or a number of iterations, whichever
+    runs out first.  Use budget=None to search for the number of iterations however long it takes.
+    returns a dict of move -> (visits, total reward, total squared reward) for the choices at the top of the tree"""
+    deadline = None if budget is None else time.perf_counter() + budget
+    rng = random.Random(seed)
+    n = engine.get_turn()
+    root = Node()
+    count = 0
+    while count == 0 or ((iterations is None or count < iterations)
+                         and (deadline is None or time.perf_counter() < deadline)):
+        iterate(root, engine, n, rng)
+        count += 1
+    return {move: (child.visits, child.total, child.squares) for move, child in root.children.items()}
+
+
+def merge_stats(results):
+    """adds up the statistics of several searches of the same choice"""
+    stats = {}
+    for result in results:
+        for move, move_stats in result.items():
+            old = stats.get(move, (0, 0.0, 0.0))
+            stats[move] = tuple(a + b for a, b in zip(old, move_stats))
+    return stats
+
+
+def mean_and_error(move_stats):
+    """returns the mean reward of a move and the standard error of that mean"""
+    visits, total, squares = move_stats
+    mean = total / visits
+    variance = max(0.0, squares / visits - mean * mean)
+    return mean, math.sqrt(variance / visits)
+
+
+def best_move(stats, default=None):
+    """returns the move with the most visits, or None.  If a default move is given (the move Comp would
+    make), another move is only chosen when its mean reward beats the default's by more than
+    CONFIDENCE standard errors"""
+    stats = {move: move_stats for move, move_stats in stats.items() if move_stats[0] > 0}
+    if len(stats) == 0:
+        return default
+    best = max(stats, key=lambda move: (stats[move][0], stats[move][1]))
+    if default is None or best == default or default not in stats:
+        return best
+    best_mean, best_error = mean_and_error(stats[best])
+    default_mean, default_error = mean_and_error(stats[default])
+    if best_mean - default_mean > CONFIDENCE * math.sqrt(best_error ** 2 + default_error ** 2):
+        return best
+    return default
+
+
+def default_move(engine):
+    """returns the move Comp would make for the current player"""
+    n = engine.get_turn()
+    player = engine.player_list[n]
+    if player.draw_card:
+        return DRAW, player.choose_draw(engine)
+    if any(CARD_VALUE[card] == SKIP for card in engine.piles[player.hand]):
+        index = player.choose_skip(engine, n)
+        if index is not None:
+            return SKIP_PLAYER, index
+    return DISCARD, CARD_CODE[player.choose_discard(engine)]
+
+
+def play_move(engine, move):
+    """ Makes a move found by the search for the current player, who must be a Comp, falling back
+    on Comp's own choice if the move can't be made. """
+    player = engine.player_list[engine.get_turn()]
+    if move is not None and apply_move(engine, move):
+        return
+    if player.draw_card:
+        engine.draw(player.choose_draw(engine))
+        player.play_cards(engine)
+    else:
+        player.end_turn(engine)
+
+
+def search_turn(engine, search):
+    """ Plays the current player's whole turn, choosing the draw and the discard with search(engine),
+    which returns a move. """
+    player = engine.player_list[engine.get_turn()]
+    round_number = engine.round_number
+    # a turn is a draw and then a discard or skip
+    for _ in range(2):
+        if engine.game_over or engine.round_number != round_number or engine.player_list[engine.get_turn()] is not player:
+            return
+        play_move(engine, search(engine))
+
+
+class PendingSearch:
+    """ A search running on the worker processes.  done() can be polled, and result()
+    waits for the search and returns the best move. """
+
+    def __init__(self, futures, default=None):
+        self.futures = futures
+        self.default = default
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def result(self):
+        return best_move(merge_stats(future.result() for future in self.futures), self.default)
+
+
+class SearchPool:
+    """ Worker processes that each run the search and send back their statistics.  The
+    processes are started once, so a search only pays for sending the game to them. """
+
+    def __init__(self, workers=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        # spawned rather than forked, so the workers don't share the window's graphics context
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self, engine, budget=SEARCH_BUDGET, seed=None):
+        """starts searching the current player's next choice, and returns a PendingSearch"""
+        rng = random.Random(seed)
+        # the workers get a copy, in case the game moves on while it is being sent
+        engine = engine.copy()
+        return PendingSearch([self.executor.submit(run_search, engine, budget, rng.getrandbits(64))
+                              for _ in range(self.workers)], default_move(engine))
+
+    def search(self, engine, budget=SEARCH_BUDGET, seed=None):
+        """searches the current player's next choice and returns the best move"""
+        return self.start(engine, budget, seed).result()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+class SearchPlayer(Comp):
+    """ Computer player that chooses its draw and its discard with a tree search.  With a
+    SearchPool the search runs on the pool's workers, otherwise in this process.  The window
+    gives a SearchPlayer without a pool its own, so it never waits on a search. """
+
+    def __init__(self, name, hand, phase=1, turn=False, score=0, budget=SEARCH_BUDGET, pool=None, seed=None):
+        super().__init__(name, hand, phase, turn, score)
+        self.budget = budget
+        self.pool = pool
+        self.rng = random.Random(seed)
+
+    def __getstate__(self):
+        # the pool stays behind when the game is sent to a worker
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
+
+    def start_move(self, engine):
+        """starts searching this player's next move, and returns something with done() and result()"""
+        if self.pool is not None:
+            return self.pool.start(engine, self.budget, self.rng.getrandbits(64))
+        return FinishedSearch(best_move(run_search(engine, self.budget, self.rng.getrandbits(64)), default_move(engine)))
+
+    def play_turn(self, engine):
+        """ Plays a whole turn, waiting for each search. """
+        search_turn(engine, lambda engine: self.start_move(engine).result())
+
+
+class FinishedSearch:
+    """ The result of a search that ran in this process """
+
+    def __init__(self, move):
+        self.move = move
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.move
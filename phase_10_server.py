@@ -0,0 +1,310 @@
+"""
+Phase 10 game server
+
+Hosts games of Phase 10 over TCP, speaking the protocol of phase_10_net.py.
+Every game is a table of four seats, played on a Phase10Engine the server
+holds: clients only send the moves they want to make, and the engine decides
+whether they are allowed.  After every move each seated client is sent its own
+view of the game, with its own hand and the public piles: a keyframe when a
+round is dealt, and after that the deltas of each move.
+
+A client joins a table by its id, and the game starts when all four seats are
+taken.  Anyone else can watch a table, at any time.  All the tables are played
+on one asyncio event loop, and a table ends when its game is over or anyone
+playing at it leaves.
+
+    $ python phase_10.py serve --port 8765
+    $ python phase_10.py client --port 8765 --table 1 --human     # and three more clients
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from phase_10_engine import Phase10Engine, create_players
+from phase_10_deck import round_seed
+from phase_10_log import apply_event
+from phase_10_net import JOIN, SEATED, MOVE, VIEW, DELTA, REJECT, ERROR, JOIN_BODY, ANY_SEAT, WATCH, MOVED, FLIPPED, \
+    FLAGS, PHASE, SCORE, WINNER, frame, read_frame, read_move, view_body, delta_body, player_flags
+from Phase_10_constants import SKIP_EVENT
+
+# Address the server listens on by default
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Moves between the keyframes kept for people who start watching a game part way through
+KEYFRAME_INTERVAL = 32
+
+# Bytes waiting to be sent to a client before it is dropped for not keeping up.  Only the client
+# making a move is waited on, so without a limit a stalled one would hold everything it is sent
+WRITE_BUFFER_LIMIT = 1 << 18
+
+
+class TableEngine(Phase10Engine):
+    """ Engine that keeps the deltas of the cards moved on it, until they are sent """
+
+    def __init__(self, player_list=None, seed=None):
+        super().__init__(player_list, seed)
+        self.deltas = []
+
+    def move_card(self, card, pile_index):
+        self.deltas.append((MOVED, card, self.card_piles[card], pile_index))
+        super().move_card(card, pile_index)
+
+    def reshuffle(self):
+        start = len(self.deltas)
+        if not super().reshuffle():
+            return False
+        # the flip comes before the move of the new top card to the discard pile
+        self.deltas.insert(start, (FLIPPED, 0, 0, 0))
+        return True
+
+
+class Table:
+    """ One game, and the connections of the clients in its seats """
+
+    def __init__(self, table_id, seed=None):
+        self.table_id = table_id
+        self.engine = TableEngine(create_players(), seed)
+        # StreamWriter of the client in each seat, or None, and of everyone watching
+        self.writers = [None] * len(self.engine.player_list)
+        self.watchers = []
+        self.started = False
+        # number of moves made, and the round and the flags, phase and score of each player
+        # the clients were last sent
+        self.version = 0
+        self.round_number = 0
+        self.players = []
+        # VIEW frame for people who start watching, and the DELTA frames sent since it
+        self.keyframe = None
+        self.since = []
+
+    def sit(self, writer, seat=ANY_SEAT):
+        """returns the seat given to the client, or None if the seat (or every seat) is taken"""
+        if self.started:
+            return None
+        if seat == ANY_SEAT:
+            seat = self.writers.index(None) if None in self.writers else None
+        if seat is None or seat >= len(self.writers) or self.writers[seat] is not None:
+            return None
+        self.writers[seat] = writer
+        return seat
+
+    def full(self):
+        """returns True if every seat is taken"""
+        return None not in self.writers
+
+    def start(self):
+        """ Deal the first round and show everyone the table """
+        self.started = True
+        self.engine.setup()
+        self.send_views()
+
+    def watch(self, writer):
+        """ Add someone watching, and catch them up with the game so far """
+        self.watchers.append(writer)
+        if self.keyframe is not None:
+            self.send(writer, self.keyframe)
+            for delta_frame in self.since:
+                self.send(writer, delta_frame)
+
+    def send(self, writer, data):
+        """ Write a frame to a client, or drop the client if it has too much waiting to be sent.  A player
+        dropped this way leaves the table, which ends the game """
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            if writer in self.watchers:
+                self.watchers.remove(writer)
+            writer.close()
+            return
+        writer.write(data)
+
+    def move(self, seat, event):
+        """ Make a move for the player in seat.  returns True if the move was made """
+        engine = self.engine
+        if not self.started or engine.game_over or seat != engine.get_turn():
+            return False
+        event = event._replace(player=seat)
+        if event.kind == SKIP_EVENT and engine.get_player_for_hand(event.pile) is None:
+            return False
+        return apply_event(engine, event)
+
+    def send_views(self):
+        """ Send each client its view of the game, as a keyframe """
+        engine = self.engine
+        engine.deltas.clear()
+        self.round_number = engine.round_number
+        self.players = [(player_flags(player), player.phase, player.score) for player in engine.player_list]
+        for seat, writer in enumerate(self.writers):
+            if writer is not None:
+                self.send(writer, frame(VIEW, view_body(engine, self.version, seat)))
+        self.keyframe = frame(VIEW, view_body(engine, self.version, WATCH))
+        self.since = []
+        for writer in self.watchers[:]:
+            self.send(writer, self.keyframe)
+
+    def player_deltas(self):
+        """returns the deltas of the flags, phases and scores of the players that changed since they were last sent"""
+        deltas = []
+        for index, player in enumerate(self.engine.player_list):
+            flags, phase, score = state = (player_flags(player), player.phase, player.score)
+            old_flags, old_phase, old_score = self.players[index]
+            if flags != old_flags:
+                deltas.append((FLAGS, index, flags, 0))
+            if phase != old_phase:
+                deltas.append((PHASE, index, phase, 0))
+            if score != old_score:
+                score = min(score, 0xFFFF)
+                deltas.append((SCORE, index, score & 0xFF, score >> 8))
+            self.players[index] = state
+        return deltas
+
+    def send_deltas(self):
+        """ Send each client what the last move changed.  A move that dealt a new round is sent as keyframes """
+        self.version += 1
+        engine = self.engine
+        if engine.round_number != self.round_number:
+            self.send_views()
+            return
+        deltas = engine.deltas + self.player_deltas()
+        engine.deltas.clear()
+        if engine.game_over:
+            deltas.append((WINNER, engine.player_list.index(engine.winner), 0, 0))
+        for seat, writer in enumerate(self.writers):
+            if writer is not None:
+                self.send(writer, frame(DELTA, delta_body(engine, self.version, deltas, seat)))
+        # everyone watching sees the same, so it is only made once
+        delta_frame = frame(DELTA, delta_body(engine, self.version, deltas, WATCH))
+        for writer in self.watchers[:]:
+            self.send(writer, delta_frame)
+        self.since.append(delta_frame)
+        if len(self.since) >= KEYFRAME_INTERVAL:
+            self.keyframe = frame(VIEW, view_body(engine, self.version, WATCH))
+            self.since = []
+
+
+class GameServer:
+    """ Plays the games of many tables, on one event loop """
+
+    def __init__(self, seed=None):
+        # tables being played, by id
+        self.tables = {}
+        # the seed of table i is round_seed(seed, i), or new for every table without one
+        self.seed = seed
+        self.moves = 0
+        self.games = 0
+
+    def table(self, table_id):
+        """returns the table with the id, set up if it's new"""
+        if table_id not in self.tables:
+            seed = round_seed(self.seed, table_id) if self.seed is not None else None
+            self.tables[table_id] = Table(table_id, seed)
+        return self.tables[table_id]
+
+    async def handle(self, reader, writer):
+        """ Serve one client: seat it at the table it asks for, then make its moves until it leaves """
+        table = None
+        seat = None
+        try:
+            kind, body = await read_frame(reader)
+            if kind != JOIN or len(body) != JOIN_BODY.size:
+                writer.write(frame(ERROR, b"expected join"))
+                return
+            table_id, wanted = JOIN_BODY.unpack(body)
+            table = self.table(table_id)
+            if wanted == WATCH:
+                watched, table = table, None
+                await self.watch(watched, reader, writer)
+                return
+            seat = table.sit(writer, wanted)
+            if seat is None:
+                table = None
+                writer.write(frame(ERROR, b"seat taken"))
+                return
+            writer.write(frame(SEATED, JOIN_BODY.pack(table_id, seat)))
+            if table.full():
+                table.start()
+
+            while True:
+                kind, body = await read_frame(reader)
+                event = read_move(body) if kind == MOVE else None
+                if event is None:
+                    writer.write(frame(ERROR, b"expected move"))
+                    return
+                if table.move(seat, event):
+                    self.moves += 1
+                    table.send_deltas()
+                    if table.engine.game_over:
+                        self.games += 1
+                        self.close_table(table)
+                        table = None
+                        return
+                else:
+                    writer.write(frame(REJECT, body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if table is not None:
+                table.writers[seat] = None
+                if table.started:
+                    # the game can't go on without the player
+                    self.close_table(table, b"player left")
+                elif not any(table.writers) and not table.watchers:
+                    self.close_table(table)
+            writer.close()
+
+    async def watch(self, table, reader, writer):
+        """ Send someone watching the table the game until they leave.  Moves they send are turned down """
+        writer.write(frame(SEATED, JOIN_BODY.pack(table.table_id, WATCH)))
+        table.watch(writer)
+        try:
+            while True:
+                kind, body = await read_frame(reader)
+                writer.write(frame(REJECT, body))
+                await writer.drain()
+        finally:
+            if writer in table.watchers:
+                table.watchers.remove(writer)
+            if not table.started and not any(table.writers) and not table.watchers:
+                self.close_table(table)
+
+    def close_table(self, table, reason=None):
+        """ End a table's game, closing the connections of the clients still at it """
+        if self.tables.get(table.table_id) is table:
+            del self.tables[table.table_id]
+        for writer in [writer for writer in table.writers if writer is not None] + table.watchers:
+            if reason is not None:
+                writer.write(frame(ERROR, reason))
+            writer.close()
+        table.writers = [None] * len(table.writers)
+        table.watchers = []
+
+    async def serve(self, host=HOST, port=PORT):
+        """ Listen for clients until cancelled """
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    """ Command line entry point: serves games until interrupted """
+    parser = argparse.ArgumentParser(prog="phase_10.py serve", description="Host Phase 10 games over TCP.")
+    parser.add_argument("--host", default=HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="port to listen on")
+    parser.add_argument("--seed", type=int, default=None, help="deal table i from the seed and i (default: random)")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.seed)
+    start = time.perf_counter()
+    print(f"serving on {args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print(f"{server.games} games, {server.moves} moves in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
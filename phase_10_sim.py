@@ -0,0 +1,249 @@
+"""
+Phase 10 self-play
+
+Plays whole games between computer players without a window, for tuning the
+bots and house rules.  Each seat is played by a policy: a function that takes
+the engine and plays the current player's turn through the engine's moves.
+Games are spread over a pool of processes, and each game is seeded on its own,
+so a run gives the same results however many workers play it.
+
+    $ python phase_10.py simulate --games 1000 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Phase_10_constants import DECK_FACE_DOWN_PILE
+from phase_10_engine import Phase10Engine, SEATS
+from phase_10_cards import CARD_VALUE, CARD_POINTS, WILD, SKIP
+from phase_10_solver import solve_phase, cards_missing
+from player_class import Comp
+from phase_10_cache import cache_stats
+from phase_10_log import EventLog
+from phase_10_search import run_search, best_move, default_move, search_turn
+
+# Most turns a game may take before it is given up on
+MAX_TURNS = 5000
+
+# Iterations of the tree search for each choice of the 'ismcts' policy
+SEARCH_ITERATIONS = 200
+
+# Number of games each worker plays before sending its results back
+CHUNK_SIZE = 4
+
+
+def round_changed(engine, round_number):
+    """returns True if the round the turn started in is over"""
+    return engine.game_over or engine.round_number != round_number
+
+
+def lay_phase(engine, player, round_number):
+    """lays the player's phase from their hand, if they can make it.  returns True if it was laid"""
+    solved = solve_phase(engine.piles[player.hand], player.phase)
+    if solved is None:
+        return False
+    for pile_index, cards in zip(player.phase_pile_indexes(), solved[0]):
+        for card in cards:
+            engine.lay(card, pile_index)
+            if round_changed(engine, round_number):
+                return True
+    # mark the phase complete so the player can hit on their own piles
+    engine.check_phase_piles()
+    return True
+
+
+def hit_cards(engine, player, round_number):
+    """plays every card from the player's hand that fits on a completed phase pile"""
+    hit = True
+    while hit and player.complete:
+        hit = False
+        for card in engine.piles[player.hand][:]:
+            if CARD_VALUE[card] == SKIP:
+                continue
+            for pile_index in engine.hit_piles():
+                if engine.hit(card, pile_index):
+                    hit = True
+                    break
+            if round_changed(engine, round_number):
+                return
+
+
+def discard_card(engine, n, player):
+    """throws a skip at the next player, or discards the least useful card"""
+    hand = engine.piles[player.hand]
+    for card in hand:
+        if CARD_VALUE[card] == SKIP:
+            index = (n + 1) % len(engine.player_list)
+            if engine.skip(card, index):
+                return
+    # throw away the card the phase needs least, and the highest of those.  Wild cards are kept
+    if player.complete:
+        missing = {card: 0 for card in hand}
+    else:
+        missing = {card: cards_missing(hand[:i] + hand[i + 1:], player.phase) for i, card in enumerate(hand)}
+    card = min(hand, key=lambda card: (CARD_VALUE[card] == WILD, missing[card], -CARD_POINTS[card]))
+    engine.discard(card)
+
+
+def basic_policy(engine):
+    """draws from the deck, lays the phase as soon as it can, hits whatever fits and discards"""
+    n = engine.get_turn()
+    player = engine.player_list[n]
+    round_number = engine.round_number
+    engine.draw(DECK_FACE_DOWN_PILE)
+    if not player.complete and lay_phase(engine, player, round_number) and round_changed(engine, round_number):
+        return
+    hit_cards(engine, player, round_number)
+    if round_changed(engine, round_number):
+        return
+    discard_card(engine, n, player)
+
+
+def comp_policy(engine):
+    """plays the turn with the Comp computer player's choices"""
+    engine.player_list[engine.get_turn()].play_turn(engine)
+
+
+def search_policy(engine):
+    """plays the turn with a tree search of SEARCH_ITERATIONS iterations, in this process.  The search is
+    seeded from the game, so the same seed plays the same game"""
+    hand = engine.piles[engine.player_list[engine.get_turn()].hand]
+    seed = hash((engine.round_number, len(engine.piles[DECK_FACE_DOWN_PILE]), tuple(hand)))
+    search_turn(engine, lambda engine: best_move(run_search(engine, budget=None, seed=seed, iterations=SEARCH_ITERATIONS),
+                                                 default_move(engine)))
+
+
+# Policies by name, so they can be chosen on the command line and sent to worker processes
+POLICIES = {
+    "basic": basic_policy,
+    "comp": comp_policy,
+    "ismcts": search_policy,
+}
+
+
+def get_policy(policy):
+    """returns the policy function for a policy name, or the policy itself"""
+    if callable(policy):
+        return policy
+    return POLICIES[policy]
+
+
+def play_game(seed, policies, max_turns=MAX_TURNS, log_dir=None):
+    """plays one game, with policies[i] playing seat i.  returns a dict with the results.
+    With a log_dir, the game's events are logged to game_<seed>.log in it"""
+    start = time.perf_counter()
+    cache_start = cache_stats()
+    # every seat is a Comp, so any policy can use the Comp choices
+    players = [Comp(name, hand) for name, hand in SEATS]
+    players[0].turn = True
+    engine = Phase10Engine(players, seed=seed)
+    engine.setup()
+    policies = [get_policy(policy) for policy in policies]
+    if log_dir is not None:
+        engine.log = EventLog(open(os.path.join(log_dir, f"game_{seed}.log"), "wb"), engine)
+
+    # rounds each player spent on each phase they finished
+    phase_rounds = {player.name: [] for player in engine.player_list}
+    phase_start = {player.name: 1 for player in engine.player_list}
+    phases = {player.name: player.phase for player in engine.player_list}
+
+    turns = 0
+    while not engine.game_over and turns < max_turns:
+        round_number = engine.round_number
+        policies[engine.get_turn()](engine)
+        turns += 1
+        if round_changed(engine, round_number):
+            for player in engine.player_list:
+                if player.phase > phases[player.name]:
+                    phase_rounds[player.name].append(round_number - phase_start[player.name] + 1)
+                    phase_start[player.name] = round_number + 1
+                    phases[player.name] = player.phase
+    if engine.log is not None:
+        engine.log.close()
+
+    return {
+        "seed": seed,
+        "finished": engine.game_over,
+        "winner": engine.winner.name if engine.winner is not None else None,
+        "rounds": engine.round_number,
+        "turns": turns,
+        "scores": {player.name: player.score for player in engine.player_list},
+        "phases": {player.name: player.phase for player in engine.player_list},
+        "phase_rounds": phase_rounds,
+        # lookups of each evaluation cache during the game, as [hits, misses]
+        "cache": {name: [stats["hits"] - cache_start[name]["hits"], stats["misses"] - cache_start[name]["misses"]]
+                  for name, stats in cache_stats().items()},
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def play_games(seeds, policies, max_turns=MAX_TURNS, log_dir=None):
+    """plays one game for each seed.  returns a list of results"""
+    return [play_game(seed, policies, max_turns, log_dir) for seed in seeds]
+
+
+def run_games(games, policies, seed=0, workers=None, max_turns=MAX_TURNS, chunk_size=CHUNK_SIZE, log_dir=None):
+    """plays games games over a pool of worker processes, with game i seeded seed + i.
+    yields each result as soon as it is done, so not in seed order.
+    workers=1 plays every game in this process"""
+    seeds = list(range(seed, seed + games))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, games, chunk_size)]
+    if workers == 1:
+        for chunk in chunks:
+            yield from play_games(chunk, policies, max_turns, log_dir)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, chunk, policies, max_turns, log_dir) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def main(argv=None):
+    """ Command line entry point: plays the games and prints one JSON line per game """
+    parser = argparse.ArgumentParser(prog="phase_10.py simulate", description="Play Phase 10 games between computer players.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        help="policy for each seat, in turn order; give once for all seats (default: comp)")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="turns before a game is given up on")
+    parser.add_argument("--log-dir", help="directory to write an event log of each game to")
+    args = parser.parse_args(argv)
+
+    policies = args.policy or ["comp"]
+    if len(policies) == 1:
+        policies = policies * 4
+    if len(policies) != 4:
+        parser.error("give --policy once, or once for each of the 4 seats")
+
+    start = time.perf_counter()
+    wins = {}
+    rounds = 0
+    finished = 0
+    lookups = {}
+    if args.log_dir is not None:
+        os.makedirs(args.log_dir, exist_ok=True)
+    for result in run_games(args.games, policies, args.seed, args.workers, args.max_turns, log_dir=args.log_dir):
+        print(json.dumps(result), flush=True)
+        for name, (hits, misses) in result["cache"].items():
+            total = lookups.setdefault(name, [0, 0])
+            total[0] += hits
+            total[1] += misses
+        if result["finished"]:
+            finished += 1
+            rounds += result["rounds"]
+            wins[result["winner"]] = wins.get(result["winner"], 0) + 1
+    seconds = time.perf_counter() - start
+
+    print(f"{args.games} games, {finished} finished, {rounds / max(finished, 1):.1f} rounds each, "
+          f"{args.games / seconds:.1f} games/s", file=sys.stderr)
+    print("wins: " + ", ".join(f"{name} {count}" for name, count in sorted(wins.items())), file=sys.stderr)
+    print("cache hit rates: " + ", ".join(f"{name} {hits / max(hits + misses, 1):.1%}"
+                                          for name, (hits, misses) in lookups.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Phase 10 phase solver
+
+Finds the best way to lay down a phase from the cards in a hand.  Best means
+using the fewest wild cards, and then laying down the most points, so the
+fewest points are left in the hand.
+
+Card identity doesn't matter for sets and runs, so the search runs over the
+count of each numbered value in the hand plus the number of wild cards, and is
+memoized on those counts in an EvalCache, so hands of the same shape share one
+search.  The plan it finds is then filled in with the hand's
+actual cards.
+"""
+from itertools import repeat
+
+from phase_10_cards import CARD_VALUE, CARD_SUIT, WILD, SKIP, BLACK
+from phase_10_rules import SET, RUN, COLOR, PHASE_GROUPS
+from phase_10_cache import cached
+
+# Points of a numbered card by value, and of a wild card
+VALUE_POINTS = tuple(5 if value < 9 else 10 for value in range(WILD))
+WILD_POINTS = 25
+
+# How many different hands the solver remembers
+SOLVER_CACHE_SIZE = 1 << 16
+
+
+def group_options(kind, amount, counts, wilds):
+    """yields every way to make one set or run from the value counts and wild cards, as
+    (plan, counts left, wilds used, points laid).  A set's plan is (SET, value, numbered cards, wilds)
+    and a run's plan is (RUN, low value, high value, wilds)"""
+    if kind == SET:
+        for value in range(WILD):
+            for used in range(1, counts[value] + 1):
+                need = max(0, amount - used)
+                if need <= wilds:
+                    left = counts[:value] + (counts[value] - used,) + counts[value + 1:]
+                    yield (SET, value, used, need), left, need, used * VALUE_POINTS[value] + need * WILD_POINTS
+        # a set of only wild cards
+        if amount <= wilds:
+            yield (SET, None, 0, amount), counts, amount, amount * WILD_POINTS
+    elif kind == RUN:
+        for low in range(WILD - amount + 1):
+            left = list(counts)
+            points = 0
+            need = 0
+            for high in range(low, WILD):
+                if counts[high] > 0:
+                    left[high] -= 1
+                    points += VALUE_POINTS[high]
+                else:
+                    need += 1
+                if need > wilds:
+                    break
+                if high - low + 1 >= amount:
+                    yield (RUN, low, high, need), tuple(left), need, points + need * WILD_POINTS
+
+
+@cached("solve_counts", SOLVER_CACHE_SIZE)
+def solve_counts(groups, counts, wilds):
+    """finds the best plan for making the groups of a phase from the value counts of a hand
+    and its number of wild cards.  returns (wilds used, -points laid, plans) or None"""
+    if len(groups) == 0:
+        return 0, 0, ()
+    kind, amount = groups[0]
+    best = None
+    for plan, left, need, points in group_options(kind, amount, counts, wilds):
+        rest = solve_counts(groups[1:], left, wilds - need)
+        if rest is None:
+            continue
+        result = (need + rest[0], rest[1] - points, (plan,) + rest[2])
+        if best is None or result[:2] < best[:2]:
+            best = result
+    return best
+
+
+def solve_color(amount, hand):
+    """finds the best color to lay down amount cards of.  returns (wilds used, -points laid, suit) or None"""
+    wilds = sum(1 for card in hand if CARD_VALUE[card] == WILD)
+    best = None
+    for suit in range(BLACK):
+        cards = [card for card in hand if CARD_SUIT[card] == suit]
+        need = max(0, amount - len(cards))
+        if need > wilds:
+            continue
+        result = (need, -sum(VALUE_POINTS[CARD_VALUE[card]] for card in cards) - need * WILD_POINTS, suit)
+        if best is None or result[:2] < best[:2]:
+            best = result
+    return best
+
+
+def solve_phase(hand, phase):
+    """finds the best way to lay down phase from the cards in hand.
+    returns (list with the cards for each phase pile, wilds used, points laid), or None if the
+    hand can't make the phase"""
+    groups = PHASE_GROUPS.get(phase)
+    if groups is None:
+        return None
+    # cards of each value in the hand, and the wild cards
+    by_value = [[] for _ in range(WILD)]
+    wild_cards = []
+    for card in hand:
+        value = CARD_VALUE[card]
+        if value == WILD:
+            wild_cards.append(card)
+        elif value != SKIP:
+            by_value[value].append(card)
+
+    if groups[0][0] == COLOR:
+        result = solve_color(groups[0][1], hand)
+        if result is None:
+            return None
+        need, points, suit = result
+        pile = [card for card in hand if CARD_SUIT[card] == suit] + wild_cards[:need]
+        return [sorted(pile)], need, -points
+
+    result = solve_counts(groups, tuple(len(cards) for cards in by_value), len(wild_cards))
+    if result is None:
+        return None
+    need, points, plans = result
+    piles = []
+    for plan in plans:
+        if plan[0] == SET:
+            kind, value, used, wilds = plan
+            pile = [by_value[value].pop() for _ in range(used)] if value is not None else []
+        else:
+            kind, low, high, wilds = plan
+            pile = [by_value[value].pop() for value in range(low, high + 1) if len(by_value[value]) > 0]
+        pile += [wild_cards.pop() for _ in range(wilds)]
+        piles.append(sorted(pile))
+    return piles, need, -points
+
+
+def hand_counts(hand):
+    """returns (count of each numbered value, number of wild cards, count of each color) of a hand, as used
+    by counts_missing.  The counts are tuples, so a hand can be changed one card at a time by rebuilding one entry"""
+    counts = [0] * WILD
+    suits = [0] * BLACK
+    wilds = 0
+    for card in hand:
+        value = CARD_VALUE[card]
+        if value == WILD:
+            wilds += 1
+        elif value != SKIP:
+            counts[value] += 1
+            suits[CARD_SUIT[card]] += 1
+    return tuple(counts), wilds, tuple(suits)
+
+
+@cached("counts_deficit", SOLVER_CACHE_SIZE)
+def counts_deficit(groups, counts):
+    """returns how many wild cards a hand with the value counts would need to make the groups of a
+    set or run phase, the same way phase_10_batch works it out for many hands at once.
+    counts can be cut down to its deficit_signature"""
+    kinds = tuple(kind for kind, amount in groups)
+    amounts = [amount for kind, amount in groups]
+    if kinds == (SET, SET):
+        top = sorted(counts, reverse=True)
+        big, small = max(amounts), min(amounts)
+        different = max(0, big - top[0]) + max(0, small - top[1])
+        return min(different, max(0, big + small - top[0]))
+    run_amount = amounts[-1]
+    present = tuple(1 if count > 0 else 0 for count in counts)
+    # the run takes one card of each of its values, the set gets the rest
+    left = tuple(count - present[value] for value, count in enumerate(counts))
+    best = None
+    for low in range(WILD - run_amount + 1):
+        high = low + run_amount
+        short = run_amount - sum(present[low:high])
+        if kinds == (SET, RUN):
+            short += max(0, amounts[0] - max(counts[:low] + left[low:high] + counts[high:]))
+        if best is None or short < best:
+            best = short
+    return best
+
+
+def deficit_signature(groups, counts):
+    """returns the part of the value counts that counts_deficit depends on, so hands of the same shape
+    share a cache entry: the two biggest counts for two sets, which values are there for a run,
+    and the counts up to one more than the set needs for a set and a run"""
+    kinds = tuple(kind for kind, amount in groups)
+    if kinds == (SET, SET):
+        return tuple(sorted(counts)[-2:])
+    if kinds == (RUN,):
+        return tuple(map(bool, counts))
+    return tuple(map(min, counts, repeat(groups[0][1] + 1)))
+
+
+def counts_missing(phase, counts, wilds, suits):
+    """returns the fewest cards a hand with the given counts is missing to make phase, 0 if it can make it now.
+    Each missing card is counted as a wild card the hand would need"""
+    groups = PHASE_GROUPS.get(phase)
+    if groups is None:
+        return 0
+    if groups[0][0] == COLOR:
+        return max(0, groups[0][1] - max(suits) - wilds)
+    return max(0, counts_deficit(groups, deficit_signature(groups, counts)) - wilds)
+
+
+def cards_missing(hand, phase):
+    """returns the fewest cards the hand is missing to make phase, 0 if it can make it now"""
+    return counts_missing(phase, *hand_counts(hand))
@@ -0,0 +1,104 @@
+"""
+Phase 10 handler timing
+
+Opt-in timing of the window's event handlers and the engine's round_over.
+Timing works by replacing the methods on the instances with timed wrappers,
+so with it off nothing is wrapped and the handlers cost exactly what they did.
+
+Each handler keeps its last RING_SIZE timings in a ring buffer, from which the
+p50/p95/max are worked out when they are shown or dumped.  Turn it on with the
+PHASE10_TIMING environment variable:
+
+    $ PHASE10_TIMING=1 python phase_10.py     # press T to show the timings
+"""
+import functools
+import json
+import os
+import time
+from array import array
+
+# Environment variable that turns timing on
+TIMING_ENV = "PHASE10_TIMING"
+
+# File the timings are written to when the window closes
+TIMING_FILE = "phase_10_timing.json"
+
+# Number of timings kept for each handler
+RING_SIZE = 1024
+
+
+def timing_enabled():
+    """returns True if timing was turned on in the environment"""
+    return bool(os.environ.get(TIMING_ENV))
+
+
+class HandlerTimes:
+    """ Ring buffer of the last timings of one handler """
+
+    def __init__(self, size=RING_SIZE):
+        self.times = array("d", bytes(8 * size))
+        self.size = size
+        # where the next timing goes, and how many timings there have been
+        self.index = 0
+        self.count = 0
+
+    def add(self, seconds):
+        """ Add a timing, overwriting the oldest once the buffer is full """
+        self.times[self.index] = seconds
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+
+    def stats(self):
+        """returns a dict of the p50, p95 and max of the timings in the buffer in seconds, and how many
+        timings there have been in all"""
+        times = sorted(self.times[:min(self.count, self.size)])
+        if not times:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {"count": self.count, "p50": times[(len(times) - 1) // 2],
+                "p95": times[(len(times) - 1) * 95 // 100], "max": times[-1]}
+
+
+def timed(function, times):
+    """returns function wrapped to add the seconds each call takes to times"""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            times.add(perf_counter() - start)
+    return wrapper
+
+
+class Timing:
+    """ Timings of the handlers of some objects, by handler name """
+
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.handlers = {}
+
+    def instrument(self, instance, names):
+        """ Time the methods of the instance with the given names.  Instrumenting another instance
+        with the same names, like the engine of a loaded game, carries on with the same timings """
+        for name in names:
+            times = self.handlers.setdefault(name, HandlerTimes(self.size))
+            setattr(instance, name, timed(getattr(type(instance), name).__get__(instance), times))
+
+    def stats(self):
+        """returns a dict of the stats of every handler, by name"""
+        return {name: times.stats() for name, times in self.handlers.items()}
+
+    def report(self):
+        """returns the stats as lines of text, in milliseconds"""
+        lines = ["handler             p50     p95     max ms"]
+        for name, stats in self.stats().items():
+            lines.append(f"{name:16} {stats['p50'] * 1000:7.2f} {stats['p95'] * 1000:7.2f} {stats['max'] * 1000:7.2f}"
+                         f"  ({stats['count']})")
+        return lines
+
+    def dump(self, path=TIMING_FILE):
+        """ Write the stats to a JSON file """
+        with open(path, "w") as file:
+            json.dump(self.stats(), file, indent=2)
@@ -0,0 +1,279 @@
+"""
+Phase 10 tournaments
+
+Compares computer players (the policies of phase_10_sim.py) by playing them
+against each other and rating them on an Elo scale.
+
+Bots meet in pairs.  A match is one deal played twice: once with the first
+bot in seats 1 and 3 and the other in seats 2 and 4, and once the other way
+round, so both bots get the same cards and the same seats and the luck of the
+deal cancels out.  A match scores 1 for a bot that wins both games, 0.5 for a
+split and 0 for losing both.
+
+Instead of a fixed number of matches, a pairing is stopped as soon as a
+sequential probability ratio test decides it: whether the first bot is
+stronger (+MARGIN Elo) or weaker (-MARGIN Elo) than the other, with error
+rates ALPHA and BETA.  Bots less than MARGIN apart may be decided either way.
+Pairings that are too close to call stop at
+--max-matches.  Matches are played in batches of BATCH_SIZE in seed order, so
+the same seed gives the same result however many workers play it.
+
+    $ python phase_10.py tournament --bot comp --bot basic --bot ismcts --workers 8
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from phase_10_engine import SEATS
+from phase_10_sim import POLICIES, MAX_TURNS, play_game
+
+# Elo difference the sequential test tells apart, and its error rates
+MARGIN = 30
+ALPHA = 0.05
+BETA = 0.05
+
+# Most matches played for a pairing the test can't decide
+MAX_MATCHES = 400
+
+# Matches played between looks at the test
+BATCH_SIZE = 8
+
+# z of the confidence intervals of the ratings (95%)
+Z = 1.96
+
+# How close to 0 or 1 a score is taken to be when turned into Elo
+SCORE_LIMIT = 0.001
+
+# Player names of the seats, in turn order
+SEAT_NAMES = [name for name, hand in SEATS]
+
+
+def expected_score(elo):
+    """returns the expected score of a bot rated elo above its opponent"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_elo(score):
+    """returns the Elo difference that gives an expected score"""
+    score = min(max(score, SCORE_LIMIT), 1 - SCORE_LIMIT)
+    return -400 * math.log10(1 / score - 1)
+
+
+def seatings(bot_a, bot_b):
+    """returns the two seatings of a match: the policy of each seat in turn order"""
+    first = [bot_a if i % 2 == 0 else bot_b for i in range(len(SEATS))]
+    second = [bot_b if i % 2 == 0 else bot_a for i in range(len(SEATS))]
+    return first, second
+
+
+def play_match(seed, bot_a, bot_b, max_turns=MAX_TURNS):
+    """plays the deal of seed with both seatings.  returns bot_a's score for the match and the two game results"""
+    results = []
+    points = 0.0
+    for seating in seatings(bot_a, bot_b):
+        result = play_game(seed, seating, max_turns)
+        results.append(result)
+        if result["winner"] is None:
+            # a game that didn't finish is a draw
+            points += 0.5
+        elif seating[SEAT_NAMES.index(result["winner"])] == bot_a:
+            points += 1
+    return points / 2, results
+
+
+def play_matches(seeds, bot_a, bot_b, max_turns=MAX_TURNS):
+    """plays a match for each seed.  returns a list of bot_a's scores"""
+    return [play_match(seed, bot_a, bot_b, max_turns)[0] for seed in seeds]
+
+
+def log_likelihood_ratio(scores, margin=MARGIN):
+    """returns the log likelihood ratio of the scores for the first bot being margin Elo stronger,
+    against it being margin Elo weaker, with the scores taken as normally distributed"""
+    n = len(scores)
+    if n < 2:
+        return 0.0
+    mean = sum(scores) / n
+    variance = sum((score - mean) ** 2 for score in scores) / n
+    if variance == 0:
+        # every match the same: no spread to judge by yet
+        variance = 0.25 / n
+    low, high = expected_score(-margin), expected_score(margin)
+    return n * (high - low) * (2 * mean - low - high) / (2 * variance)
+
+
+def sprt_bounds(alpha=ALPHA, beta=BETA):
+    """returns the log likelihood ratios below which the first bot is weaker, and above which it is stronger"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def decide(scores, margin=MARGIN, alpha=ALPHA, beta=BETA):
+    """returns 1 if the scores show the first bot is stronger, -1 if it is weaker, or 0 if it isn't decided yet"""
+    lower, upper = sprt_bounds(alpha, beta)
+    llr = log_likelihood_ratio(scores, margin)
+    if llr >= upper:
+        return 1
+    if llr <= lower:
+        return -1
+    return 0
+
+
+def pairing_result(bot_a, bot_b, scores, decision):
+    """returns a dict with the result of a pairing, with bot_a's Elo over bot_b and its confidence interval"""
+    n = len(scores)
+    mean = sum(scores) / n
+    error = math.sqrt(sum((score - mean) ** 2 for score in scores) / n / n) if n > 1 else 0.5
+    return {
+        "bots": [bot_a, bot_b],
+        "matches": n,
+        "games": 2 * n,
+        "score": mean,
+        "elo": score_elo(mean),
+        "elo_interval": [score_elo(mean - Z * error), score_elo(mean + Z * error)],
+        "decided": {1: bot_a, -1: bot_b, 0: None}[decision],
+    }
+
+
+def run_pairing(bot_a, bot_b, seed=0, max_matches=MAX_MATCHES, max_turns=MAX_TURNS, executor=None):
+    """plays matches between two bots until the sequential test decides between them, or max_matches.
+    Match i is dealt from seed + i, the same deals for every pairing.  Without an executor every
+    match is played in this process.  returns the pairing result"""
+    scores = []
+    decision = 0
+    while decision == 0 and len(scores) < max_matches:
+        start = seed + len(scores)
+        seeds = list(range(start, start + min(BATCH_SIZE, max_matches - len(scores))))
+        if executor is None:
+            scores += play_matches(seeds, bot_a, bot_b, max_turns)
+        else:
+            # a match to each worker, results put back in seed order
+            futures = [executor.submit(play_matches, [match_seed], bot_a, bot_b, max_turns) for match_seed in seeds]
+            for future in futures:
+                scores += future.result()
+        decision = decide(scores)
+    return pairing_result(bot_a, bot_b, scores, decision)
+
+
+def fit_ratings(bots, results, iterations=200):
+    """returns the Elo rating of each bot fitted to the pairing results (Bradley-Terry), with the
+    bots averaging 0, and the half width of each rating's confidence interval"""
+    strength = {bot: 1.0 for bot in bots}
+    for _ in range(iterations):
+        for bot in bots:
+            won = 0.0
+            expected = 0.0
+            for result in results:
+                if bot not in result["bots"]:
+                    continue
+                other = result["bots"][1] if result["bots"][0] == bot else result["bots"][0]
+                score = result["score"] if result["bots"][0] == bot else 1 - result["score"]
+                score = min(max(score, SCORE_LIMIT), 1 - SCORE_LIMIT)
+                won += result["matches"] * score
+                expected += result["matches"] / (strength[bot] + strength[other])
+            if expected > 0:
+                strength[bot] = won / expected
+        # keep the geometric mean at 1 so the ratings average 0
+        mean = math.exp(sum(math.log(value) for value in strength.values()) / len(bots))
+        strength = {bot: value / mean for bot, value in strength.items()}
+
+    ratings = {bot: 400 * math.log10(strength[bot]) for bot in bots}
+    intervals = {}
+    for bot in bots:
+        # Fisher information of the rating, from the matches the bot played
+        information = 0.0
+        for result in results:
+            if bot in result["bots"]:
+                other = result["bots"][1] if result["bots"][0] == bot else result["bots"][0]
+                p = expected_score(ratings[bot] - ratings[other])
+                information += result["matches"] * p * (1 - p)
+        scale = 400 / math.log(10)
+        intervals[bot] = Z * scale / math.sqrt(information) if information > 0 else math.inf
+    return ratings, intervals
+
+
+def round_robin(bots):
+    """returns every pairing of the bots"""
+    return [(bots[i], bots[j]) for i in range(len(bots)) for j in range(i + 1, len(bots))]
+
+
+def swiss_round(bots, ratings, played):
+    """returns the pairings of a Swiss round: bots next to each other in the ratings play, if
+    they haven't met yet"""
+    order = sorted(bots, key=lambda bot: -ratings.get(bot, 0))
+    pairings = []
+    waiting = []
+    for bot in order:
+        for other in waiting:
+            if frozenset((bot, other)) not in played:
+                waiting.remove(other)
+                pairings.append((other, bot))
+                break
+        else:
+            waiting.append(bot)
+    return pairings
+
+
+def run_tournament(bots, tournament_format="round-robin", rounds=None, seed=0, workers=None,
+                   max_matches=MAX_MATCHES, max_turns=MAX_TURNS):
+    """plays a tournament between the bots.  yields the result of each pairing as it is decided.
+    workers=1 plays every match in this process"""
+    with ProcessPoolExecutor(max_workers=workers) if workers != 1 else nullcontext() as executor:
+        if tournament_format == "round-robin":
+            for bot_a, bot_b in round_robin(bots):
+                yield run_pairing(bot_a, bot_b, seed, max_matches, max_turns, executor)
+            return
+        results = []
+        played = set()
+        for _ in range(rounds or len(bots) - 1):
+            ratings = fit_ratings(bots, results)[0] if results else {}
+            pairings = swiss_round(bots, ratings, played)
+            if not pairings:
+                return
+            for bot_a, bot_b in pairings:
+                played.add(frozenset((bot_a, bot_b)))
+                result = run_pairing(bot_a, bot_b, seed, max_matches, max_turns, executor)
+                results.append(result)
+                yield result
+
+
+def main(argv=None):
+    """ Command line entry point: plays the tournament and prints one JSON line per pairing """
+    parser = argparse.ArgumentParser(prog="phase_10.py tournament",
+                                     description="Rate Phase 10 computer players against each other.")
+    parser.add_argument("--bot", action="append", choices=sorted(POLICIES), help="bot to enter, give at least two")
+    parser.add_argument("--format", choices=["round-robin", "swiss"], default="round-robin", help="who plays who")
+    parser.add_argument("--rounds", type=int, default=None, help="rounds of a Swiss tournament (default: bots - 1)")
+    parser.add_argument("--max-matches", type=int, default=MAX_MATCHES,
+                        help="matches (of two games) before a pairing is called undecided")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="turns before a game is given up on")
+    args = parser.parse_args(argv)
+
+    bots = list(dict.fromkeys(args.bot or []))
+    if len(bots) < 2:
+        parser.error("give --bot at least twice, with different bots")
+
+    start = time.perf_counter()
+    results = []
+    for result in run_tournament(bots, args.format, args.rounds, args.seed, args.workers, args.max_matches,
+                                 args.max_turns):
+        print(json.dumps(result), flush=True)
+        results.append(result)
+        low, high = result["elo_interval"]
+        print(f"{result['bots'][0]} vs {result['bots'][1]}: {result['elo']:+.0f} Elo [{low:+.0f}, {high:+.0f}] "
+              f"after {result['games']} games, "
+              f"{'decided for ' + result['decided'] if result['decided'] else 'undecided'}", file=sys.stderr)
+
+    ratings, intervals = fit_ratings(bots, results)
+    games = sum(result["games"] for result in results)
+    print(f"{games} games in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    for bot in sorted(bots, key=lambda bot: -ratings[bot]):
+        print(f"{bot:10} {ratings[bot]:+6.0f} +/- {intervals[bot]:.0f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-import arcade
-from Phase_10_constants import PHASE_1_MATS, PHASE_2_MATS, PHASE_PILE_1, PHASE_PILE_2
+from Phase_10_constants import PHASE_1_MATS, PHASE_2_MATS, PHASE_PILE_1, PHASE_PILE_2, DECK_FACE_DOWN_PILE, DISCARD_PILE
+from phase_10_cards import CARD_VALUE, CARD_SUIT, CARD_CODE, CARD_POINTS, WILD, SKIP
+from phase_10_rules import check_set, check_color, check_run, check_phase
+from phase_10_solver import solve_phase, hand_counts, counts_missing, cards_missing
 
 
 class Player:
@@ -16,22 +18,11 @@ class Player:
         self.draw_card = True
         self.complete = False
 
-    def draw_card_from_deck(self, pile_list, pile_mat_list, deck_index, hand):
-        self.pile_list = pile_list
-        self.pile_mat_list = pile_mat_list
-        self.deck_index = deck_index
-        self.hand = hand
-
-        card = self.pile_list[self.deck_index][-1]
-        card.face_up()
-        card.position = pile_mat_list[self.hand].position
-        self.pile_list[self.deck_index].remove(card)
-        self.pile_list[self.hand].append(card)
-        self.draw_card = False
-
     def determine_phase_piles(self, pile_list, last_pile=5):
         self.pile_list = pile_list
         self.last_pile = last_pile
+        self.phase_pile = None
+        self.phase_pile_b = None
         if self.name == "user":
             if self.phase in PHASE_1_MATS:
                 self.phase_pile = self.pile_list[PHASE_PILE_1]
@@ -68,181 +59,168 @@ class Player:
                 self.phase_pile_b = self.pile_list[self.last_pile + 2]
                 self.last_pile = self.last_pile + 2
 
+    def phase_pile_indexes(self):
+        """returns a tuple with the pile index of each of the players phase piles"""
+        if self.phase in PHASE_2_MATS:
+            return (self.last_pile - 1, self.last_pile)
+        return (self.last_pile,)
+
     def check_set(self, amount, pile):
         """check to see if cards in phase pile meets the phase requirement for a set.
         amount = number of cards with same value needed to complete phase
         pile = the list of cards in the phase pile being checked
         returns bool"""
-        self.amount = amount
-        self.pile = pile
-        # create an empty result list for acceptable cards and bad list for invalid cards
-        res = []
-        bad = []
-        # if there are no cards
-        if len(self.pile) > 0:
-            # assign first card in pile to variable to check value against
-            card_1 = self.pile[0]
-            for card in self.pile:
-                if card.get_value() == card_1.get_value():
-                    res.append(card)
-                elif card.get_value() == "12":
-                    res.append(card)
-                else:
-                    bad.append(card)
-        else:
-            return False    
-        return len(res) >= self.amount and len(bad) == 0
+        return check_set(amount, pile)[0]
 
     def check_color(self, amount, pile):
         """ checks to see if all cards in pile has same color. returns bool.  """
-        self.amount = amount
-        self.pile = pile
-        # create an empty result list for acceptable cards and bad list for invalid cards
-        res = []
-        bad = []
-        if len(self.pile) > 0:
-            # assign first card in pile to variable to check color against
-            card_1 = self.pile[0]
-            for card in self.pile:
-                print(card.get_color())
-                if card.get_value() == "13":
-                    bad.append(card)
-                elif card.get_value() == "12":
-                    res.append(card)
-                elif card.get_color() == card_1.get_color():
-                    res.append(card)
-                else:
-                    bad.append(card)
-        else:
-            return False
-        return len(res) >= self.amount and len(bad) == 0
+        return check_color(amount, pile)[0]
 
     def check_run(self, amount, pile):
-        self.amount = amount
-        self.pile = pile
-        # create an empty result list for acceptable cards and bad list for invalid cards
-        res = []
-        bad = []
-        # list to put wild cards in
-        wild = []
-        # list of the numbered cards (non-wild/skip cards)
-        num = []
-        if len(self.pile) > 0:
-            # sort cards into appropriate list
-            # skip cards to bad list, wild cards into wild list, and numbered cards into num list
-            for card in self.pile:
-                if card.get_value() == "13":
-                    bad.append(card)
-                elif card.get_value() == "12":
-                    wild.append(card)
-                else:
-                    num.append(card)
-        else:
-            return False
-        # loop over numbered cards and start forming run of cards
-        for card in num:
-            if len(res) > 0:
-                # check if the second card is one number higher than first
-                prev_card = res[-1]
-                if int(card.get_value()) == (int(prev_card.get_value()) + 1):
-                    res.append(card)
-                # check if cards are the same number, which is not valid for a run
-                elif int(card.get_value()) == int(prev_card.get_value()):
-                    bad.append(card)
-                # if the next card does not come next in the run, check is a wild card(s) can be used as next card in run.
-                elif len(wild) >= (int(card.get_value()) - int(prev_card.get_value())) - 1:
-                    # loop for number of wild cards that are being used iin between numbered cards.
-                    for i in range((int(card.get_value()) - int(prev_card.get_value())) - 1):
-                        new_card = wild.pop()
-                        # change value of the wild card to the number it is being used as in the run.
-                        new_card.change_value(int(prev_card.get_value()) + 1)
-                        res.append(new_card)
-                        # set prev_card to the wild card
-                        prev_card = new_card
-                    res.append(card)
-                else:
-                    bad.append(card)
-            # add first card to list
-            else:
-                res.append(card)
-
-        # add remaining wild cards to end of the run
-        while len(wild) > 0:
-            prev_card = res[-1]
-            new_card = wild.pop()
-            # check if last card is 12 (the highest card)
-            if int(prev_card.get_value()) < 11:
-                new_card.change_value(int(prev_card.get_value()) + 1)
-                res.append(new_card)
-            # if last card is 12, add wild to the beginning of the run
-            else:
-                start_card = res[0]
-                new_card.change_value(int(start_card.get_value()) - 1)
-                print(new_card.get_value())
-                res.insert(0, new_card)
-
-        # check if there are enough valid cards to complete the run and no invalid cards
-        if len(res) >= self.amount and len(bad) == 0:
-            # hit_on_run = True  --for future 'hitting' func
-            return True
-        else:
-            #change value of wild cards back to original
-            for card in self.pile:
-                if card.image_file_name == "./images/black_cards/black13.png":
-                    card.change_value("13")
-            return False
+        """ checks to see if cards in pile make a run of at least amount cards. returns bool. """
+        return check_run(amount, pile)[0]
 
     def phase_complete(self):
-        if self.phase == 1:
-            return (self.check_set(3, self.phase_pile_b) and self.check_set(3, self.phase_pile))
-
-        elif self.phase == 2:
-            return (self.check_set(3, self.phase_pile) and self.check_run(4, self.phase_pile_b))\
-                or (self.check_set(3, self.phase_pile_b) and self.check_run(4, self.phase_pile))
-
-        elif self.phase == 3:
-            return (self.check_set(4, self.phase_pile) and self.check_run(4, self.phase_pile_b))\
-                or (self.check_set(4, self.phase_pile_b) and self.check_run(4, self.phase_pile))
-
-        elif self.phase == 4:
-            return self.check_run(7, self.phase_pile)
-
-        elif self.phase == 5:
-            return self.check_run(8, self.phase_pile)
-
-        elif self.phase == 6:
-            return self.check_run(9, self.phase_pile)
-
-        elif self.phase == 7:
-            return self.check_set(4, self.phase_pile_b) and self.check_set(4, self.phase_pile)
-
-        elif self.phase == 8:
-            return self.check_color(7, self.phase_pile)
-
-        elif self.phase == 9:
-            return (self.check_set(5, self.phase_pile) and self.check_set(2, self.phase_pile_b))\
-                or (self.check_set(5, self.phase_pile_b) and self.check_set(2, self.phase_pile))
-
-        elif self.phase == 10:
-            return (self.check_set(5, self.phase_pile) and self.check_set(3, self.phase_pile_b))\
-                or (self.check_set(5, self.phase_pile_b) and self.check_set(3, self.phase_pile))
-
+        """checks to see if the cards in the phase piles make the players phase.  Phase piles holding the
+        same cards give the same answer, so the check is looked up in the phase cache. returns bool"""
+        return check_phase(self.phase, self.phase_pile, self.phase_pile_b)
 
     def add_score(self, pile):
         """at end of round, add the point total for each card remaining in hand to total score."""
         self.pile = pile
         if len(self.pile[self.hand]) > 0:
             for card in self.pile[self.hand]:
-                self.score += card.get_points()
+                self.score += CARD_POINTS[card]
         else:
             pass
 
-### use this class to create computter AI methods
 class Comp(Player):
-    def __init__(self, name, turn, phase=1, phase_complete=False, score=0):
-        super().__init__(name, turn, phase, phase_complete, score)
-
-    ##add methods for what to do on comp turn.
+    """ Computer player.  play_turn() plays a whole turn through the game engine.  Each choice is
+    made from how many cards the hand is missing for the phase, worked out once for the hand and
+    then one card at a time for each card it could draw or throw away. """
+
+    def __init__(self, name, hand, phase=1, turn=False, score=0):
+        super().__init__(name, hand, phase, turn, score)
+
+    def missing_without(self, hand):
+        """returns a dict of card -> how many cards the hand would be missing for the phase without that card"""
+        counts, wilds, suits = hand_counts(hand)
+        by_code = {}
+        missing = {}
+        for card in hand:
+            code = CARD_CODE[card]
+            if code not in by_code:
+                value = CARD_VALUE[card]
+                if value == WILD:
+                    by_code[code] = counts_missing(self.phase, counts, wilds - 1, suits)
+                elif value == SKIP:
+                    by_code[code] = counts_missing(self.phase, counts, wilds, suits)
+                else:
+                    suit = CARD_SUIT[card]
+                    by_code[code] = counts_missing(self.phase, counts[:value] + (counts[value] - 1,) + counts[value + 1:],
+                                                   wilds, suits[:suit] + (suits[suit] - 1,) + suits[suit + 1:])
+            missing[card] = by_code[code]
+        return missing
+
+    def choose_draw(self, engine):
+        """returns the pile to draw from: the discard pile if its top card gets the hand closer to
+        the phase, or fits on a completed phase pile once the phase is made, otherwise the deck"""
+        discard = engine.piles[DISCARD_PILE]
+        if len(discard) == 0 or CARD_VALUE[discard[-1]] == SKIP:
+            return DECK_FACE_DOWN_PILE
+        top = discard[-1]
+        hand = engine.piles[self.hand]
+        if self.complete:
+            if any(engine.fits_pile(top, pile_index) for pile_index in engine.hit_piles()):
+                return DISCARD_PILE
+            return DECK_FACE_DOWN_PILE
+        if CARD_VALUE[top] == WILD:
+            return DISCARD_PILE
+        # the hand with the top card, after throwing away its least useful card
+        best = min(self.missing_without(hand + [top]).values())
+        if best < cards_missing(hand, self.phase):
+            return DISCARD_PILE
+        return DECK_FACE_DOWN_PILE
+
+    def choose_hits(self, engine):
+        """returns a list of (card, pile index) for cards in hand that fit on a completed phase pile,
+        highest scoring cards first"""
+        hits = []
+        piles = engine.hit_piles()
+        for card in sorted(engine.piles[self.hand], key=lambda card: -CARD_POINTS[card]):
+            if CARD_VALUE[card] == SKIP:
+                continue
+            for pile_index in piles:
+                if engine.fits_pile(card, pile_index):
+                    hits.append((card, pile_index))
+                    break
+        return hits
+
+    def choose_skip(self, engine, n):
+        """returns the index of the player to skip: whoever is closest to going out, and of those, whoever
+        plays soonest after this player, so ties don't always fall on the same seats"""
+        count = len(engine.player_list)
+        others = [index for index in range(count) if index != n and not engine.player_list[index].skipped]
+        if len(others) == 0:
+            return None
+        return max(others, key=lambda index: (engine.player_list[index].complete, engine.player_list[index].phase,
+                                              -len(engine.piles[engine.player_list[index].hand]),
+                                              -((index - n) % count)))
+
+    def choose_discard(self, engine):
+        """returns the card to throw away: the one the phase needs least, and the highest scoring of those.
+        Wild cards are kept for as long as possible"""
+        hand = engine.piles[self.hand]
+        if self.complete:
+            missing = {}
+        else:
+            missing = self.missing_without(hand)
+        return min(hand, key=lambda card: (CARD_VALUE[card] == WILD, missing.get(card, 0), -CARD_POINTS[card]))
+
+    def play_cards(self, engine):
+        """ Lays the phase as soon as the hand can make it, then hits until nothing else fits.
+        Called after drawing.  returns True if the round ended """
+        round_number = engine.round_number
+
+        def round_over():
+            return engine.game_over or engine.round_number != round_number
+
+        if not self.complete and not engine.phase_laid(self):
+            solved = solve_phase(engine.piles[self.hand], self.phase)
+            if solved is not None:
+                for pile_index, cards in zip(self.phase_pile_indexes(), solved[0]):
+                    for card in cards:
+                        engine.lay(card, pile_index)
+                        if round_over():
+                            return True
+                engine.check_phase_piles()
+
+        hit = self.complete
+        while hit:
+            hit = False
+            for card, pile_index in self.choose_hits(engine):
+                hit = engine.hit(card, pile_index) or hit
+                if round_over():
+                    return True
+        return False
+
+    def end_turn(self, engine):
+        """ Throws a skip at another player if the hand has one, otherwise discards. """
+        n = engine.get_turn()
+        for card in engine.piles[self.hand]:
+            if CARD_VALUE[card] == SKIP:
+                index = self.choose_skip(engine, n)
+                if index is not None and engine.skip(card, index):
+                    return
+        engine.discard(self.choose_discard(engine))
+
+    def play_turn(self, engine):
+        """ Plays a whole turn: draw, lay the phase if it can be made, hit, then skip or discard. """
+        if self.draw_card:
+            engine.draw(self.choose_draw(engine))
+        if self.play_cards(engine):
+            return
+        self.end_turn(engine)
 
 # if __name__ == "__main__":
 #     pass
\ No newline at end of file
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from phase_10_log import EventLog, EVENT, replay, read_log
+from phase_10_save import dumps
+from test_save import new_game, play, MAX_TURNS
+
+
+def logged_game(seed, turns=MAX_TURNS):
+    """returns an engine that played a game with its events logged, and the bytes of the log"""
+    engine = new_game(seed)
+    file = io.BytesIO()
+    engine.log = EventLog(file, engine)
+    play(engine, turns)
+    engine.log.flush()
+    engine.log = None
+    return engine, file.getvalue()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_reaches_the_same_game(seed):
+    engine, data = logged_game(seed)
+    assert engine.game_over
+    assert dumps(replay(data)) == dumps(engine)
+
+
+def test_log_started_part_way_replays_from_there():
+    engine = new_game(7)
+    play(engine, 50)
+    file = io.BytesIO()
+    engine.log = EventLog(file, engine)
+    play(engine, 50)
+    engine.log.flush()
+    assert dumps(replay(file.getvalue())) == dumps(engine)
+
+
+def test_replay_stops_after_events():
+    engine, data = logged_game(1, turns=60)
+    snapshot, events = read_log(data)
+    stopped = replay(data, stop=len(events) // 2)
+    assert dumps(stopped) != dumps(engine)
+    assert dumps(replay(data, stop=len(events))) == dumps(engine)
+
+
+def test_log_cut_off_in_an_event_ends_at_the_last_whole_one():
+    engine, data = logged_game(2, turns=60)
+    snapshot, events = read_log(data)
+    assert read_log(data[:-1])[1] == events[:-1]
+    replay(data[:-1])
+
+
+def test_replay_catches_a_log_the_game_does_not_follow():
+    engine, data = logged_game(3, turns=60)
+    snapshot, events = read_log(data)
+    start = len(data) - len(events) * EVENT.size
+    # the first event moved to the wrong player
+    kind, player, card, pile = events[0]
+    bad = data[:start] + EVENT.pack(kind, (player + 1) % 4, card, pile) + data[start + EVENT.size:]
+    with pytest.raises(ValueError):
+        replay(bad)
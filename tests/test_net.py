@@ -0,0 +1,164 @@
+import pytest
+
+from phase_10_cards import DECK_SIZE
+from phase_10_client import GameClient, bot_moves, fallback_move
+from phase_10_net import FRAME, VIEW, DELTA, WATCH, MOVED, read_view, read_deltas, view_body, delta_body, can_see, \
+    hidden_piles
+import phase_10_server
+from phase_10_server import Table
+from Phase_10_constants import DECK_FACE_DOWN_PILE, DISCARD_PILE, NO_CARD
+
+
+class Writer:
+    """ Stands in for the StreamWriter of a client, keeping what the server writes to it """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.transport = self
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def get_write_buffer_size(self):
+        return len(self.data)
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def frames(self):
+        """returns the (kind, body) of each frame written since the last call"""
+        frames = []
+        offset = 0
+        while offset < len(self.data):
+            kind, length = FRAME.unpack_from(self.data, offset)
+            offset += FRAME.size
+            frames.append((kind, bytes(self.data[offset:offset + length])))
+            offset += length
+        self.data.clear()
+        return frames
+
+
+def check_view(view, engine, seat):
+    """ Check that a client's view of the game shows what the player in seat can see of it """
+    for pile_index in range(len(engine.piles)):
+        if pile_index in hidden_piles(engine, seat):
+            assert len(view.piles[pile_index]) == len(engine.piles[pile_index]), pile_index
+        else:
+            assert view.piles[pile_index] == engine.piles[pile_index], pile_index
+    for viewed, player in zip(view.player_list, engine.player_list):
+        assert (viewed.turn, viewed.skipped, viewed.draw_card, viewed.complete, viewed.phase, viewed.score) == \
+            (player.turn, player.skipped, player.draw_card, player.complete, player.phase, player.score)
+    assert view.round_number == engine.round_number
+    assert view.game_over == engine.game_over
+    # the piles of complete players take the same hits.  The engine keeps the rules of the last round
+    # once the game is over, when nobody is complete any more
+    for player in engine.player_list:
+        if not player.complete:
+            continue
+        for pile_index in player.phase_pile_indexes():
+            rule, viewed_rule = engine.hit_rules.get(pile_index), view.hit_rules.get(pile_index)
+            assert (rule is None) == (viewed_rule is None), pile_index
+            if rule is not None:
+                assert [rule.accepts(card) for card in range(DECK_SIZE)] == \
+                    [viewed_rule.accepts(card) for card in range(DECK_SIZE)], pile_index
+
+
+def play_table(seed, watch_from=None, max_moves=5000):
+    """ Play a game at a table of four computer players without any sockets, checking every client's
+    view after every move.  Someone starts watching after watch_from moves.  returns the table and
+    the number of moves turned down """
+    table = Table(1, seed)
+    connections = [(Writer(), GameClient()) for _ in table.writers]
+    for seat, (writer, client) in enumerate(connections):
+        table.sit(writer, seat)
+        client.seat = seat
+    table.start()
+
+    def deliver():
+        for writer, client in connections:
+            for kind, body in writer.frames():
+                assert kind in (VIEW, DELTA)
+                client.update(kind, body)
+            check_view(client.engine, table.engine, client.seat)
+
+    deliver()
+    moves = 0
+    rejected = 0
+    while not table.engine.game_over:
+        assert moves < max_moves, "the game didn't finish"
+        seat = table.engine.get_turn()
+        client = connections[seat][1]
+        for event in bot_moves(client.engine, seat):
+            if not table.move(seat, event):
+                # like a client, end the turn the simple way instead
+                rejected += 1
+                assert table.move(seat, fallback_move(client.engine, seat))
+            table.send_deltas()
+            moves += 1
+            if moves == watch_from:
+                watcher = (Writer(), GameClient())
+                watcher[1].seat = WATCH
+                table.watch(watcher[0])
+                connections.append(watcher)
+            deliver()
+            if table.engine.game_over or table.engine.get_turn() != seat:
+                break
+    return table, rejected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_views_follow_the_game(seed):
+    table, rejected = play_table(seed, watch_from=50 + 40 * seed)
+    assert table.engine.game_over
+    assert rejected == 0
+
+
+def test_deltas_hide_cards_the_seat_cannot_see():
+    table = Table(1, 5)
+    table.start()
+    engine = table.engine
+    for seat, player in enumerate(engine.player_list):
+        other = engine.player_list[(seat + 1) % len(engine.player_list)]
+        for from_pile, to_pile in [(DECK_FACE_DOWN_PILE, player.hand), (DECK_FACE_DOWN_PILE, other.hand),
+                                   (other.hand, DISCARD_PILE), (player.hand, other.hand)]:
+            version, deltas = read_deltas(delta_body(engine, 1, [(MOVED, 10, from_pile, to_pile)], seat))
+            seen = can_see(engine, seat, from_pile) or can_see(engine, seat, to_pile)
+            assert deltas == [(MOVED, 10 if seen else NO_CARD, from_pile, to_pile)]
+
+
+def test_views_only_show_the_seats_own_hand():
+    table = Table(1, 6)
+    table.start()
+    engine = table.engine
+    for seat in list(range(len(engine.player_list))) + [WATCH]:
+        version, view = read_view(view_body(engine, 3, seat))
+        assert version == 3
+        check_view(view, engine, seat)
+        # the cards the seat can't see are sorted and dealt back out, so they tell it nothing
+        hidden = [card for pile_index in hidden_piles(engine, seat) for card in view.piles[pile_index]]
+        assert hidden == sorted(hidden)
+
+
+def test_clients_that_stop_reading_are_dropped(monkeypatch):
+    monkeypatch.setattr(phase_10_server, "WRITE_BUFFER_LIMIT", 2000)
+    table = Table(1, 8)
+    writers = [Writer() for _ in table.writers]
+    for seat, writer in enumerate(writers):
+        table.sit(writer, seat)
+    stalled = Writer()
+    table.watch(stalled)
+    table.start()
+    # the players draw and throw away their last card, reading everything, while the watcher reads nothing
+    while not stalled.closed:
+        for writer in writers:
+            writer.frames()
+        seat = table.engine.get_turn()
+        assert table.move(seat, fallback_move(table.engine, seat))
+        table.send_deltas()
+    assert stalled not in table.watchers
+    assert len(stalled.data) <= 2000 + 200
+    assert not any(writer.closed for writer in writers)
@@ -0,0 +1,99 @@
+import bisect
+import random
+
+import pytest
+
+from phase_10_cards import CARD_VALUE, CARD_SUIT, DECK_SIZE, WILD, SKIP, BLACK
+from phase_10_rules import SET, RUN, PHASE_GROUPS, check_set, check_run, check_color, check_phase, hit_rules
+
+
+def card(value, suit=0, copy=0):
+    """returns the id of a card of a value and suit"""
+    return [c for c in range(DECK_SIZE) if CARD_VALUE[c] == value and (value >= WILD or CARD_SUIT[c] == suit)][copy]
+
+
+WILDS = [c for c in range(DECK_SIZE) if CARD_VALUE[c] == WILD]
+SKIPS = [c for c in range(DECK_SIZE) if CARD_VALUE[c] == SKIP]
+
+
+def test_check_set():
+    assert check_set(3, [card(4, 0), card(4, 1), card(4, 2)])[0]
+    assert check_set(3, [card(4, 0), WILDS[0], card(4, 2)]) == (True, {WILDS[0]: 4})
+    assert not check_set(3, [card(4, 0), card(5, 1), card(4, 2)])[0]
+    assert not check_set(3, [card(4, 0), card(4, 1)])[0]
+    assert not check_set(3, [card(4, 0), card(4, 1), SKIPS[0]])[0]
+
+
+def test_check_run():
+    assert check_run(4, [card(2), card(3), card(4), card(5)])[0]
+    assert check_run(4, [card(2), card(3), WILDS[0], card(5)]) == (True, {WILDS[0]: 4})
+    # wild cards go on the top of the run, and below it once it reaches 12
+    assert check_run(4, [card(9), card(10), WILDS[0], WILDS[1]]) == (True, {WILDS[0]: 11, WILDS[1]: 8})
+    assert not check_run(4, [card(2), card(3), card(3, 1), card(5)])[0]
+    assert not check_run(4, [card(2), card(3), card(4), card(7)])[0]
+    assert not check_run(4, [card(2), card(3), card(4), SKIPS[0]])[0]
+    assert not check_run(4, WILDS[:4] + WILDS[4:] + [card(value) for value in range(5)])[0]
+
+
+def test_check_color():
+    assert check_color(3, [card(1, 2), card(7, 2), WILDS[0]]) == (True, {WILDS[0]: 2})
+    assert not check_color(3, [card(1, 2), card(7, 1), card(9, 2)])[0]
+
+
+def random_group(kind, amount, rng):
+    """returns a sorted pile that is close to a group: one of the right shape, with some cards swapped
+    for random ones"""
+    numbered = [c for c in range(DECK_SIZE) if CARD_VALUE[c] < WILD]
+    if kind == SET:
+        value = rng.randrange(WILD)
+        pile = [c for c in numbered if CARD_VALUE[c] == value][:amount]
+    elif kind == RUN:
+        low = rng.randrange(WILD - amount + 1)
+        pile = [rng.choice([c for c in numbered if CARD_VALUE[c] == value]) for value in range(low, low + amount)]
+    else:
+        suit = rng.randrange(BLACK)
+        pile = rng.sample([c for c in numbered if CARD_SUIT[c] == suit], amount)
+    for i in range(len(pile)):
+        roll = rng.random()
+        if roll < 0.2:
+            pile[i] = rng.choice(WILDS)
+        elif roll < 0.3:
+            pile[i] = rng.randrange(DECK_SIZE)
+    return sorted(set(pile))
+
+
+def laid_phases(count, seed=0):
+    """returns a list of (phase, pile, pile_b) of random laid phases, valid and not"""
+    rng = random.Random(seed)
+    laid = []
+    for _ in range(count):
+        phase = rng.randint(1, 10)
+        piles = [random_group(kind, amount, rng) for kind, amount in PHASE_GROUPS[phase]]
+        laid.append((phase, piles[0], piles[1] if len(piles) > 1 else None))
+    return laid
+
+
+def test_check_phase_either_way_around():
+    sets = [card(4, 0), card(4, 1), card(4, 2)]
+    run = [card(6), card(7), card(8), card(9)]
+    assert check_phase(2, sets, run)
+    assert check_phase(2, run, sets)
+    assert not check_phase(2, sets, sets)
+    assert not check_phase(2, sets)
+    assert check_phase(8, [card(value, 3) for value in range(7)])
+
+
+@pytest.mark.parametrize("phase", sorted(PHASE_GROUPS))
+def test_hit_rules_accept_what_keeps_the_phase(phase):
+    laid = [shape for shape in laid_phases(4000, seed=phase) if shape[0] == phase and check_phase(*shape)]
+    assert laid
+    for _, pile, pile_b in laid:
+        for rule, index in zip(hit_rules(phase, pile, pile_b), range(2)):
+            if rule is None:
+                continue
+            for hit in range(DECK_SIZE):
+                if hit in pile or (pile_b is not None and hit in pile_b):
+                    continue
+                piles = [list(pile), list(pile_b) if pile_b is not None else None]
+                bisect.insort(piles[index], hit)
+                assert rule.accepts(hit) == check_phase(phase, *piles), (pile, pile_b, hit)
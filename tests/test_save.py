@@ -0,0 +1,74 @@
+import pytest
+
+from phase_10_engine import Phase10Engine, SEATS
+from phase_10_save import dumps, loads
+from player_class import Comp
+
+# Most turns a test game is played for
+MAX_TURNS = 3000
+
+
+def new_game(seed):
+    """returns an engine of a dealt game between four Comp players"""
+    players = [Comp(name, hand) for name, hand in SEATS]
+    players[0].turn = True
+    engine = Phase10Engine(players, seed=seed)
+    engine.setup()
+    return engine
+
+
+def play(engine, turns):
+    """ Play up to turns turns of the game with the Comp players """
+    for _ in range(turns):
+        if engine.game_over:
+            return
+        engine.player_list[engine.get_turn()].play_turn(engine)
+
+
+def test_round_trip_through_a_game():
+    engine = new_game(3)
+    for _ in range(MAX_TURNS):
+        data = dumps(engine)
+        assert dumps(loads(data, player_class=Comp)) == data
+        if engine.game_over:
+            break
+        play(engine, 1)
+    assert engine.game_over
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_loaded_game_plays_on_the_same(seed):
+    engine = new_game(seed)
+    play(engine, 40 + 25 * seed)
+    loaded = loads(dumps(engine), player_class=Comp)
+    play(engine, MAX_TURNS)
+    play(loaded, MAX_TURNS)
+    assert dumps(loaded) == dumps(engine)
+
+
+def test_loads_keeps_the_view_players():
+    engine = new_game(1)
+    play(engine, 30)
+    players = [Comp(name, hand) for name, hand in SEATS]
+    loaded = loads(dumps(engine), players)
+    assert loaded.player_list == players
+    assert [player.phase for player in players] == [player.phase for player in engine.player_list]
+
+
+def test_bad_saves_raise_value_error():
+    data = dumps(new_game(2))
+    with pytest.raises(ValueError):
+        loads(b"")
+    with pytest.raises(ValueError):
+        loads(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        loads(data[:4] + bytes([data[4] + 1]) + data[5:])
+    with pytest.raises(ValueError):
+        loads(data[:-10])
+
+
+@pytest.mark.parametrize("seed", [-1, 1 << 64, (1 << 70) + 5])
+def test_any_seed_can_be_saved(seed):
+    engine = Phase10Engine(seed=seed)
+    engine.setup()
+    assert loads(dumps(engine)).seed == engine.seed